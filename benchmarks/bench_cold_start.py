@@ -0,0 +1,106 @@
+"""
+Measure what a new app instance pays for its first query on a collection: the
+snapshot load per format (FAISS + pickle vs portable vectors + chunk table),
+and the first query with and without preloading (HOT_COLLECTIONS).
+
+Chunks are synthetic and embedded with the hashing backend in a scratch
+VECTORSTORE_DIR, so no API key is needed.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_cold_start --chunks 20000
+    python -m benchmarks.bench_cold_start --chunks 50000 --storage-mode int8 --repeats 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from src.langgraphagenticai.ui.uiconfigfile import apply_overrides
+
+
+def quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def timed(fn):
+    start_time = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start_time) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000, help="Chunks in the collection")
+    parser.add_argument("--dimension", type=int, default=384, help="Hashing embedding dimension")
+    parser.add_argument("--storage-mode", default="flat", help="VECTOR_STORAGE_MODE of the collection")
+    parser.add_argument("--repeats", type=int, default=3, help="Cold loads per format")
+    args = parser.parse_args()
+
+    apply_overrides({
+        "VECTORSTORE_DIR": tempfile.mkdtemp(prefix="bench_cold_start_"),
+        "EMBEDDING_BACKEND": "hashing",
+        "HASHING_EMBEDDING_DIMENSION": str(args.dimension),
+        "VECTOR_STORAGE_MODE": args.storage_mode,
+        "SEGMENT_STORE": "false",
+        "DISK_BUDGET_MB": "0",
+        "RATE_LIMITING": "false",
+    })
+    from src.langgraphagenticai.RAG import rag_module
+    from src.langgraphagenticai.RAG.preloader import CollectionPreloader
+
+    chunks = [Document(page_content=f"Item {i}. Segment {i % 97} revenue grew {i % 41} percent in region {i % 13}; "
+                                    f"operating margin {i % 29}.{i % 10} percent.",
+                       metadata={"source": "synthetic.txt", "page": i // 40})
+              for i in range(args.chunks)]
+    file_names = ["synthetic.txt"]
+    snapshots = {}
+    for snapshot_format in ("faiss", "portable"):
+        apply_overrides({"SNAPSHOT_FORMAT": snapshot_format})
+        with quiet():
+            module = rag_module.RAGModule(None)
+            module.create_vectorstore(chunks, file_names=file_names)
+        snapshots[snapshot_format] = module.published_snapshot
+
+    print(f"🧊 {args.chunks} chunks x {args.dimension} dims, {args.storage_mode} index")
+    for snapshot_format, snapshot_path in snapshots.items():
+        size_mb = sum(os.path.getsize(os.path.join(snapshot_path, name)) for name in os.listdir(snapshot_path)) / 1e6
+        times = []
+        for _ in range(args.repeats):
+            rag_module._loaded_stores.clear()
+            with quiet():
+                module = rag_module.RAGModule(None)
+                _, ms = timed(lambda: module.load_vectorstore(snapshot_path=snapshot_path))
+            times.append(ms)
+        print(f"   load {snapshot_format:<9} {statistics.median(times):8.1f} ms (median of {args.repeats})  {size_mb:7.1f} MB")
+
+    # The portable version is the serving one (published last)
+    query = "segment 42 revenue growth"
+    with quiet():
+        owner_module = rag_module.RAGModule(None)
+        owner_module.load_vectorstore(file_names=file_names)
+        name = owner_module.register_collection("bench", file_names, num_chunks=len(chunks))["name"]
+
+    def first_query():
+        module = rag_module.RAGModule(None)
+        module.load_collections("bench", [name])
+        return module.retrieve_documents(query)
+
+    rag_module._loaded_stores.clear()
+    with quiet():
+        _, cold_ms = timed(first_query)
+    rag_module._loaded_stores.clear()
+    with quiet():
+        preloader = CollectionPreloader(owner_module.persist_directory, [name])
+        _, preload_ms = timed(preloader.wait)
+        _, warm_ms = timed(first_query)
+    print(f"   first query cold       {cold_ms:8.1f} ms")
+    print(f"   first query preloaded  {warm_ms:8.1f} ms  (preload took {preload_ms:.1f} ms in the background)")
+
+
+if __name__ == "__main__":
+    main()
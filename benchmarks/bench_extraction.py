@@ -0,0 +1,45 @@
+"""
+Compare PDF text extraction backends (pypdf / pymupdf / pdfium) on real filings.
+
+Backends whose library is not installed are reported and skipped.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_extraction --pdf filing1.pdf --pdf filing2.pdf
+    python -m benchmarks.bench_extraction --pdf filing.pdf --backends pypdf,pymupdf --repeat 3
+"""
+import argparse
+import time
+
+from src.langgraphagenticai.RAG.extraction import PDF_BACKENDS
+
+
+def run(backend, paths, repeat):
+    best = float("inf")
+    pages = chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        documents = [doc for path in paths for doc in backend.extract(path)]
+        best = min(best, time.perf_counter() - start)
+        pages = len(documents)
+        chars = sum(len(doc.page_content) for doc in documents)
+    print(f"{backend.name:<10} {best:8.3f}s  {pages / best:9.1f} pages/s  {pages:6d} pages  {chars:10d} characters")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", action="append", required=True, help="PDF file(s) to extract")
+    parser.add_argument("--backends", default=",".join(PDF_BACKENDS), help="Comma-separated PDF backends")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per backend (best time is reported)")
+    args = parser.parse_args()
+
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        if name not in PDF_BACKENDS:
+            raise SystemExit(f"Unknown backend: {name}. Choose from {', '.join(PDF_BACKENDS)}")
+        try:
+            run(PDF_BACKENDS[name](), args.pdf, max(1, args.repeat))
+        except ImportError as e:
+            print(f"{name:<10} skipped: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Track app start-up cost: import time per use case and per-rerun config overhead.
+
+Each target is imported in a fresh interpreter with ``python -X importtime`` and
+its cumulative import time is reported with the heaviest modules it pulled in.
+"app" is what every Streamlit process pays before the first page renders; the
+use-case targets are what the first message of that use case adds on top.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_importtime
+    python -m benchmarks.bench_importtime --targets app,basic --top 5 --repeat 3
+    python -m benchmarks.bench_importtime --budget app=400 --budget basic=800 --record importtime.jsonl
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Modules the app imports before the first page renders, and per use case on the first message
+TARGETS = {
+    "app": ["src.langgraphagenticai.main"],
+    "basic": ["src.langgraphagenticai.main", "src.langgraphagenticai.LLMS.groqllm",
+              "src.langgraphagenticai.graph.graph_builder", "src.langgraphagenticai.ui.streamlitui.display_result"],
+    "tools": ["src.langgraphagenticai.main", "src.langgraphagenticai.LLMS.groqllm",
+              "src.langgraphagenticai.graph.graph_builder", "src.langgraphagenticai.ui.streamlitui.display_result",
+              "langgraph.prebuilt", "src.langgraphagenticai.nodes.chatbot_with_Tool_node",
+              "src.langgraphagenticai.tools.serach_tool", "src.langgraphagenticai.tools.tavily_client"],
+    "rag": ["src.langgraphagenticai.main", "src.langgraphagenticai.LLMS.groqllm",
+            "src.langgraphagenticai.graph.graph_builder", "src.langgraphagenticai.ui.streamlitui.display_result",
+            "src.langgraphagenticai.nodes.rag_node"],
+}
+
+
+def measure_imports(modules, top):
+    """
+    Import modules in a fresh interpreter; return (total seconds, heaviest modules).
+    """
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=os.getcwd())
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    total = 0
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, module_column = line[len("import time:"):].split("|")
+        cumulative = int(cumulative_us)
+        # Nested imports are indented two spaces per level; top-level ones add up to the total
+        if len(module_column) - len(module_column.lstrip()) == 1:
+            total += cumulative
+        timings.append((cumulative, module_column.strip()))
+    # Report the heaviest third-party / project packages, not every submodule
+    heaviest, seen = [], set()
+    for cumulative, name in sorted(timings, reverse=True):
+        root = name.split(".")[0]
+        if root in seen or root == "src":
+            continue
+        seen.add(root)
+        heaviest.append((name, cumulative / 1e6))
+        if len(heaviest) == top:
+            break
+    return total / 1e6, heaviest
+
+
+def measure_config(repeat=200):
+    """
+    Time Config() construction as paid on every Streamlit rerun (cached vs fresh parse).
+    """
+    from configparser import ConfigParser
+    from src.langgraphagenticai.ui.uiconfigfile import Config
+
+    config_file = "./src/langgraphagenticai/ui/uiconfigfile.ini"
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ConfigParser().read(config_file)
+    fresh = (time.perf_counter() - start) / repeat
+    Config()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Config().get_usecase_options()
+    cached = (time.perf_counter() - start) / repeat
+    return fresh, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma-separated targets")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages to list per target")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per target (best time is reported)")
+    parser.add_argument("--budget", action="append", default=[], help="target=milliseconds; exit 1 if exceeded")
+    parser.add_argument("--record", default="", help="Append the results as a JSON line to this file")
+    args = parser.parse_args()
+
+    budgets = {}
+    for entry in args.budget:
+        target, _, ms = entry.partition("=")
+        budgets[target.strip()] = float(ms)
+
+    results = {}
+    for target in [t.strip() for t in args.targets.split(",") if t.strip()]:
+        if target not in TARGETS:
+            raise SystemExit(f"Unknown target: {target}. Choose from {', '.join(TARGETS)}")
+        runs = [measure_imports(TARGETS[target], args.top) for _ in range(max(1, args.repeat))]
+        total, heaviest = min(runs, key=lambda run: run[0])
+        results[target] = round(total * 1000, 1)
+        print(f"{target:<6} {total * 1000:8.1f} ms  " + ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in heaviest))
+
+    fresh, cached = measure_config()
+    results["config_rerun_us"] = round(cached * 1e6, 1)
+    print(f"config  parse {fresh * 1e6:7.1f} us  cached Config() {cached * 1e6:7.1f} us per rerun")
+
+    if args.record:
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(results, timestamp=time.time())) + "\n")
+
+    over = [f"{target} {results[target]:.0f} ms > {ms:.0f} ms" for target, ms in budgets.items()
+            if target in results and results[target] > ms]
+    if over:
+        print("❌ Over budget: " + "; ".join(over))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
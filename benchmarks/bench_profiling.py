@@ -0,0 +1,70 @@
+"""
+Measure the overhead of the opt-in request profiler on the RAG ingest and
+retrieval path.
+
+Runs the same work (split, deduplicate, embed and index synthetic filing pages,
+then answer a batch of queries one by one) without a profiler, with the CPU
+sampler only, with sampling plus memory tracing, and with the top-allocation
+snapshots on top. The unprofiled time is the baseline for PROFILING_SAMPLE_RATE:
+at a sample rate r the average request pays about r times the reported overhead.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_profiling --pages 200 --queries 50
+    python -m benchmarks.bench_profiling --interval-ms 1 --repeat 5
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from src.langgraphagenticai.RAG.embedding_backends import HashingEmbeddingBackend
+from src.langgraphagenticai.RAG.rag_module import RAGModule
+from src.langgraphagenticai.utils.profiler import profile_request, profile_stage
+from benchmarks.bench_chunker import synthetic_pages
+
+
+def workload(pages, queries, dimension):
+    module = RAGModule(None, persist_directory=tempfile.mkdtemp(prefix="bench_profiling_"),
+                       embedding_backend=HashingEmbeddingBackend(dimension))
+    with profile_stage("process_documents"):
+        chunks = module.deduplicate_chunks(module.split_documents(pages))
+        module.find_or_create_vectorstore(["synthetic.pdf"], chunks)
+    with profile_stage("retrieve_context"):
+        for i in range(queries):
+            module.similarity_search_with_score(f"net sales growth in quarter {i % 4 + 1}", k=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages ingested per run")
+    parser.add_argument("--queries", type=int, default=50, help="Queries answered per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration (median is reported)")
+    parser.add_argument("--interval-ms", type=float, default=5, help="Sampling interval of the CPU profiler")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.pages)
+    output_dir = tempfile.mkdtemp(prefix="bench_profiles_")
+    configurations = [
+        ("off", None),
+        ("sampling", {"trace_memory": False, "top_allocations": 0}),
+        ("+ memory", {"trace_memory": True, "top_allocations": 0}),
+        ("+ top allocs", {"trace_memory": True, "top_allocations": 10}),
+    ]
+    print(f"📚 {args.pages} pages, {args.queries} queries, median of {args.repeat} run(s)")
+    baseline = None
+    for label, options in configurations:
+        timings = []
+        for _ in range(args.repeat):
+            settings = dict(options or {}, output_dir=output_dir, interval_ms=args.interval_ms)
+            start = time.perf_counter()
+            with profile_request(options is not None, label="bench", settings=settings):
+                workload(pages, args.queries, args.dimension)
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"{label:<14} {median * 1000:9.1f} ms  overhead {(median / baseline - 1) * 100:+6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Measure retrieval throughput with and without cross-session query batching.
+
+Builds a collection from synthetic filing pages with the hashing embedder, then
+runs many concurrent "sessions" (threads, each with its own RAGModule) that
+retrieve against it. The embedder simulates API latency per call, so batching
+shows up the way it does against a remote embeddings API.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_query_batching --users 50 --queries 20
+    python -m benchmarks.bench_query_batching --users 100 --latency-ms 80 --pages 2000
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+from src.langgraphagenticai.RAG.embedding_backends import HashingEmbeddingBackend
+from src.langgraphagenticai.RAG.query_batcher import batching_stats
+from src.langgraphagenticai.RAG.rag_module import RAGModule
+from benchmarks.bench_chunker import synthetic_pages
+
+
+class SimulatedLatencyEmbeddings(HashingEmbeddingBackend):
+    """
+    Hashing embedder that behaves like a remote API: a fixed cost plus a per-text
+    cost per call, with at most max_in_flight calls at once (the HTTP pool size).
+    """
+
+    def __init__(self, dimension: int, latency_ms: float, per_text_ms: float = 0.1, max_in_flight: int = 20):
+        super().__init__(dimension)
+        self.latency = latency_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._in_flight = threading.Semaphore(max_in_flight)
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls += 1
+        with self._in_flight:
+            time.sleep(self.latency + self.per_text * len(texts))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def run(store_dir, file_names, embeddings, users, queries, batching):
+    questions = ["net sales growth in the quarter", "operating income and margin", "cash flow from operations",
+                 "segment results for AWS", "foreign exchange impact", "capital expenditures outlook"]
+    modules = []
+    for _ in range(users):
+        module = RAGModule(None, persist_directory=store_dir, embedding_backend=embeddings)
+        module.batching_settings["enabled"] = batching
+        module.load_vectorstore(file_names=file_names)
+        modules.append(module)
+
+    calls_before = embeddings.calls
+    latencies = []
+    lock = threading.Lock()
+
+    def session(module, offset):
+        for i in range(queries):
+            start = time.perf_counter()
+            module.similarity_search_with_score(questions[(offset + i) % len(questions)], k=5)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(module, n)) for n, module in enumerate(modules)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = users * queries
+    print(f"{'batched' if batching else 'unbatched':<10} {total / elapsed:9.1f} queries/s  "
+          f"p50 {latencies[len(latencies) // 2] * 1000:7.1f} ms  p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.1f} ms  "
+          f"{embeddings.calls - calls_before:6d} embedding calls")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="Concurrent sessions")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per session")
+    parser.add_argument("--pages", type=int, default=500, help="Synthetic pages in the collection")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated latency per embedding call")
+    parser.add_argument("--max-in-flight", type=int, default=20, help="Concurrent embedding calls allowed (HTTP pool size)")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix="bench_batching_")
+    embeddings = SimulatedLatencyEmbeddings(args.dimension, latency_ms=0, max_in_flight=args.max_in_flight)
+    builder = RAGModule(None, persist_directory=store_dir, embedding_backend=embeddings)
+    file_names = ["synthetic.pdf"]
+    chunks = builder.split_documents(synthetic_pages(args.pages))
+    builder.find_or_create_vectorstore(file_names, chunks)
+    embeddings.latency = args.latency_ms / 1000
+
+    print(f"📚 {len(chunks)} chunks, {args.users} sessions x {args.queries} queries, "
+          f"{args.latency_ms:.0f} ms per embedding call, {args.max_in_flight} in flight")
+    run(store_dir, file_names, embeddings, args.users, args.queries, batching=False)
+    run(store_dir, file_names, embeddings, args.users, args.queries, batching=True)
+    print(f"   batches: {batching_stats()}")
+
+
+if __name__ == "__main__":
+    main()
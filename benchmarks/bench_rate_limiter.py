@@ -0,0 +1,121 @@
+"""
+Measure interactive latency and failures against a rate-limited provider while
+bulk ingestion floods it, with and without the provider scheduler.
+
+A simulated provider (httpx.MockTransport) enforces a requests-per-minute limit
+and answers 429 with retry-after when it is exceeded. Interactive sessions send
+chat requests while batch workers send embedding requests back to back. Without
+the scheduler every caller retries on its own (like the SDKs: honour
+retry-after, give up after --retries); with it, calls queue in front of the
+provider, interactive first.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_rate_limiter --seconds 10 --rpm 600
+    python -m benchmarks.bench_rate_limiter --batch-workers 4 --interactive-users 8 --latency-ms 80
+"""
+import argparse
+import random
+import threading
+import time
+
+import httpx
+
+from src.langgraphagenticai.utils.rate_limiter import (
+    ProviderScheduler, RateLimitedTransport, TokenBucket, parse_duration, provider_priority,
+)
+
+
+def simulated_provider(rpm, latency_ms):
+    # The provider's own limit over one-second windows, applied without any queue
+    limit = TokenBucket("provider", rpm, 0, burst_seconds=1)
+    lock = threading.Lock()
+
+    def handle(request):
+        time.sleep(random.uniform(0.5, 1.5) * latency_ms / 1000)
+        with lock:
+            limit._refill(time.monotonic())
+            allowed = limit.requests >= 1
+            if allowed:
+                limit.requests -= 1
+        if not allowed:
+            return httpx.Response(429, headers={"retry-after": "1"}, json={"error": {"message": "rate limited"}})
+        return httpx.Response(200, json={"ok": True})
+    return httpx.MockTransport(handle)
+
+
+def call(client, path, body, retries):
+    for attempt in range(retries + 1):
+        response = client.post(f"https://provider.test{path}", json=body)
+        if response.status_code != 429:
+            return True
+        if attempt < retries:
+            time.sleep(parse_duration(response.headers.get("retry-after")) or 1)
+    return False
+
+
+def run(label, client, args):
+    stop = time.monotonic() + args.seconds
+    latencies, failures, batch_done = [], [0], [0]
+    lock = threading.Lock()
+
+    def interactive():
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            ok = call(client, "/chat/completions", {"model": "sim", "messages": [{"role": "user", "content": "q" * 400}]},
+                      args.retries)
+            with lock:
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    failures[0] += 1
+            time.sleep(args.think_ms / 1000)
+
+    def batch():
+        with provider_priority("batch"):
+            while time.monotonic() < stop:
+                if call(client, "/embeddings", {"model": "sim", "input": ["chunk " * 100] * 16}, args.retries):
+                    with lock:
+                        batch_done[0] += 1
+
+    threads = [threading.Thread(target=interactive) for _ in range(args.interactive_users)]
+    threads += [threading.Thread(target=batch) for _ in range(args.batch_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    else:
+        p50 = p95 = float("nan")
+    print(f"{label:<12} interactive {len(latencies):5d} ok {failures[0]:4d} failed  p50 {p50:8.1f} ms  "
+          f"p95 {p95:8.1f} ms   batch {batch_done[0] / args.seconds:6.1f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each run")
+    parser.add_argument("--rpm", type=float, default=600, help="Provider request limit per minute")
+    parser.add_argument("--interactive-users", type=int, default=4, help="Concurrent interactive sessions")
+    parser.add_argument("--batch-workers", type=int, default=16, help="Concurrent bulk embedding callers")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean provider latency")
+    parser.add_argument("--think-ms", type=float, default=1000, help="Pause between a session's requests")
+    parser.add_argument("--retries", type=int, default=2, help="Retries on 429 (SDK max_retries)")
+    args = parser.parse_args()
+
+    print(f"🚦 Provider limit {args.rpm:.0f} rpm, {args.interactive_users} interactive session(s), "
+          f"{args.batch_workers} batch worker(s), {args.seconds:.0f}s per run")
+    run("unscheduled", httpx.Client(transport=simulated_provider(args.rpm, args.latency_ms)), args)
+    # Stay slightly under the provider's limit so the provider itself never has to refuse
+    scheduler = ProviderScheduler({"sim": (args.rpm * 0.95, 0)}, max_wait={"interactive": 20, "batch": 300},
+                                  burst_seconds=1)
+    transport = RateLimitedTransport(simulated_provider(args.rpm, args.latency_ms), "sim", scheduler)
+    run("scheduled", httpx.Client(transport=transport), args)
+    for name, stats in scheduler.stats().items():
+        print(f"   {name}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure search throughput of one in-process index against the same collection
+split across shard worker processes.
+
+Builds a collection from synthetic filing pages with the hashing embedder, then
+re-partitions it into each shard count and runs concurrent "sessions" (threads)
+that search it by vector. Shards only help when there are cores for them: on an
+N-core machine expect gains up to about N shards, and none on a single core,
+where the pipe round trip is pure overhead.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sharding --pages 2000 --shards 1,2,4
+    python -m benchmarks.bench_sharding --storage-mode int8 --users 16 --queries 50 --batch 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from src.langgraphagenticai.RAG.embedding_backends import HashingEmbeddingBackend
+from src.langgraphagenticai.RAG.rag_module import RAGModule
+from src.langgraphagenticai.RAG.vector_compression import search_vectorstore_batch
+from benchmarks.bench_chunker import synthetic_pages
+
+
+def run(label, vectorstore, query_vectors, users, queries, batch, k, rescore_factor):
+    latencies = []
+    lock = threading.Lock()
+
+    def session(offset):
+        for i in range(queries):
+            rows = [(offset * queries + i * batch + j) % len(query_vectors) for j in range(batch)]
+            start = time.perf_counter()
+            search_vectorstore_batch(vectorstore, query_vectors[rows], k, rescore_factor=rescore_factor)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = users * queries * batch
+    print(f"{label:<12} {total / elapsed:9.1f} queries/s  p50 {latencies[len(latencies) // 2] * 1000:7.2f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:7.2f} ms per call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000, help="Synthetic pages in the collection")
+    parser.add_argument("--shards", default="1,2,4", help="Comma-separated shard counts (1 = in-process index)")
+    parser.add_argument("--storage-mode", default="flat", help="flat, fp16, int8 or pq")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--queries", type=int, default=50, help="Search calls per session")
+    parser.add_argument("--batch", type=int, default=1, help="Query vectors per search call")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    args = parser.parse_args()
+
+    store_dir = tempfile.mkdtemp(prefix="bench_sharding_")
+    embeddings = HashingEmbeddingBackend(args.dimension)
+    module = RAGModule(None, persist_directory=store_dir, embedding_backend=embeddings, storage_mode=args.storage_mode)
+    file_names = ["synthetic.pdf"]
+    chunks = module.split_documents(synthetic_pages(args.pages))
+    module.find_or_create_vectorstore(file_names, chunks)
+    questions = ["net sales growth in the quarter", "operating income and margin", "cash flow from operations",
+                 "segment results for AWS", "foreign exchange impact", "capital expenditures outlook"]
+    query_vectors = np.asarray(embeddings.embed_documents(questions * 32), dtype=np.float32)
+    query_vectors += np.random.default_rng(0).normal(0, 0.01, query_vectors.shape).astype(np.float32)
+
+    print(f"📚 {len(chunks)} chunks ({args.storage_mode}), {args.users} sessions x {args.queries} calls x "
+          f"{args.batch} queries, {os.cpu_count()} CPU core(s)")
+    for num_shards in [int(n) for n in args.shards.split(",") if n.strip()]:
+        vectorstore = module.reshard_vectorstore(num_shards, file_names=file_names)
+        label = "in-process" if num_shards <= 1 else f"{num_shards} shards"
+        run(label, vectorstore, query_vectors, args.users, args.queries, args.batch, args.k, module.rescore_factor)
+        if num_shards > 1:
+            vectorstore.close()
+
+
+if __name__ == "__main__":
+    main()
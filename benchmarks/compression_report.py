@@ -0,0 +1,72 @@
+"""
+Compare vector storage modes (flat / fp16 / int8 / pq) and reduced-dimension
+first-stage indexes on an existing collection.
+
+Usage (from the repository root):
+    python -m benchmarks.compression_report --store ./vectorstore_db/vectorstore_<hash>
+    python -m benchmarks.compression_report --store ./vectorstore_db/vectorstore_<hash> --index-dim 256
+"""
+import argparse
+import json
+import os
+
+import faiss
+import numpy as np
+
+from src.langgraphagenticai.RAG.dimension_reduction import REDUCTION_METHODS, DimensionReducer, default_reduction_method
+from src.langgraphagenticai.RAG.embedding_backends import LEGACY_BACKEND_ID
+from src.langgraphagenticai.RAG.snapshot_store import SnapshotStore
+from src.langgraphagenticai.RAG.vector_compression import (
+    STORAGE_MODES, compression_report, format_compression_report, index_storage_mode, load_full_vectors
+)
+
+
+def _read_backend_id(snapshot_path: str) -> str:
+    try:
+        with open(os.path.join(snapshot_path, "metadata.json")) as f:
+            return json.load(f).get("embedding_backend", LEGACY_BACKEND_ID)
+    except (OSError, ValueError):
+        return LEGACY_BACKEND_ID
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", required=True, help="Vectorstore directory (vectorstore_db/vectorstore_<hash>)")
+    parser.add_argument("--k", type=int, default=10, help="Recall is measured against the exact top-k")
+    parser.add_argument("--queries", type=int, default=200, help="Number of sampled queries")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="Candidates per result when re-scoring")
+    parser.add_argument("--modes", default=",".join(STORAGE_MODES), help="Comma-separated storage modes")
+    parser.add_argument("--index-dim", type=int, default=0, help="Evaluate a reduced-dimension first-stage index (0 = full)")
+    parser.add_argument("--reduction", default="auto", choices=("auto",) + REDUCTION_METHODS,
+                        help="Dimension reduction method (auto: truncate for text-embedding-3 stores, else project)")
+    args = parser.parse_args()
+
+    snapshot_path = SnapshotStore(args.store).current_path()
+    if snapshot_path is None:
+        raise SystemExit(f"No published snapshot at {args.store}")
+
+    vectors = load_full_vectors(snapshot_path)
+    if vectors is None:
+        index = faiss.read_index(os.path.join(snapshot_path, "index.faiss"))
+        if index_storage_mode(index) != "flat":
+            print("⚠️ No full-precision vectors stored - report is relative to the compressed vectors")
+        vectors = index.reconstruct_n(0, index.ntotal)
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    reduction = args.reduction
+    if reduction == "auto":
+        reduction = default_reduction_method(_read_backend_id(snapshot_path))
+    print(f"📊 {vectors.shape[0]} vectors x {vectors.shape[1]} dims from {snapshot_path}")
+    report = compression_report(
+        vectors,
+        k=args.k,
+        num_queries=args.queries,
+        modes=[m.strip() for m in args.modes.split(",") if m.strip()],
+        rescore_factor=args.rescore_factor,
+        reducer=DimensionReducer(vectors.shape[1], args.index_dim, reduction) if args.index_dim else None,
+    )
+    print(format_compression_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+"""
+Load test: drive concurrent simulated conversations end to end through the
+compiled graphs of each use case and report how latency degrades as the number
+of simultaneous users rises.
+
+Every turn does what the Streamlit app does for a message: build the graph with
+GraphBuilder.setup_graph and stream the turn's state through it. Only the
+providers are replaced by local stand-ins with configurable latency
+distributions: a chat model that answers, calls the search tool and classifies
+router prompts; the hashing embedding backend; and the local search backend.
+Stand-in calls pass the provider scheduler when --rate-limits is set and can be
+capped to a number of concurrent calls (--llm-slots etc.), so the time a call
+waits before its service starts is reported as queueing delay.
+
+Each user runs a closed loop (send a message, wait for the answer, think) for
+--seconds per concurrency level. Per level the harness reports throughput,
+p50/p95/p99 of the turn, graph build, every graph node and every stand-in, the
+queueing delay in front of each stand-in, and the process RSS growth. The
+vectorstore is built in a scratch directory (VECTORSTORE_DIR is overridden in
+memory, as are the backends), so the served store is never touched.
+
+Latency specs (milliseconds): const:MS, uniform:LO:HI, exp:MEAN, lognormal:MEDIAN:SIGMA
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --users 1,4,16 --seconds 20
+    python -m benchmarks.load_test --usecases "Agentic Assistant" --users 8,32,64 --slo-ms 3000
+    python -m benchmarks.load_test --llm-latency lognormal:1200:0.6 --llm-slots 16 --rate-limits
+    python -m benchmarks.load_test --set QUERY_BATCHING=false --usecases "RAG Chatbot"
+"""
+import argparse
+import contextlib
+import gc
+import math
+import os
+import random
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from src.langgraphagenticai.ui.uiconfigfile import apply_overrides
+from benchmarks.bench_chunker import synthetic_pages
+
+USECASES = ("Basic Chatbot", "Chatbot with Tool", "RAG Chatbot", "Agentic Assistant")
+
+CHAT_MESSAGES = ["hello", "thanks!", "what can you do", "Explain what an earnings call is in two sentences."]
+WEB_MESSAGES = [f"What is the latest news on {topic} today?" for topic in
+                ("AWS", "interest rates", "oil prices", "chip exports", "retail sales", "the S&P 500")]
+DOCUMENT_QUESTIONS = [
+    "What was net sales growth in Q{q} according to the filing?",
+    "Summarize operating income by segment for Q{q}.",
+    "What guidance does the report give for fiscal year revenue?",
+    "How did operating cash flow change in Q{q} year over year?",
+]
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec such as "lognormal:800:0.4" (milliseconds).
+    """
+
+    def __init__(self, spec: str):
+        kind, *values = spec.split(":")
+        self.spec = spec
+        self.kind = kind
+        self.values = [float(value) for value in values]
+        expected = {"const": 1, "uniform": 2, "exp": 1, "lognormal": 2}
+        if kind not in expected or len(self.values) != expected[kind]:
+            raise argparse.ArgumentTypeError(
+                f"Invalid latency spec {spec!r}: use const:MS, uniform:LO:HI, exp:MEAN or lognormal:MEDIAN:SIGMA")
+
+    def sample(self) -> float:
+        """
+        One latency in seconds.
+        """
+        if self.kind == "const":
+            ms = self.values[0]
+        elif self.kind == "uniform":
+            ms = random.uniform(*self.values)
+        elif self.kind == "exp":
+            ms = random.expovariate(1 / self.values[0]) if self.values[0] > 0 else 0.0
+        else:
+            ms = random.lognormvariate(math.log(max(self.values[0], 1e-3)), self.values[1])
+        return max(ms, 0.0) / 1000
+
+
+class Recorder:
+    """
+    Thread-safe latency samples per stage, plus event counters.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def count(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def percentiles(self, stage: str):
+        values = sorted(self.samples.get(stage, []))
+        if not values:
+            return 0, float("nan"), float("nan"), float("nan")
+
+        def rank(p):
+            return values[min(len(values) - 1, max(0, math.ceil(p * len(values)) - 1))] * 1000
+        return len(values), rank(0.50), rank(0.95), rank(0.99)
+
+
+class StandInService:
+    """
+    A simulated provider: optional provider scheduler and concurrency cap, then a sampled service time.
+    """
+
+    def __init__(self, name: str, provider: str, model: Optional[str], latency: LatencyModel, slots: int = 0):
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.latency = latency
+        self.slots = threading.BoundedSemaphore(slots) if slots > 0 else None
+        self.recorder = Recorder()
+
+    def call(self, tokens: int = 0):
+        from src.langgraphagenticai.utils.rate_limiter import ProviderBusyError, get_scheduler
+        start = time.perf_counter()
+        scheduler = get_scheduler()
+        try:
+            if scheduler is not None:
+                scheduler.acquire(self.provider, self.model, tokens)
+        except ProviderBusyError:
+            self.recorder.count(f"rejected:{self.name}")
+            raise
+        if self.slots is not None:
+            self.slots.acquire()
+        try:
+            queued = time.perf_counter() - start
+            time.sleep(self.latency.sample())
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+        self.recorder.add(f"queue:{self.name}", queued)
+        self.recorder.add(self.name, time.perf_counter() - start - queued)
+
+
+class StandInChatModel(BaseChatModel):
+    """
+    Chat model stand-in: calls the bound search tool for a new question, answers otherwise,
+    and replies "direct" to the router's classifier prompt.
+    """
+
+    service: Any = None
+    answer_chars: int = 600
+
+    @property
+    def _llm_type(self) -> str:
+        return "stand-in"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        self.service.call((len(prompt) + self.answer_chars) // 4)
+        last = messages[-1]
+        tools = kwargs.get("tools")
+        if tools and isinstance(last, HumanMessage):
+            message = AIMessage(content="", tool_calls=[{
+                "name": tools[0]["function"]["name"],
+                "args": {"query": str(last.content)},
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+            }])
+        elif str(last.content).startswith("Classify the user's message"):
+            message = AIMessage(content="direct")
+        else:
+            text = f"Stand-in answer to: {str(last.content)[-120:]} "
+            message = AIMessage(content=(text * (self.answer_chars // len(text) + 1))[:self.answer_chars])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class TextUpload:
+    """
+    In-memory upload with the two members the app reads from Streamlit's UploadedFile.
+    """
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        self._data = data
+
+    def getvalue(self) -> bytes:
+        return self._data
+
+
+class SimulatedUser:
+    """
+    One conversation: a session, an uploaded filing (RAG use cases) and a stream of messages.
+    """
+
+    def __init__(self, index: int, usecase: str, upload: TextUpload, agentic_mix: List[float], seed: int):
+        self.usecase = usecase
+        self.session_id = f"load-{uuid.uuid4().hex[:8]}"
+        self.upload = upload
+        self.agentic_mix = agentic_mix
+        self.rng = random.Random(seed * 100003 + index)
+
+    def next_message(self) -> str:
+        if self.usecase == "Basic Chatbot":
+            return self.rng.choice(CHAT_MESSAGES)
+        if self.usecase == "Chatbot with Tool":
+            return self.rng.choice(WEB_MESSAGES)
+        question = self.rng.choice(DOCUMENT_QUESTIONS).format(q=self.rng.randint(1, 4))
+        if self.usecase == "RAG Chatbot":
+            return question
+        pool = self.rng.choices([CHAT_MESSAGES, [question], WEB_MESSAGES], weights=self.agentic_mix)[0]
+        return self.rng.choice(pool)
+
+    def initial_state(self, message: str) -> dict:
+        # The same states DisplayResultStreamlit streams for each use case
+        if self.usecase == "Basic Chatbot":
+            return {"messages": ("user", message)}
+        if self.usecase == "Chatbot with Tool":
+            return {"messages": [message]}
+        from src.langgraphagenticai.state.payloads import register_uploads
+        return {
+            "messages": [HumanMessage(content=message)],
+            "uploads": register_uploads([self.upload]),
+            "session_id": self.session_id,
+            "collections": [],
+        }
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size (peak RSS where /proc is unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+@contextlib.contextmanager
+def stand_ins(services):
+    """
+    Route embedding and search calls of the configured backends through the stand-in services.
+    """
+    from src.langgraphagenticai.RAG.embedding_backends import HashingEmbeddingBackend
+    from src.langgraphagenticai.tools.local_search import LocalSearchTool
+    originals = (HashingEmbeddingBackend.embed_documents, HashingEmbeddingBackend.embed_query, LocalSearchTool._run)
+
+    def embed_documents(backend, texts):
+        services["embed"].call(sum(len(text) for text in texts) // 4)
+        return originals[0](backend, texts)
+
+    def embed_query(backend, text):
+        services["embed"].call(len(text) // 4)
+        return originals[1](backend, text)
+
+    def search(tool, query, **kwargs):
+        services["search"].call()
+        return originals[2](tool, query, **kwargs)
+
+    HashingEmbeddingBackend.embed_documents = embed_documents
+    HashingEmbeddingBackend.embed_query = embed_query
+    LocalSearchTool._run = search
+    try:
+        yield
+    finally:
+        HashingEmbeddingBackend.embed_documents, HashingEmbeddingBackend.embed_query, LocalSearchTool._run = originals
+
+
+def run_turn(user: SimulatedUser, llm, recorder: Recorder):
+    from src.langgraphagenticai.graph.graph_builder import GraphBuilder
+    message = user.next_message()
+    start = time.perf_counter()
+    try:
+        graph = GraphBuilder(llm).setup_graph(user.usecase, openai_api_key=None)
+        built = time.perf_counter()
+        recorder.add("build_graph", built - start)
+        previous, failed = built, False
+        for update in graph.stream(user.initial_state(message), stream_mode="updates"):
+            now = time.perf_counter()
+            for node, output in update.items():
+                recorder.add(f"node:{node}", now - previous)
+                failed = failed or bool(isinstance(output, dict) and output.get("error"))
+            previous = now
+    except Exception as e:
+        recorder.count(f"error:{type(e).__name__}")
+        return
+    if failed:
+        recorder.count("error:state")
+        return
+    recorder.add("turn", time.perf_counter() - start)
+
+
+def run_level(usecase: str, users: int, llm, services, uploads, args) -> dict:
+    recorder = Recorder()
+    for service in services.values():
+        service.recorder = recorder
+    simulated = [SimulatedUser(i, usecase, uploads[i % len(uploads)], args.agentic_mix, args.seed)
+                 for i in range(users)]
+    think = LatencyModel(args.think)
+    gc.collect()
+    rss_before = rss_mb()
+    deadline = time.monotonic() + args.seconds
+
+    def converse(user):
+        # Stagger the first messages over one think time instead of a thundering herd
+        time.sleep(random.uniform(0, think.sample()))
+        while time.monotonic() < deadline:
+            run_turn(user, llm, recorder)
+            time.sleep(think.sample())
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=converse, args=(user,), daemon=True) for user in simulated]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return {"users": users, "recorder": recorder, "elapsed": elapsed,
+            "rss_before": rss_before, "rss_after": rss_mb()}
+
+
+def stage_order(stage: str):
+    prefixes = ["turn", "build_graph", "node:", "llm", "embed", "search", "queue:"]
+    return next(i for i, prefix in enumerate(prefixes + [""]) if stage.startswith(prefix)), stage
+
+
+def print_level(result: dict, verbose_stages: bool):
+    recorder = result["recorder"]
+    turns = len(recorder.samples.get("turn", []))
+    errors = sum(count for name, count in recorder.counts.items() if name.startswith("error:"))
+    rejected = sum(count for name, count in recorder.counts.items() if name.startswith("rejected:"))
+    print(f"👥 {result['users']:3d} user(s): {turns} turn(s) in {result['elapsed']:.1f}s = "
+          f"{turns / result['elapsed']:.2f} turns/s, {errors} error(s), {rejected} rejected call(s), "
+          f"RSS {result['rss_before']:.0f} -> {result['rss_after']:.0f} MB")
+    if not verbose_stages:
+        return
+    print(f"   {'stage':<28}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in sorted(recorder.samples, key=stage_order):
+        n, p50, p95, p99 = recorder.percentiles(stage)
+        print(f"   {stage:<28}{n:7d}{p50:10.1f}{p95:10.1f}{p99:10.1f}")
+    for name, count in sorted(recorder.counts.items()):
+        print(f"   {name:<28}{count:7d}")
+
+
+def print_summary(usecase: str, results: List[dict], slo_ms: float):
+    print(f"\n📈 {usecase}: latency as concurrency rises")
+    print(f"   {'users':>5}{'turns/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queue p95':>11}"
+          f"{'errors':>8}{'RSS +MB':>9}")
+    baseline_rss = results[0]["rss_before"] if results else 0.0
+    within_slo = 0
+    for result in results:
+        recorder = result["recorder"]
+        _, p50, p95, p99 = recorder.percentiles("turn")
+        queue_p95 = max((recorder.percentiles(stage)[2] for stage in recorder.samples if stage.startswith("queue:")),
+                        default=0.0)
+        errors = sum(count for name, count in recorder.counts.items() if name.startswith(("error:", "rejected:")))
+        turns = len(recorder.samples.get("turn", []))
+        breached = slo_ms > 0 and (not turns or p95 > slo_ms)
+        if slo_ms > 0 and not breached:
+            within_slo = result["users"]
+        print(f"   {result['users']:5d}{turns / result['elapsed']:9.2f}{p50:9.0f}{p95:9.0f}{p99:9.0f}{queue_p95:11.0f}"
+              f"{errors:8d}{result['rss_after'] - baseline_rss:+9.1f}" + ("  ⚠️ over SLO" if breached else ""))
+    if slo_ms > 0:
+        print(f"   🎯 p95 within {slo_ms:.0f} ms up to {within_slo} concurrent user(s)" if within_slo
+              else f"   🎯 p95 over {slo_ms:.0f} ms at every level")
+
+
+def parse_list(value: str, cast):
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usecases", type=lambda v: parse_list(v, str), default=list(USECASES),
+                        help="Comma-separated use cases (default: all)")
+    parser.add_argument("--users", type=lambda v: parse_list(v, int), default=[1, 4, 16],
+                        help="Comma-separated concurrency levels")
+    parser.add_argument("--seconds", type=float, default=20, help="Duration of each concurrency level")
+    parser.add_argument("--think", default="exp:1000", help="Pause between a user's messages (latency spec)")
+    parser.add_argument("--llm-latency", type=LatencyModel, default=LatencyModel("lognormal:600:0.4"),
+                        help="Chat model service time")
+    parser.add_argument("--embed-latency", type=LatencyModel, default=LatencyModel("lognormal:80:0.3"),
+                        help="Service time of one embedding call")
+    parser.add_argument("--search-latency", type=LatencyModel, default=LatencyModel("lognormal:300:0.4"),
+                        help="Search backend service time")
+    parser.add_argument("--llm-slots", type=int, default=0, help="Concurrent chat model calls served (0: unlimited)")
+    parser.add_argument("--embed-slots", type=int, default=0, help="Concurrent embedding calls served (0: unlimited)")
+    parser.add_argument("--search-slots", type=int, default=0, help="Concurrent searches served (0: unlimited)")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Queue stand-in calls at the provider scheduler with the configured RATE_LIMITS")
+    parser.add_argument("--llm-model", default="qwen/qwen3-32b", help="Model name the chat model's rate limits apply to")
+    parser.add_argument("--answer-chars", type=int, default=600, help="Length of each stand-in answer")
+    parser.add_argument("--documents", type=int, default=4, help="Distinct filings uploaded across users")
+    parser.add_argument("--pages", type=int, default=20, help="Synthetic pages per filing")
+    parser.add_argument("--agentic-mix", type=lambda v: parse_list(v, float), default=[1, 2, 1],
+                        help="Agentic Assistant message weights: direct,rag,web")
+    parser.add_argument("--slo-ms", type=float, default=0, help="Turn p95 target; reports the highest level within it")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a uiconfigfile.ini setting for the run (repeatable)")
+    parser.add_argument("--store-dir", default="", help="Vectorstore directory (default: a temporary directory)")
+    parser.add_argument("--summary-only", action="store_true", help="Skip the per-stage table of each level")
+    parser.add_argument("--show-logs", action="store_true", help="Keep the application's console output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    unknown = [usecase for usecase in args.usecases if usecase not in USECASES]
+    if unknown:
+        parser.error(f"Unknown use case(s): {', '.join(unknown)}. Choose from {', '.join(USECASES)}")
+    random.seed(args.seed)
+    store_dir = args.store_dir or tempfile.mkdtemp(prefix="load_test_")
+    overrides = {
+        "VECTORSTORE_DIR": store_dir,
+        "EMBEDDING_BACKEND": "hashing",
+        "SEARCH_BACKEND": "local",
+        "LOCAL_SEARCH_LATENCY_MS": 0,
+        "ROUTER_LOG_FILE": "",
+        "PROFILING_SAMPLE_RATE": 0,
+        "RATE_LIMITING": "true" if args.rate_limits else "false",
+    }
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key.strip().upper()] = value.strip()
+    apply_overrides(overrides)
+
+    services = {
+        "llm": StandInService("llm", "groq", args.llm_model, args.llm_latency, args.llm_slots),
+        "embed": StandInService("embed", "openai", None, args.embed_latency, args.embed_slots),
+        "search": StandInService("search", "tavily", None, args.search_latency, args.search_slots),
+    }
+    llm = StandInChatModel(service=services["llm"], answer_chars=args.answer_chars)
+    uploads = []
+    for k in range(max(1, args.documents)):
+        text = "\n\n".join(page.page_content for page in synthetic_pages(args.pages, seed=k))
+        uploads.append(TextUpload(f"filing_{k}.txt", text.encode("utf-8")))
+
+    print(f"🧪 Load test: {', '.join(args.usecases)} at {', '.join(map(str, args.users))} user(s), "
+          f"{args.seconds:.0f}s per level")
+    print(f"   llm {args.llm_latency.spec}, embed {args.embed_latency.spec}, search {args.search_latency.spec}, "
+          f"think {args.think}, rate limits {'on' if args.rate_limits else 'off'}, store {store_dir}")
+    # The nodes print every step; keep the console to the report unless asked
+    devnull = open(os.devnull, "w")
+
+    def quiet():
+        return contextlib.nullcontext() if args.show_logs else contextlib.redirect_stdout(devnull)
+
+    try:
+        with stand_ins(services):
+            for usecase in args.usecases:
+                print(f"\n🧵 {usecase}")
+                # Warm up imports and ingest every filing once, so levels measure steady state
+                with quiet():
+                    for upload in uploads if usecase in ("RAG Chatbot", "Agentic Assistant") else uploads[:1]:
+                        warmup = SimulatedUser(0, usecase, upload, [0, 1, 0], args.seed)
+                        run_turn(warmup, llm, Recorder())
+                results = []
+                for users in args.users:
+                    with quiet():
+                        result = run_level(usecase, users, llm, services, uploads, args)
+                    print_level(result, not args.summary_only)
+                    results.append(result)
+                print_summary(usecase, results, args.slo_ms)
+    finally:
+        devnull.close()
+        if not args.store_dir:
+            shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,27 @@
 import os
 import streamlit as st
-from langchain_groq import ChatGroq
+from src.langgraphagenticai.LLMS.http_clients import get_async_http_client, get_http_client, get_request_settings
 
 class GroqLLM:
     def __init__(self,user_controls_input):
         self.user_controls_input=user_controls_input
 
     def get_llm_model(self):
+        # langchain_groq is heavy; import it when a model is first needed, not at app start
+        from langchain_groq import ChatGroq
         try:
             groq_api_key=self.user_controls_input['GROQ_API_KEY']
             selected_groq_model=self.user_controls_input['selected_groq_model']
             if groq_api_key=='' and os.environ["GROQ_API_KEY"] =='':
                 st.error("Please Enter the Groq API KEY")
 
-            llm = ChatGroq(api_key =groq_api_key, model=selected_groq_model)
+            # Reuse the process-wide keep-alive connection pool for this key
+            request_settings = get_request_settings()
+            llm = ChatGroq(api_key =groq_api_key, model=selected_groq_model,
+                           http_client=get_http_client("groq", groq_api_key),
+                           http_async_client=get_async_http_client("groq", groq_api_key),
+                           request_timeout=request_settings["timeout"],
+                           max_retries=request_settings["max_retries"])
 
         except Exception as e:
             raise ValueError(f"Error Occurred with Exception : {e}")
@@ -0,0 +1,173 @@
+import asyncio
+import atexit
+import hashlib
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from src.langgraphagenticai.ui.uiconfigfile import Config
+from src.langgraphagenticai.utils.rate_limiter import AsyncRateLimitedTransport, RateLimitedTransport, get_scheduler
+
+
+_clients: Dict[Tuple[str, str], httpx.Client] = {}
+_async_clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+_clients_lock = threading.Lock()
+_http2_available: Optional[bool] = None
+
+
+def _credential_key(credential: Optional[str]) -> str:
+    """Hash the credential so API keys are never held as dictionary keys or logged."""
+    return hashlib.sha256((credential or "").encode()).hexdigest()[:16]
+
+
+def http2_available() -> bool:
+    """
+    HTTP/2 needs the optional ``h2`` package (pip install "httpx[http2]").
+    """
+    global _http2_available
+    if _http2_available is None:
+        try:
+            import h2  # noqa: F401
+            _http2_available = True
+        except ImportError:
+            _http2_available = False
+    return _http2_available
+
+
+def _transport_settings(settings: Dict) -> Dict:
+    return {
+        "http2": settings["http2"] and http2_available(),
+        "retries": settings["connect_retries"],
+        "limits": httpx.Limits(
+            max_connections=settings["max_connections"],
+            max_keepalive_connections=settings["max_keepalive_connections"],
+            keepalive_expiry=settings["keepalive_expiry"],
+        ),
+    }
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """
+    Async connection pool per event loop.
+
+    Async connections belong to the loop that opened them, and callers may run
+    each batch in a fresh loop (asyncio.run); every loop gets its own keep-alive
+    pool, dropped together with the loop.
+    """
+
+    def __init__(self, **transport_settings):
+        self.transport_settings = transport_settings
+        self._transports = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(**self.transport_settings)
+                self._transports[loop] = transport
+        return await transport.handle_async_request(request)
+
+    async def aclose(self):
+        with self._lock:
+            transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def get_http_client(provider: str, credential: Optional[str] = None) -> httpx.Client:
+    """
+    Return the process-wide pooled HTTP client for a provider and credential.
+
+    The client keeps connections alive between requests, so every node, message
+    and session in the process reuses established TCP/TLS connections instead of
+    handshaking again. HTTP/2 is used when enabled and ``h2`` is installed.
+    Requests go through the process-wide provider scheduler (token buckets per
+    provider and model, interactive calls ahead of batch ingestion).
+
+    Args:
+        provider: Provider name ("groq", "openai", "tavily")
+        credential: API key the client is used with (one pool per credential)
+
+    Returns:
+        Shared httpx.Client
+    """
+    key = (provider, _credential_key(credential))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed:
+            settings = Config().get_http_settings()
+            transport_settings = _transport_settings(settings)
+            use_http2 = transport_settings["http2"]
+            transport = httpx.HTTPTransport(**transport_settings)
+            scheduler = get_scheduler()
+            if scheduler is not None:
+                transport = RateLimitedTransport(transport, provider, scheduler)
+            client = httpx.Client(
+                transport=transport,
+                timeout=httpx.Timeout(settings["read_timeout"], connect=settings["connect_timeout"]),
+            )
+            _clients[key] = client
+            print(f"🔌 HTTP pool for {provider}: {settings['max_connections']} connections, "
+                  f"{'HTTP/2' if use_http2 else 'HTTP/1.1'} keep-alive")
+        return client
+
+
+def get_async_http_client(provider: str, credential: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Return the process-wide pooled async HTTP client for a provider and credential.
+
+    Async SDK calls (``aembed_documents``, ``ainvoke``) keep connections alive
+    like get_http_client's, and go through the same provider scheduler as
+    sync calls, so both count against one set of buckets.
+
+    Args:
+        provider: Provider name ("groq", "openai", "tavily")
+        credential: API key the client is used with (one pool per credential)
+
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    key = (provider, _credential_key(credential))
+    with _clients_lock:
+        client = _async_clients.get(key)
+        if client is None or client.is_closed:
+            settings = Config().get_http_settings()
+            transport = _LoopLocalTransport(**_transport_settings(settings))
+            scheduler = get_scheduler()
+            if scheduler is not None:
+                transport = AsyncRateLimitedTransport(transport, provider, scheduler)
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(settings["read_timeout"], connect=settings["connect_timeout"]),
+            )
+            _async_clients[key] = client
+        return client
+
+
+def get_request_settings() -> Dict:
+    """
+    Timeout and retry settings that SDK clients are created with.
+    """
+    settings = Config().get_http_settings()
+    return {"timeout": settings["read_timeout"], "max_retries": settings["max_retries"]}
+
+
+def close_http_clients():
+    """
+    Close every pooled client (registered to run at interpreter exit).
+
+    Async pools are only dropped: their connections belong to event loops that
+    may be closed by now, and the process exit closes the sockets.
+    """
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+        _async_clients.clear()
+
+
+atexit.register(close_http_clients)
@@ -0,0 +1,250 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS collections (
+    owner        TEXT NOT NULL,
+    name         TEXT NOT NULL,
+    store_path   TEXT NOT NULL,
+    fingerprint  TEXT,
+    index_type   TEXT,
+    num_chunks   INTEGER DEFAULT 0,
+    size_bytes   INTEGER DEFAULT 0,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    PRIMARY KEY (owner, name)
+);
+CREATE INDEX IF NOT EXISTS idx_collections_owner_last_used
+    ON collections (owner, last_used_at DESC);
+CREATE INDEX IF NOT EXISTS idx_collections_fingerprint
+    ON collections (fingerprint);
+CREATE TABLE IF NOT EXISTS collection_documents (
+    owner      TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    file_name  TEXT NOT NULL,
+    PRIMARY KEY (owner, collection, file_name)
+);
+"""
+
+
+def directory_size(path: str) -> int:
+    """
+    Total size in bytes of all files below a directory.
+    """
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+class VectorstoreCatalog:
+    """
+    SQLite index of named vectorstore collections.
+
+    Each collection belongs to an owner (the Streamlit session that uploaded it)
+    and points at a vectorstore directory on disk. Lookups go through primary-key
+    and owner indexes instead of scanning ``vectorstore_db``.
+    """
+
+    _init_lock = threading.Lock()
+    _initialized_paths = set()
+
+    def __init__(self, db_path: str = "./vectorstore_db/catalog.sqlite3"):
+        """
+        Args:
+            db_path: Path to the SQLite catalog file (default: ./vectorstore_db/catalog.sqlite3)
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._init_lock:
+            if os.path.abspath(db_path) not in self._initialized_paths:
+                with self._connect() as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                self._initialized_paths.add(os.path.abspath(db_path))
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _row_to_dict(self, conn, row) -> Dict:
+        collection = dict(row)
+        documents = conn.execute(
+            "SELECT file_name FROM collection_documents WHERE owner = ? AND collection = ? ORDER BY file_name",
+            (row["owner"], row["name"]),
+        ).fetchall()
+        collection["documents"] = [d["file_name"] for d in documents]
+        return collection
+
+    def register_collection(
+        self,
+        owner: str,
+        name: str,
+        store_path: str,
+        file_names: List[str],
+        fingerprint: Optional[str] = None,
+        index_type: Optional[str] = None,
+        num_chunks: int = 0,
+        size_bytes: Optional[int] = None,
+    ) -> Dict:
+        """
+        Create or update a collection entry.
+
+        Args:
+            owner: Owner id (session id)
+            name: Collection name, unique per owner
+            store_path: Vectorstore directory backing the collection
+            file_names: Names of the documents in the collection
+            fingerprint: Content fingerprint of the documents
+            index_type: FAISS index type name
+            num_chunks: Number of indexed chunks
+            size_bytes: On-disk size (computed from store_path if omitted)
+
+        Returns:
+            The stored collection record
+        """
+        if size_bytes is None:
+            size_bytes = directory_size(store_path) if os.path.exists(store_path) else 0
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO collections (owner, name, store_path, fingerprint, index_type,
+                                         num_chunks, size_bytes, created_at, updated_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (owner, name) DO UPDATE SET
+                    store_path = excluded.store_path,
+                    fingerprint = excluded.fingerprint,
+                    index_type = excluded.index_type,
+                    num_chunks = excluded.num_chunks,
+                    size_bytes = excluded.size_bytes,
+                    updated_at = excluded.updated_at,
+                    last_used_at = excluded.last_used_at
+                """,
+                (owner, name, store_path, fingerprint, index_type, num_chunks, size_bytes, now, now, now),
+            )
+            conn.execute("DELETE FROM collection_documents WHERE owner = ? AND collection = ?", (owner, name))
+            conn.executemany(
+                "INSERT INTO collection_documents (owner, collection, file_name) VALUES (?, ?, ?)",
+                [(owner, name, file_name) for file_name in sorted(set(file_names))],
+            )
+            row = conn.execute(
+                "SELECT * FROM collections WHERE owner = ? AND name = ?", (owner, name)
+            ).fetchone()
+            print(f"🗂️ Registered collection '{name}' for owner {owner[:8]} ({num_chunks} chunks)")
+            return self._row_to_dict(conn, row)
+
+    def get_collection(self, owner: str, name: str) -> Optional[Dict]:
+        """
+        Look up a single collection by owner and name.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM collections WHERE owner = ? AND name = ?", (owner, name)
+            ).fetchone()
+            return self._row_to_dict(conn, row) if row else None
+
+    def list_collections(self, owner: str) -> List[Dict]:
+        """
+        List an owner's collections, most recently used first.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM collections WHERE owner = ? ORDER BY last_used_at DESC", (owner,)
+            ).fetchall()
+            return [self._row_to_dict(conn, row) for row in rows]
+
+    def find_collections(self, name: str) -> List[Dict]:
+        """
+        Collections with a given name across all owners, most recently used first (used by the preloader).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM collections WHERE name = ? ORDER BY last_used_at DESC", (name,)
+            ).fetchall()
+            return [self._row_to_dict(conn, row) for row in rows]
+
+    def latest_collection(self, owner: str) -> Optional[Dict]:
+        """
+        Return the owner's most recently used collection, if any.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM collections WHERE owner = ? ORDER BY last_used_at DESC LIMIT 1", (owner,)
+            ).fetchone()
+            return self._row_to_dict(conn, row) if row else None
+
+    def touch(self, owner: str, names: List[str]):
+        """
+        Mark collections as used now.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE collections SET last_used_at = ? WHERE owner = ? AND name = ?",
+                [(now, owner, name) for name in names],
+            )
+
+    def delete_collection(self, owner: str, name: str):
+        """
+        Remove a collection entry (the vectorstore directory is left on disk).
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM collection_documents WHERE owner = ? AND collection = ?", (owner, name))
+            conn.execute("DELETE FROM collections WHERE owner = ? AND name = ?", (owner, name))
+
+    def describe(self, collection: Dict) -> str:
+        """
+        Short human-readable label for a collection (used by the UI).
+        """
+        documents = collection.get("documents", [])
+        label = ", ".join(documents[:3]) + (f" +{len(documents) - 3} more" if len(documents) > 3 else "")
+        return f"{collection['name']} ({label})" if label else collection["name"]
+
+    def delete_by_store_path(self, store_path: str) -> int:
+        """
+        Remove every collection entry backed by a vectorstore directory (after it was deleted).
+
+        Returns:
+            Number of entries removed
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT owner, name FROM collections WHERE store_path = ?", (store_path,)
+            ).fetchall()
+            conn.executemany(
+                "DELETE FROM collection_documents WHERE owner = ? AND collection = ?",
+                [(row["owner"], row["name"]) for row in rows],
+            )
+            conn.execute("DELETE FROM collections WHERE store_path = ?", (store_path,))
+            return len(rows)
+
+    def move_store(self, old_store_path: str, new_store_path: str) -> int:
+        """
+        Point every collection backed by one vectorstore directory at another (re-index switch and rollback).
+
+        Returns:
+            Number of entries updated
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE collections SET store_path = ?, updated_at = ? WHERE store_path = ?",
+                (new_store_path, time.time(), old_store_path),
+            )
+            return cursor.rowcount
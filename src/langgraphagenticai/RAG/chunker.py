@@ -0,0 +1,506 @@
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+
+# Item 7. / Part II / Note 12 / 2.1 Revenue Recognition (numbered titles start with a capital) /
+# CONSOLIDATED BALANCE SHEETS
+_HEADING_PATTERN = re.compile(
+    r"(?i:item|part|note|section|schedule)\s+(?i:[0-9ivxlc]+[a-z]?)[.:)]?(?:\s.*)?"
+    r"|\d+(?:\.\d+){0,3}\.?\s+[A-Z][^.]{0,80}"
+    r"|[A-Z][A-Z0-9&,'()\-/ ]{3,80}"
+)
+# Lines starting with anything else are only headings when upper case
+_HEADING_FIRST_CHARS = frozenset("0123456789IiPpNnSs")
+# A table row has a figure in a column of its own: a run of spaces, a tab or a rule, then
+# the figure ("Net sales    $ 1,234", "2023  2022"); numbers in running prose do not make a table
+# A paragraph made only of such rows is recognised in one call
+_TABLE_PARAGRAPH_PATTERN = re.compile(r"(?:[^\n]*\S(?:[ \t]{2,}|\t|[ \t]*\|[ \t]*)[$(\-]*[ \t]*\d[^\n]*(?:\n|\Z))+")
+# Inside a multi-line paragraph, table runs are only looked for from lines with a column
+# gap marker, and headings by scanning from each newline
+_COLUMN_GAP_MARKERS = ("  ", "\t", "|")
+_HEADING_LINE_PATTERN = re.compile(
+    r"\n([ \t]*(?:"
+    r"(?i:item|part|note|section|schedule)[ \t]+(?i:[0-9ivxlc]+[a-z]?)[.:)]?(?:[ \t][^\n]*)?"
+    r"|\d+(?:\.\d+){0,3}\.?[ \t]+[A-Z][^.\n]{0,80}"
+    r"|[A-Z][A-Z0-9&,'()\-/ ]{3,80}"
+    r")[ \t]*)(?=\n|\Z)"
+)
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?;])\s+")
+_FALLBACK_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_WORD_GAP_PATTERN = re.compile(r"\s+")
+# Consecutive column-aligned rows needed before lines are treated as a table
+_MIN_TABLE_ROWS = 2
+# Finer boundaries tried in turn when a block piece is still over the token limit
+_SPLIT_LEVELS = {"table": ("row", "sentence", "word"), "text": ("sentence", "word")}
+# Block kinds as bits, so a chunk's chunk_type is the union of its blocks' bits
+_KIND_BITS = {"heading": 0, "text": 1, "table": 2}
+_CHUNK_TYPES = {0: "text", 1: "text", 2: "table", 3: "mixed"}
+# Characters per block kind that are tokenized exactly to calibrate the token estimate
+_CALIBRATION_CHARS = 20000
+_CALIBRATION_PAGES = 64
+_DEFAULT_CHARS_PER_TOKEN = 4.0
+
+_encoder = None
+_encoder_loaded = False
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with tiktoken (cl100k_base) when available, otherwise
+    approximate with a word/punctuation regex.
+    """
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoder = None
+        _encoder_loaded = True
+    if _encoder is not None:
+        return len(_encoder.encode_ordinary(text))
+    return len(_FALLBACK_TOKEN_PATTERN.findall(text))
+
+
+class TokenEstimator:
+    """
+    Token counts from character counts, with a characters-per-token ratio per
+    block kind (prose and tables tokenize differently).
+
+    The ratios are measured with count_tokens on a sample of the text being
+    chunked, so a batch of pages costs one tokenizer call per kind instead of
+    one per block, and packing is plain arithmetic on block offsets.
+    """
+
+    def __init__(self, chars_per_token: Optional[Dict[str, float]] = None):
+        self.chars_per_token = chars_per_token or {}
+        self.text_ratio = self.chars_per_token.get("text", _DEFAULT_CHARS_PER_TOKEN)
+        self.table_ratio = self.chars_per_token.get("table", _DEFAULT_CHARS_PER_TOKEN)
+
+    @classmethod
+    def calibrate(cls, samples: Dict[str, List[str]]) -> "TokenEstimator":
+        """
+        Args:
+            samples: Block kind -> sample texts of that kind
+        """
+        chars_per_token = {}
+        for kind, texts in samples.items():
+            text = "\n".join(texts)
+            tokens = count_tokens(text) if text else 0
+            if tokens:
+                chars_per_token[kind] = len(text) / tokens
+        return cls(chars_per_token)
+
+    def estimate(self, kind: str, chars: int) -> int:
+        if chars <= 0:
+            return 0
+        return math.ceil(chars / (self.table_ratio if kind == "table" else self.text_ratio))
+
+
+def _is_heading(line: str) -> bool:
+    return (len(line) <= 90 and not line.endswith((",", ";"))
+            and (line[0] in _HEADING_FIRST_CHARS or line.isupper()) and _HEADING_PATTERN.fullmatch(line) is not None)
+
+
+def _paragraph_blocks(body: str, start: int) -> List[Tuple[str, int, int]]:
+    """
+    Blocks of a multi-line paragraph (stripped ``body`` found at ``start`` in the page):
+    table runs, headings and the prose between them. A table run shorter than
+    _MIN_TABLE_ROWS is prose with figures in it.
+    """
+    if _TABLE_PARAGRAPH_PATTERN.fullmatch(body):
+        return [("table", start, start + len(body))]
+    # Offsets in ``text`` are one past those in ``body``
+    text = "\n" + body
+    structure = []
+    markers = [marker for marker in _COLUMN_GAP_MARKERS if marker in text]
+    position = 1
+    while markers:
+        hits = [hit for hit in [text.find(marker, position) for marker in markers] if hit != -1]
+        if not hits:
+            break
+        found = min(hits)
+        line_start = text.rfind("\n", 0, found) + 1
+        run = _TABLE_PARAGRAPH_PATTERN.match(text, line_start)
+        if run is None:
+            position = text.find("\n", found) + 1 or len(text)
+            continue
+        position = run.end()
+        if text.count("\n", line_start, position - 1) + 1 >= _MIN_TABLE_ROWS:
+            structure.append((line_start, position, "table"))
+    tables = structure[:]
+    table = 0
+    for match in _HEADING_LINE_PATTERN.finditer(text):
+        line = match.group(1).strip()
+        line_start = match.start(1)
+        if len(line) > 90 or line.endswith((",", ";")):
+            continue
+        # Table rows win over headings
+        while table < len(tables) and tables[table][1] <= line_start:
+            table += 1
+        if table < len(tables) and tables[table][0] <= line_start:
+            continue
+        structure.append((line_start, match.end(1), "heading"))
+    if not structure:
+        return [("text", start, start + len(body))]
+    structure.sort()
+
+    blocks = []
+    position = 1
+    for block_start, block_end, kind in structure + [(len(text), len(text), None)]:
+        # Trim the prose between two structure lines (and the structure block itself) to non-space ends
+        blocks_end = block_start
+        while position < blocks_end and text[position].isspace():
+            position += 1
+        while blocks_end > position and text[blocks_end - 1].isspace():
+            blocks_end -= 1
+        if position < blocks_end:
+            blocks.append(("text", start + position - 1, start + blocks_end - 1))
+        if kind is not None:
+            while text[block_start].isspace():
+                block_start += 1
+            position = block_end
+            while text[block_end - 1].isspace():
+                block_end -= 1
+            blocks.append((kind, start + block_start - 1, start + block_end - 1))
+    return blocks
+
+
+def _page_blocks(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Split page text into (kind, start, end) blocks: headings, table runs and paragraphs.
+    Offsets index into the page text. A lone line is never a table.
+    """
+    blocks = []
+    offset = 0
+    for paragraph in text.split("\n\n"):
+        start, offset = offset, offset + len(paragraph) + 2
+        body = paragraph.strip()
+        if not body:
+            continue
+        start += paragraph.index(body[0])
+        if "\n" in body:
+            blocks.extend(_paragraph_blocks(body, start))
+        else:
+            blocks.append(("heading" if _is_heading(body) else "text", start, start + len(body)))
+    return blocks
+
+
+def _boundaries(segment: str, level: str) -> List[int]:
+    if level == "row":
+        return [m.end() for m in re.finditer(r"\n", segment)]
+    if level == "sentence":
+        return [m.start() for m in _SENTENCE_END_PATTERN.finditer(segment)]
+    return [m.start() for m in _WORD_GAP_PATTERN.finditer(segment)]
+
+
+def _split_oversized(text: str, kind: str, start: int, end: int, max_tokens: int, estimator: TokenEstimator,
+                     levels: Optional[Tuple[str, ...]] = None) -> List[Tuple[str, int, int, int]]:
+    """
+    Split a block larger than max_tokens: tables by row, text by sentence.
+    Pieces still over the limit (a row-less "table", a run-on sentence) are split
+    at the next finer boundary, down to words.
+    Returns (kind, start, end, tokens) pieces.
+    """
+    levels = levels or _SPLIT_LEVELS.get(kind, _SPLIT_LEVELS["text"])
+    segment = text[start:end]
+    boundaries = [b for b in _boundaries(segment, levels[0]) if 0 < b < len(segment)] + [len(segment)]
+
+    pieces = []
+    piece_start, last_cut = 0, 0
+    piece_tokens = 0
+    for boundary in boundaries:
+        unit_tokens = estimator.estimate(kind, boundary - last_cut)
+        if piece_tokens and piece_tokens + unit_tokens > max_tokens:
+            pieces.append((kind, start + piece_start, start + last_cut, piece_tokens))
+            piece_start, piece_tokens = last_cut, 0
+        piece_tokens += unit_tokens
+        last_cut = boundary
+    if piece_start < len(segment):
+        pieces.append((kind, start + piece_start, end, piece_tokens))
+    if len(levels) == 1:
+        return pieces
+    results = []
+    for piece in pieces:
+        if piece[3] > max_tokens:
+            results.extend(_split_oversized(text, kind, piece[1], piece[2], max_tokens, estimator, levels[1:]))
+        else:
+            results.append(piece)
+    return results
+
+
+def _sample_blocks(texts: List[str]) -> Dict[str, List[str]]:
+    """
+    Up to _CALIBRATION_CHARS of text per block kind, taken from the first _CALIBRATION_PAGES pages.
+    """
+    samples = {"text": [], "table": []}
+    sizes = {"text": 0, "table": 0}
+    for text in texts[:_CALIBRATION_PAGES]:
+        for kind, start, end in _page_blocks(text):
+            kind = "table" if kind == "table" else "text"
+            if sizes[kind] < _CALIBRATION_CHARS:
+                samples[kind].append(text[start:end])
+                sizes[kind] += end - start
+        if min(sizes.values()) >= _CALIBRATION_CHARS:
+            break
+    return samples
+
+
+def _chunk_text(text: str, metadata: Dict, section: Optional[str], chunk_tokens: int, min_chunk_tokens: int,
+                estimator: TokenEstimator) -> Tuple[List[Tuple[str, Dict]], Optional[str]]:
+    """
+    Chunk one page (see chunk_page). Content before the page's first heading
+    belongs to ``section``, the section carried over from the previous page.
+
+    Returns:
+        (chunks, section the page ends in)
+    """
+    text_ratio, table_ratio = estimator.text_ratio, estimator.table_ratio
+    ceil = math.ceil
+    blocks = []  # (kind, start, end, tokens)
+    add_block = blocks.append
+    # Sections as (label, first block, end block, tokens, kind bits); the first may have no heading of its own
+    sections = []
+    label, first, total, bits = section, 0, 0, 0
+    offset = 0
+    for paragraph in text.split("\n\n"):
+        start = offset
+        size = len(paragraph)
+        offset += size + 2
+        body = paragraph.strip()
+        if body is not paragraph:
+            if not body:
+                continue
+            start += paragraph.index(body[0])
+            size = len(body)
+        if "\n" in body:
+            paragraph_blocks = _paragraph_blocks(body, start)
+        elif size <= 90 and _is_heading(body):
+            if len(blocks) > first:
+                sections.append((label, first, len(blocks), total, bits))
+            block_tokens = ceil(size / text_ratio)
+            label, first, total, bits = body, len(blocks), block_tokens, 0
+            add_block(("heading", start, start + size, block_tokens))
+            continue
+        else:
+            # A single line of prose, the most common paragraph
+            block_tokens = ceil(size / text_ratio)
+            add_block(("text", start, start + size, block_tokens))
+            total += block_tokens
+            bits |= 1
+            continue
+        for kind, block_start, block_end in paragraph_blocks:
+            block_tokens = ceil((block_end - block_start) / (table_ratio if kind == "table" else text_ratio))
+            if kind == "heading":
+                if len(blocks) > first:
+                    sections.append((label, first, len(blocks), total, bits))
+                label, first, total, bits = text[block_start:block_end].strip(), len(blocks), 0, 0
+            add_block((kind, block_start, block_end, block_tokens))
+            total += block_tokens
+            bits |= _KIND_BITS[kind]
+    if len(blocks) > first:
+        sections.append((label, first, len(blocks), total, bits))
+    last_section = label
+
+    chunks = []  # [start, end, tokens, section labels, kind bits, whole sections only]
+    current = None
+    for label, first, last, total, bits in sections:
+        # Small sections are kept whole and share a chunk with their neighbours on the page
+        if total <= chunk_tokens:
+            if current is not None and current[5] and current[2] + total <= chunk_tokens:
+                current[1], current[2] = blocks[last - 1][2], current[2] + total
+                current[3].append(label)
+                current[4] |= bits
+            else:
+                current = [blocks[first][1], blocks[last - 1][2], total, [label], bits, True]
+                chunks.append(current)
+            continue
+
+        # A larger section is packed block by block; its heading stays with the content that follows it
+        current = None
+        for kind, start, end, block_tokens in blocks[first:last]:
+            pieces = [(kind, start, end, block_tokens)]
+            if block_tokens > chunk_tokens:
+                pieces = _split_oversized(text, kind, start, end, chunk_tokens, estimator)
+            for piece_kind, piece_start, piece_end, piece_tokens in pieces:
+                if current is not None and (current[2] + piece_tokens <= chunk_tokens or not current[4]):
+                    current[1], current[2] = piece_end, current[2] + piece_tokens
+                    current[4] |= _KIND_BITS[piece_kind]
+                else:
+                    current = [piece_start, piece_end, piece_tokens, [label], _KIND_BITS[piece_kind], False]
+                    chunks.append(current)
+        # The next section starts a chunk of its own
+        current = None
+
+    # Merge undersized chunks into the previous chunk of the same section
+    merged = []
+    for chunk in chunks:
+        if (merged and chunk[2] < min_chunk_tokens and merged[-1][3][-1] == chunk[3][0]
+                and merged[-1][2] + chunk[2] <= chunk_tokens * 1.25):
+            previous = merged[-1]
+            previous[1], previous[2] = chunk[1], previous[2] + chunk[2]
+            previous[3].extend(chunk[3][1:])
+            previous[4] |= chunk[4]
+        else:
+            merged.append(chunk)
+
+    results = []
+    for start, end, size, labels, bits, _whole in merged:
+        chunk_text = text[start:end].strip()
+        if not chunk_text:
+            continue
+        chunk_metadata = {
+            **metadata,
+            "section": labels[0],
+            "start_index": start,
+            "end_index": end,
+            "token_count": size,
+            "chunk_type": _CHUNK_TYPES[bits],
+        }
+        if len(labels) > 1:
+            chunk_metadata["sections"] = labels
+        results.append((chunk_text, chunk_metadata))
+    return results, last_section
+
+
+def chunk_page(text: str, metadata: Dict, chunk_tokens: int = 400, min_chunk_tokens: int = 40,
+               estimator: Optional[TokenEstimator] = None) -> List[Tuple[str, Dict]]:
+    """
+    Chunk a single page without crossing page, section or table boundaries.
+
+    Sections that fit in chunk_tokens are kept whole, and consecutive small
+    sections of a page share a chunk (``sections`` then lists every heading,
+    ``section`` is the first). A larger section is packed block by block; a
+    table is never split unless it alone exceeds the limit (then it is split
+    between rows, or between sentences or words when a row alone is too large).
+    Chunks are contiguous slices of the page, located by ``start_index``/``end_index``
+    - no overlap text is copied.
+
+    Args:
+        text: Page text
+        metadata: Page metadata (source, page, section of the page's opening text, ...)
+        chunk_tokens: Maximum tokens per chunk
+        min_chunk_tokens: Chunks smaller than this are merged into their neighbour in the same section
+        estimator: Token estimator (default: calibrated on this page)
+
+    Returns:
+        List of (chunk text, chunk metadata) tuples
+    """
+    if not text or not text.strip():
+        return []
+    if estimator is None:
+        estimator = TokenEstimator.calibrate(_sample_blocks([text]))
+    return _chunk_text(text, metadata, metadata.get("section", ""), chunk_tokens, min_chunk_tokens, estimator)[0]
+
+
+def _chunk_page_batch(batch: List[Tuple[str, Dict]], chunk_tokens: int,
+                      min_chunk_tokens: int) -> Tuple[List[Tuple[str, Dict]], Dict[str, str]]:
+    """
+    Worker entry point: chunk a batch of consecutive pages (module-level so it can be pickled).
+
+    A page's opening text belongs to the last section of the previous page of the
+    same source. Pages whose previous page is in an earlier batch get ``None``
+    as section, which split_documents fills in.
+
+    Returns:
+        (chunks, source -> last section seen in this batch)
+    """
+    estimator = TokenEstimator.calibrate(_sample_blocks([text for text, _ in batch]))
+    carried: Dict[str, Optional[str]] = {}
+    results = []
+    for text, metadata in batch:
+        source = metadata.get("source", "")
+        chunks, carried[source] = _chunk_text(text, metadata, metadata.get("section") or carried.get(source),
+                                              chunk_tokens, min_chunk_tokens, estimator)
+        results.extend(chunks)
+    return results, {source: section for source, section in carried.items() if section is not None}
+
+
+class FinancialDocumentChunker:
+    """
+    Token-sized, structure-aware chunker for financial filings.
+
+    Pages are chunked independently, so large corpora are split across worker
+    processes; small inputs are chunked in-process to avoid pool start-up cost.
+    Statistics are gathered in the same pass that builds the chunks.
+    """
+
+    def __init__(self, chunk_tokens: int = 400, min_chunk_tokens: int = 40,
+                 max_workers: Optional[int] = None, parallel_min_pages: int = 64, pages_per_task: int = 16):
+        """
+        Args:
+            chunk_tokens: Maximum tokens per chunk
+            min_chunk_tokens: Smaller chunks are merged into their neighbour in the same section
+            max_workers: Worker processes (default: CPU count)
+            parallel_min_pages: Page count above which chunking runs in worker processes
+            pages_per_task: Pages handed to a worker per task
+        """
+        self.chunk_tokens = chunk_tokens
+        self.min_chunk_tokens = min_chunk_tokens
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages
+        self.pages_per_task = pages_per_task
+        self.last_stats: Dict = {}
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split loaded pages into chunks.
+
+        Args:
+            documents: Loaded pages (one Document per page, in document order)
+
+        Returns:
+            List of chunk Documents with section, offsets, token count and chunk type in metadata
+        """
+        start_time = time.perf_counter()
+        pages = [(doc.page_content or "", doc.metadata) for doc in documents]
+        empty_pages = sum(1 for text, _ in pages if not text.strip())
+        pages = [page for page in pages if page[0].strip()]
+
+        if len(pages) >= self.parallel_min_pages and self.max_workers > 1:
+            batches = [pages[i:i + self.pages_per_task] for i in range(0, len(pages), self.pages_per_task)]
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+                batch_results = list(executor.map(
+                    _chunk_page_batch, batches,
+                    [self.chunk_tokens] * len(batches), [self.min_chunk_tokens] * len(batches)
+                ))
+            mode = f"{min(self.max_workers, len(batches))} processes"
+        else:
+            batch_results = [_chunk_page_batch(pages, self.chunk_tokens, self.min_chunk_tokens)]
+            mode = "in-process"
+
+        chunks = []
+        total_chars = total_tokens = table_chunks = 0
+        carried: Dict[str, str] = {}
+        for pieces, last_sections in batch_results:
+            for text, metadata in pieces:
+                # Opening text of a batch's first page of a source: section of the previous batch's last page
+                if metadata["section"] is None:
+                    metadata["section"] = carried.get(metadata.get("source", ""), "")
+                    if "sections" in metadata:
+                        metadata["sections"][0] = metadata["section"]
+                chunks.append(Document(page_content=text, metadata=metadata))
+                total_chars += len(text)
+                total_tokens += metadata["token_count"]
+                table_chunks += metadata["chunk_type"] != "text"
+            carried.update(last_sections)
+
+        elapsed = time.perf_counter() - start_time
+        self.last_stats = {
+            "pages": len(documents),
+            "empty_pages": empty_pages,
+            "chunks": len(chunks),
+            "total_chars": total_chars,
+            "total_tokens": total_tokens,
+            "avg_tokens": round(total_tokens / len(chunks), 1) if chunks else 0,
+            "table_chunks": table_chunks,
+            "seconds": round(elapsed, 3),
+            "mode": mode,
+        }
+        return chunks
@@ -0,0 +1,142 @@
+import re
+import time
+import hashlib
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+_WORD_PATTERN = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows == num_perm whose LSH S-curve
+    threshold (1/bands)^(1/rows) is closest to the target similarity.
+    """
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateFilter:
+    """
+    MinHash/LSH near-duplicate detection for chunks.
+
+    Each chunk is reduced to a MinHash signature of its word shingles. LSH banding
+    finds candidate matches among the chunks kept so far, and a candidate counts as
+    a duplicate when the estimated Jaccard similarity reaches the threshold. A
+    duplicate is dropped and recorded on the kept chunk as another occurrence, so
+    boilerplate repeated on every page is embedded and indexed once.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity at which chunks count as duplicates
+            num_perm: MinHash permutations (signature length)
+            shingle_size: Words per shingle
+            seed: Seed of the hash permutations
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+        self.last_stats: Dict = {}
+
+    def _shingles(self, text: str) -> np.ndarray:
+        words = _WORD_PATTERN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            grams = {" ".join(words)}
+        else:
+            grams = {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(g.encode(), digest_size=4).digest(), "little") for g in grams),
+            dtype=np.uint64,
+            count=len(grams),
+        )
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature of a text (num_perm 32-bit values).
+        """
+        shingles = self._shingles(text)
+        # (a * x + b) mod p for every permutation and shingle; a, x < 2^32 so a * x fits in uint64
+        hashed = ((self._a[:, None] * shingles[None, :]) % _MERSENNE_PRIME + self._b[:, None]) % _MERSENNE_PRIME
+        return (hashed & _MAX_HASH).min(axis=1)
+
+    def deduplicate(self, chunks: List) -> List:
+        """
+        Drop near-duplicate chunks, keeping the first occurrence.
+
+        The kept chunk gets ``occurrences`` (every source/page the text appears on,
+        including its own) and ``duplicate_count`` in its metadata.
+
+        Args:
+            chunks: Chunk Documents in document order
+
+        Returns:
+            Chunks with near-duplicates removed
+        """
+        start_time = time.perf_counter()
+        buckets = [defaultdict(list) for _ in range(self.bands)]
+        signatures = []
+        kept = []
+
+        for chunk in chunks:
+            text = chunk.page_content or ""
+            if not text.strip():
+                continue
+            signature = self.signature(text)
+            band_keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+            candidates = set()
+            for band, key in enumerate(band_keys):
+                candidates.update(buckets[band].get(key, ()))
+
+            duplicate_of = None
+            best_similarity = 0.0
+            for candidate in candidates:
+                similarity = float(np.mean(signatures[candidate] == signature))
+                if similarity >= self.threshold and similarity > best_similarity:
+                    duplicate_of, best_similarity = candidate, similarity
+
+            location = {"source": chunk.metadata.get("source"), "page": chunk.metadata.get("page")}
+            if duplicate_of is not None:
+                representative = kept[duplicate_of]
+                representative.metadata["occurrences"].append(location)
+                representative.metadata["duplicate_count"] += 1
+                continue
+
+            chunk.metadata["occurrences"] = [location]
+            chunk.metadata["duplicate_count"] = 0
+            position = len(kept)
+            kept.append(chunk)
+            signatures.append(signature)
+            for band, key in enumerate(band_keys):
+                buckets[band][key].append(position)
+
+        removed = len(chunks) - len(kept)
+        self.last_stats = {
+            "input_chunks": len(chunks),
+            "kept_chunks": len(kept),
+            "removed_chunks": removed,
+            "removed_chars": sum(len(c.page_content or "") for c in chunks) - sum(len(c.page_content) for c in kept),
+            "bands": self.bands,
+            "rows": self.rows,
+            "seconds": round(time.perf_counter() - start_time, 3),
+        }
+        return kept
@@ -0,0 +1,108 @@
+import weakref
+from typing import Optional
+
+import numpy as np
+
+
+REDUCTION_METHODS = ("truncate", "project")
+# Embedding models trained so that their leading components are a usable embedding on their own
+_TRUNCATABLE_BACKEND_PREFIXES = ("openai:text-embedding-3-",)
+
+# Reducers attached to loaded vectorstores whose index holds reduced vectors
+_REDUCERS = weakref.WeakKeyDictionary()
+
+
+def supports_truncation(backend_id: str) -> bool:
+    return backend_id.startswith(_TRUNCATABLE_BACKEND_PREFIXES)
+
+
+def default_reduction_method(backend_id: str) -> str:
+    """
+    Method used for DIMENSION_REDUCTION = auto: truncation for models trained for it
+    (OpenAI text-embedding-3), a random projection for every other backend.
+    """
+    return "truncate" if supports_truncation(backend_id) else "project"
+
+
+class DimensionReducer:
+    """
+    Maps full-dimension embeddings to the low-dimension vectors held in the index.
+
+    ``truncate`` keeps the leading components and re-normalizes. This is what the
+    OpenAI ``dimensions`` parameter does for text-embedding-3 models, so the
+    full vector and the shortened one come from a single API call.
+    ``project`` applies a seeded random orthonormal projection, which also works
+    for models that were not trained for truncation (e.g. text-embedding-ada-002
+    or local models).
+    """
+
+    def __init__(self, source_dimension: int, target_dimension: int, method: str = "truncate", seed: int = 0):
+        """
+        Args:
+            source_dimension: Dimension of the embedding backend
+            target_dimension: Dimension indexed for first-stage search
+            method: "truncate" or "project"
+            seed: Seed of the random projection (recorded in store metadata)
+        """
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Unsupported dimension reduction: {method}. Choose one of {', '.join(REDUCTION_METHODS)}")
+        if not 0 < target_dimension < source_dimension:
+            raise ValueError(f"Index dimension must be between 1 and {source_dimension - 1}, got {target_dimension}")
+        self.source_dimension = source_dimension
+        self.target_dimension = target_dimension
+        self.method = method
+        self.seed = seed
+        self._projection = None
+        if method == "project":
+            rng = np.random.default_rng(seed)
+            gaussian = rng.standard_normal((source_dimension, target_dimension)).astype(np.float32)
+            self._projection, _ = np.linalg.qr(gaussian)
+
+    def reduce(self, vectors) -> np.ndarray:
+        """
+        Reduce a batch (n x source) or a single vector to the index dimension.
+
+        Returns:
+            float32 array with unit-length rows
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        single = vectors.ndim == 1
+        if single:
+            vectors = vectors[None, :]
+        if self.method == "truncate":
+            reduced = vectors[:, :self.target_dimension]
+        else:
+            reduced = vectors @ self._projection
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        reduced = np.ascontiguousarray(reduced / np.where(norms == 0, 1, norms), dtype=np.float32)
+        return reduced[0] if single else reduced
+
+    def describe(self) -> dict:
+        """
+        Metadata needed to rebuild this reducer when the store is loaded.
+        """
+        return {"index_dimension": self.target_dimension, "reduction": self.method, "reduction_seed": self.seed}
+
+    @classmethod
+    def from_metadata(cls, metadata: dict, source_dimension: int) -> Optional["DimensionReducer"]:
+        """
+        Rebuild the reducer a store was built with, or None for full-dimension stores.
+        """
+        target = metadata.get("index_dimension")
+        if not target or target >= source_dimension:
+            return None
+        return cls(source_dimension, target, metadata.get("reduction", "truncate"), metadata.get("reduction_seed", 0))
+
+
+def attach_reducer(vectorstore, reducer: Optional[DimensionReducer]):
+    """
+    Associate a reducer with a loaded vectorstore (queries are reduced before first-stage search).
+    """
+    if reducer is None:
+        _REDUCERS.pop(vectorstore, None)
+    else:
+        _REDUCERS[vectorstore] = reducer
+
+
+def get_reducer(vectorstore) -> Optional[DimensionReducer]:
+    return _REDUCERS.get(vectorstore)
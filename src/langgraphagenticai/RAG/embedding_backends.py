@@ -0,0 +1,275 @@
+import math
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+# Backend id of stores written before backends were configurable
+LEGACY_BACKEND_ID = "openai:text-embedding-ada-002"
+
+_OPENAI_DIMENSIONS = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+}
+
+
+class EmbeddingBackend(Embeddings):
+    """
+    Base class for embedding backends.
+
+    A backend is a LangChain ``Embeddings`` implementation that also reports a
+    stable ``backend_id`` and its output ``dimension``. Both are recorded in
+    vectorstore metadata so a store is only ever queried with the model that built it.
+    """
+
+    backend_id: str = "base"
+
+    def __init__(self):
+        self._dimension: Optional[int] = None
+
+    @property
+    def dimension(self) -> int:
+        """
+        Output dimension (probed with a single embedding call if not known up front).
+        """
+        if self._dimension is None:
+            self._dimension = len(self.embed_query("dimension probe"))
+        return self._dimension
+
+    @property
+    def batch_key(self) -> str:
+        """
+        Key under which concurrent queries may share one embedding call
+        (same model and, for API backends, same credential).
+        """
+        return self.backend_id
+
+    def describe(self) -> dict:
+        """
+        Metadata identifying this backend, stored alongside each vectorstore.
+        """
+        return {"embedding_backend": self.backend_id, "embedding_dimension": self.dimension}
+
+    def is_compatible(self, metadata: dict) -> bool:
+        """
+        Check whether a store's metadata was produced by this backend.
+
+        Args:
+            metadata: Store metadata (stores without backend info are treated as legacy OpenAI stores)
+
+        Returns:
+            True if the store can be queried with this backend
+        """
+        backend_id = metadata.get("embedding_backend", LEGACY_BACKEND_ID)
+        if backend_id != self.backend_id:
+            return False
+        dimension = metadata.get("embedding_dimension")
+        return dimension is None or dimension == self.dimension
+
+
+class OpenAIEmbeddingBackend(EmbeddingBackend):
+    """
+    OpenAI embeddings API.
+    """
+
+    def __init__(self, openai_api_key: str, model: str = "text-embedding-ada-002"):
+        """
+        Args:
+            openai_api_key: OpenAI API key
+            model: OpenAI embedding model name
+        """
+        super().__init__()
+        if not openai_api_key:
+            raise ValueError("OpenAI API key is required for RAG Chatbot")
+        from langchain_openai import OpenAIEmbeddings
+        from src.langgraphagenticai.LLMS.http_clients import get_async_http_client, get_http_client, get_request_settings
+
+        self.model = model
+        self.backend_id = f"openai:{model}"
+        self._dimension = _OPENAI_DIMENSIONS.get(model)
+        self._credential_hash = hashlib.sha256(openai_api_key.encode()).hexdigest()[:16]
+        # Shared keep-alive connection pool instead of a new connection per message
+        request_settings = get_request_settings()
+        self.client = OpenAIEmbeddings(
+            openai_api_key=openai_api_key,
+            model=model,
+            http_client=get_http_client("openai", openai_api_key),
+            http_async_client=get_async_http_client("openai", openai_api_key),
+            request_timeout=request_settings["timeout"],
+            max_retries=request_settings["max_retries"],
+        )
+
+    @property
+    def batch_key(self) -> str:
+        return f"{self.backend_id}:{self._credential_hash}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.client.aembed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.client.aembed_query(text)
+
+
+# Local models and their thread pools are shared by every backend instance (sessions build a
+# new RAGModule, and so a new backend, per message), keyed by (model_name, runtime)
+_local_models: Dict[Tuple[str, str], object] = {}
+_local_executors: Dict[Tuple[str, str, int], ThreadPoolExecutor] = {}
+_local_lock = threading.Lock()
+
+
+class LocalEmbeddingBackend(EmbeddingBackend):
+    """
+    Local CPU embedding model (sentence-transformers, optionally on the ONNX runtime).
+
+    Texts are split into batches and encoded on a thread pool; the model's
+    inference releases the GIL, so batches run in parallel across cores.
+    No network access is needed once the model files are available locally.
+    """
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 runtime: str = "torch", batch_size: int = 64, max_workers: int = 4):
+        """
+        Args:
+            model_name: sentence-transformers model name or local path
+            runtime: Inference runtime, "torch" or "onnx"
+            batch_size: Texts per inference batch
+            max_workers: Number of batches encoded concurrently
+        """
+        super().__init__()
+        self.model_name = model_name
+        self.runtime = runtime
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.backend_id = f"local:{model_name}"
+        self._model = None
+        with _local_lock:
+            executor_key = (model_name, runtime, self.max_workers)
+            if executor_key not in _local_executors:
+                _local_executors[executor_key] = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                                    thread_name_prefix="embed")
+            self._executor = _local_executors[executor_key]
+
+    def _get_model(self):
+        if self._model is None:
+            with _local_lock:
+                model = _local_models.get((self.model_name, self.runtime))
+                if model is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                    except ImportError as e:
+                        raise ImportError(
+                            "The local embedding backend requires sentence-transformers. "
+                            "Install it with: pip install sentence-transformers"
+                        ) from e
+                    print(f"🧠 Loading local embedding model {self.model_name} ({self.runtime})...")
+                    kwargs = {"device": "cpu"}
+                    if self.runtime == "onnx":
+                        kwargs["backend"] = "onnx"
+                    model = SentenceTransformer(self.model_name, **kwargs)
+                    _local_models[(self.model_name, self.runtime)] = model
+            self._dimension = model.get_sentence_embedding_dimension()
+            self._model = model
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._get_model()
+        return self._dimension
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._get_model().encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        self._get_model()
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1:
+            return self._encode(batches[0])
+        results = []
+        for batch_vectors in self._executor.map(self._encode, batches):
+            results.extend(batch_vectors)
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic feature-hashing embedder for tests and offline runs.
+
+    Word unigrams and bigrams are hashed into a fixed number of signed buckets
+    and L2-normalized. No model, no network, same output on every machine.
+    """
+
+    _token_pattern = re.compile(r"\w+")
+
+    def __init__(self, dimension: int = 384):
+        """
+        Args:
+            dimension: Output dimension
+        """
+        super().__init__()
+        self._dimension = dimension
+        self.backend_id = f"hashing:{dimension}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self._dimension
+        tokens = self._token_pattern.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self._dimension] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def get_embedding_backend(name: str, openai_api_key: Optional[str] = None, settings: Optional[dict] = None) -> EmbeddingBackend:
+    """
+    Create an embedding backend by name.
+
+    Args:
+        name: Backend name: "openai", "local" or "hashing"
+        openai_api_key: OpenAI API key (required for "openai")
+        settings: Backend settings from uiconfigfile.ini (see Config.get_embedding_settings)
+
+    Returns:
+        EmbeddingBackend instance
+    """
+    settings = settings or {}
+    name = (name or "openai").strip().lower()
+    if name == "openai":
+        return OpenAIEmbeddingBackend(openai_api_key, model=settings.get("openai_model", "text-embedding-ada-002"))
+    if name == "local":
+        return LocalEmbeddingBackend(
+            model_name=settings.get("local_model", "sentence-transformers/all-MiniLM-L6-v2"),
+            runtime=settings.get("local_runtime", "torch"),
+            batch_size=int(settings.get("batch_size", 64)),
+            max_workers=int(settings.get("workers", 4)),
+        )
+    if name == "hashing":
+        return HashingEmbeddingBackend(dimension=int(settings.get("hashing_dimension", 384)))
+    raise ValueError(f"Unsupported embedding backend: {name}")
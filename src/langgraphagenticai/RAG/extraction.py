@@ -0,0 +1,207 @@
+import os
+import json
+import uuid
+import hashlib
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+
+class ExtractionBackend:
+    """
+    Base class for text extraction backends. ``extract`` returns one Document per page.
+    """
+
+    name = "base"
+
+    def extract(self, path: str) -> List[Document]:
+        raise NotImplementedError
+
+
+class PyPDFBackend(ExtractionBackend):
+    """
+    Pure-Python pypdf via LangChain's PyPDFLoader (always available).
+    """
+
+    name = "pypdf"
+
+    def extract(self, path: str) -> List[Document]:
+        from langchain_community.document_loaders import PyPDFLoader
+        return PyPDFLoader(path).load()
+
+
+class PyMuPDFBackend(ExtractionBackend):
+    """
+    PyMuPDF (MuPDF, C library) - much faster on large, table-heavy filings.
+    """
+
+    name = "pymupdf"
+
+    def extract(self, path: str) -> List[Document]:
+        try:
+            import pymupdf
+        except ImportError as e:
+            raise ImportError("The pymupdf extraction backend requires PyMuPDF. Install it with: pip install pymupdf") from e
+        documents = []
+        with pymupdf.open(path) as pdf:
+            for page_number, page in enumerate(pdf):
+                documents.append(Document(
+                    page_content=page.get_text(),
+                    metadata={"source": path, "page": page_number, "total_pages": pdf.page_count},
+                ))
+        return documents
+
+
+class PdfiumBackend(ExtractionBackend):
+    """
+    pypdfium2 (PDFium, C library) - fast extraction with a permissive license.
+    """
+
+    name = "pdfium"
+
+    def extract(self, path: str) -> List[Document]:
+        try:
+            import pypdfium2
+        except ImportError as e:
+            raise ImportError("The pdfium extraction backend requires pypdfium2. Install it with: pip install pypdfium2") from e
+        documents = []
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            total_pages = len(pdf)
+            for page_number in range(total_pages):
+                page = pdf[page_number]
+                text_page = page.get_textpage()
+                documents.append(Document(
+                    page_content=text_page.get_text_range(),
+                    metadata={"source": path, "page": page_number, "total_pages": total_pages},
+                ))
+                text_page.close()
+                page.close()
+        finally:
+            pdf.close()
+        return documents
+
+
+class TextBackend(ExtractionBackend):
+    """
+    Plain text files via LangChain's TextLoader.
+    """
+
+    name = "text"
+
+    def extract(self, path: str) -> List[Document]:
+        from langchain_community.document_loaders import TextLoader
+        return TextLoader(path).load()
+
+
+PDF_BACKENDS = {backend.name: backend for backend in (PyPDFBackend, PyMuPDFBackend, PdfiumBackend)}
+
+
+def get_extraction_backend(file_extension: str, pdf_backend: str = "pypdf") -> ExtractionBackend:
+    """
+    Pick the extraction backend for a file type.
+
+    Args:
+        file_extension: File extension without the dot ("pdf", "txt")
+        pdf_backend: PDF backend name: "pypdf", "pymupdf" or "pdfium"
+
+    Returns:
+        ExtractionBackend instance
+    """
+    if file_extension == "pdf":
+        if pdf_backend not in PDF_BACKENDS:
+            raise ValueError(f"Unsupported PDF backend: {pdf_backend}. Choose one of {', '.join(PDF_BACKENDS)}")
+        return PDF_BACKENDS[pdf_backend]()
+    if file_extension == "txt":
+        return TextBackend()
+    raise ValueError(f"Unsupported file type: {file_extension}")
+
+
+def content_hash(data: bytes) -> str:
+    """
+    SHA-256 of file content (the extraction cache key).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extracted page text keyed by file content hash and backend.
+
+    Rebuilding a store with a new chunking or embedding configuration reuses the
+    cached pages instead of parsing the file again. Entries are JSON and written
+    atomically, so concurrent sessions never read a partial entry.
+    """
+
+    def __init__(self, cache_dir: str = "./vectorstore_db/extracted_text"):
+        """
+        Args:
+            cache_dir: Directory holding cached extractions
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, file_hash: str, backend_name: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}.{backend_name}.json")
+
+    def get(self, file_hash: str, backend_name: str) -> Optional[List[Document]]:
+        """
+        Return cached pages, or None on a miss (or an unreadable entry).
+        """
+        path = self._path(file_hash, backend_name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable extraction cache entry {path}: {str(e)}")
+            return None
+        # The modification time is the entry's last use for the disk-budget collector
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return [Document(page_content=page["page_content"], metadata=page["metadata"]) for page in entry["pages"]]
+
+    def put(self, file_hash: str, backend_name: str, documents: List[Document], stats: Optional[Dict] = None) -> bool:
+        """
+        Store extracted pages.
+
+        The cache is an optimisation: a failed write (full disk, read-only
+        directory, metadata JSON cannot hold) is logged and the partial file
+        removed, and the upload goes on with the pages it already has.
+
+        Returns:
+            True if the entry was written
+        """
+        path = self._path(file_hash, backend_name)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        entry = {
+            "file_hash": file_hash,
+            "backend": backend_name,
+            "stats": stats or {},
+            "pages": [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+        }
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Warning: Could not write extraction cache entry {path}: {str(e)}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+    def get_any(self, file_hash: str) -> Optional[List[Document]]:
+        """
+        Return cached pages from whichever backend extracted this content, if any.
+        """
+        prefix = f"{file_hash}."
+        for name in sorted(os.listdir(self.cache_dir)):
+            if name.startswith(prefix) and name.endswith(".json"):
+                return self.get(file_hash, name[len(prefix):-len(".json")])
+        return None
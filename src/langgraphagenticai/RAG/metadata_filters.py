@@ -0,0 +1,281 @@
+import re
+import weakref
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from langchain_core.documents import Document
+
+# Fields every chunk can be filtered on; "page" is the loader's 0-based page index
+FILTER_FIELDS = ("source", "page", "section", "doc_type", "fiscal_year", "fiscal_period", "ticker")
+
+_MONTH_QUARTER = {"march": "Q1", "june": "Q2", "september": "Q3", "december": "Q4"}
+_ORDINAL_QUARTER = {"first": "Q1", "second": "Q2", "third": "Q3", "fourth": "Q4"}
+
+_DOC_TYPE_PATTERN = re.compile(r"(?<![A-Za-z0-9])(10-?K|10-?Q|8-?K|20-?F|S-1)(?![A-Za-z0-9])", re.IGNORECASE)
+_ANNUAL_PERIOD_PATTERN = re.compile(r"for the (?:fiscal )?year ended\s+\w+\s+\d{1,2},\s+(20\d{2})", re.IGNORECASE)
+_QUARTERLY_PERIOD_PATTERN = re.compile(
+    r"for the quarterly period ended\s+(march|june|september|december)\s+\d{1,2},\s+(20\d{2})", re.IGNORECASE)
+_RELEASE_PERIOD_PATTERN = re.compile(r"\b(first|second|third|fourth) quarter(?: of)?(?: fiscal(?: year)?)? (20\d{2})\b",
+                                     re.IGNORECASE)
+_TICKER_PATTERNS = (
+    re.compile(r"\((?:NASDAQ|NYSE|Nasdaq|NYSE American)(?:\s*GS)?\s*:\s*([A-Z]{1,5})\)"),
+    re.compile(r"Trading\s+Symbol\(?s?\)?\s*\n?\s*(?:Common Stock[^\n]*?\s)?([A-Z]{1,5})\b"),
+)
+# SEC EDGAR file names: <ticker>-<period end yyyymmdd>, e.g. amzn-20231231.pdf
+_EDGAR_FILE_PATTERN = re.compile(r"^([a-z]{1,5})-(20\d{2})(\d{2})\d{2}", re.IGNORECASE)
+_FILE_QUARTER_PATTERN = re.compile(r"(?<![a-z0-9])q([1-4])(?![0-9])", re.IGNORECASE)
+_FILE_YEAR_PATTERN = re.compile(r"(?<!\d)(20\d{2})(?!\d)")
+
+# Query phrases that restrict the search
+_QUERY_PAGE_PATTERN = re.compile(r"\b(?:on |from )?(?:pages?|pp?\.)\s*(\d{1,4})(?:\s*(?:-|–|—|to|through)\s*(\d{1,4}))?\b",
+                                 re.IGNORECASE)
+_QUERY_DOC_PATTERN = re.compile(
+    r"\b(?:in |from )?(?:the )?(?:(?:fy\s?)?(20\d{2}) )?(10-K|10-Q|8-K|20-F|annual report|quarterly report)"
+    r"(?: for (?:fiscal )?(20\d{2}))?(?: only)?\b", re.IGNORECASE)
+_QUERY_QUARTER_PATTERN = re.compile(
+    r"\b(?:in |for |during )?(?:the )?(?:q([1-4])|(first|second|third|fourth) quarter)(?: of)?(?: (?:fy\s?|fiscal )?(20\d{2}))?\b",
+    re.IGNORECASE)
+_QUERY_YEAR_PATTERN = re.compile(r"\b(?:in |for |during )?(?:fiscal(?: year)? |fy\s?)(20\d{2}|\d{2})\b", re.IGNORECASE)
+_QUERY_TICKER_PATTERN = re.compile(r"(?:\$([A-Z]{1,5})\b|\bticker:?\s*([A-Z]{1,5})\b)")
+_QUERY_SOURCE_PATTERN = re.compile(r"\b(?:in |from )?([\w.-]+\.(?:pdf|txt))\b(?: only)?", re.IGNORECASE)
+_DOC_TYPE_ALIASES = {"annual report": "10-K", "quarterly report": "10-Q"}
+
+
+def detect_filing_metadata(pages: List[Document], file_name: str) -> Dict:
+    """
+    Detect document-level filing metadata from a file's first pages and its name.
+
+    Args:
+        pages: Pages of one file (only the first few are read)
+        file_name: Uploaded file name
+
+    Returns:
+        Dict with any of doc_type, fiscal_year, fiscal_period ("FY", "Q1".."Q4") and ticker
+    """
+    text = "\n".join(page.page_content or "" for page in pages[:3])
+    metadata = {}
+
+    match = _QUARTERLY_PERIOD_PATTERN.search(text)
+    if match:
+        metadata.update(doc_type="10-Q", fiscal_period=_MONTH_QUARTER[match.group(1).lower()],
+                        fiscal_year=int(match.group(2)))
+    else:
+        match = _ANNUAL_PERIOD_PATTERN.search(text)
+        if match:
+            metadata.update(fiscal_period="FY", fiscal_year=int(match.group(1)))
+        else:
+            match = _RELEASE_PERIOD_PATTERN.search(text)
+            if match:
+                metadata.update(fiscal_period=_ORDINAL_QUARTER[match.group(1).lower()], fiscal_year=int(match.group(2)))
+    match = _DOC_TYPE_PATTERN.search(file_name) or _DOC_TYPE_PATTERN.search(text)
+    if match and "doc_type" not in metadata:
+        doc_type = match.group(1).upper()
+        metadata["doc_type"] = doc_type if "-" in doc_type else f"{doc_type[:-1]}-{doc_type[-1]}"
+    if metadata.get("doc_type") == "10-K":
+        metadata.setdefault("fiscal_period", "FY")
+
+    for pattern in _TICKER_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            metadata["ticker"] = match.group(1)
+            break
+
+    # File names fill in what the text did not say
+    stem = file_name.rsplit("/", 1)[-1]
+    match = _EDGAR_FILE_PATTERN.match(stem)
+    if match:
+        metadata.setdefault("ticker", match.group(1).upper())
+        metadata.setdefault("fiscal_year", int(match.group(2)))
+    match = _FILE_QUARTER_PATTERN.search(stem)
+    if match:
+        metadata.setdefault("fiscal_period", f"Q{match.group(1)}")
+    match = _FILE_YEAR_PATTERN.search(stem)
+    if match:
+        metadata.setdefault("fiscal_year", int(match.group(1)))
+    return metadata
+
+
+def annotate_filing_metadata(pages: List[Document], file_name: str) -> Dict:
+    """
+    Stamp the detected filing metadata on every page of a file (chunks inherit it).
+    """
+    metadata = detect_filing_metadata(pages, file_name)
+    for page in pages:
+        page.metadata.update(metadata)
+    return metadata
+
+
+def parse_query_filters(query: str) -> Tuple[Dict, str]:
+    """
+    Pull metadata restrictions out of a question.
+
+    Recognises page ranges ("page 40-60", "p. 12"), filings ("in the 2023 10-K
+    only", "annual report"), quarters ("Q3 2024", "third quarter"), fiscal years
+    ("fiscal 2023", "FY24"), tickers ("$AMZN") and file names ("in report.pdf").
+
+    Args:
+        query: User question
+
+    Returns:
+        (filters, search_query) where search_query is the question without the
+        filter phrases (what gets embedded). Pages are 1-based as users count them.
+    """
+    filters = {}
+    remaining = query
+
+    def take(pattern, handler):
+        nonlocal remaining
+        matches = list(pattern.finditer(remaining))
+        # "Q3 vs Q4", "2023 and 2024": comparisons span several values, so do not filter
+        if len(matches) != 1:
+            return
+        match = matches[0]
+        if handler(match) is not False:
+            remaining = (remaining[:match.start()] + " " + remaining[match.end():]).strip()
+
+    def page_range(match):
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else first
+        filters["page_range"] = (min(first, last), max(first, last))
+
+    def filing(match):
+        filters["doc_type"] = _DOC_TYPE_ALIASES.get(match.group(2).lower(), match.group(2).upper())
+        year = match.group(1) or match.group(3)
+        if year:
+            filters["fiscal_year"] = int(year)
+
+    def quarter(match):
+        filters["fiscal_period"] = f"Q{match.group(1)}" if match.group(1) else _ORDINAL_QUARTER[match.group(2).lower()]
+        if match.group(3):
+            filters["fiscal_year"] = int(match.group(3))
+
+    def fiscal_year(match):
+        if "fiscal_year" in filters:
+            return False
+        year = match.group(1)
+        filters["fiscal_year"] = int("20" + year if len(year) == 2 else year)
+
+    def ticker(match):
+        filters["ticker"] = match.group(1) or match.group(2)
+
+    def source(match):
+        filters["source"] = match.group(1)
+
+    take(_QUERY_PAGE_PATTERN, page_range)
+    take(_QUERY_SOURCE_PATTERN, source)
+    take(_QUERY_DOC_PATTERN, filing)
+    take(_QUERY_QUARTER_PATTERN, quarter)
+    take(_QUERY_YEAR_PATTERN, fiscal_year)
+    take(_QUERY_TICKER_PATTERN, ticker)
+    remaining = re.sub(r"\s{2,}", " ", remaining).strip(" ,;")
+    return filters, (remaining or query)
+
+
+class MetadataIndex:
+    """
+    Inverted index from chunk metadata values to FAISS positions of one vectorstore.
+
+    Built once per loaded store from its docstore. ``select`` turns a filter dict
+    into the sorted positions that match, which the search hands to FAISS as an
+    ID selector so only those vectors are scored.
+    """
+
+    def __init__(self, vectorstore):
+        self.size = len(vectorstore.index_to_docstore_id)
+        self.values: Dict[str, Dict] = {field: defaultdict(list) for field in FILTER_FIELDS if field != "page"}
+        self.pages = np.full(self.size, -1, dtype=np.int64)
+        # Pages a near-duplicate chunk also stands for (its dedup occurrences), as parallel arrays
+        extra_positions, extra_pages = [], []
+        for position, docstore_id in vectorstore.index_to_docstore_id.items():
+            doc = vectorstore.docstore.search(docstore_id)
+            metadata = getattr(doc, "metadata", None) or {}
+            for field, index in self.values.items():
+                # A structured chunk holding several small sections lists them all in "sections"
+                values = metadata.get("sections") if field == "section" else None
+                for value in values or (metadata.get(field),):
+                    if value not in (None, ""):
+                        index[str(value).lower()].append(position)
+            page = metadata.get("page")
+            if isinstance(page, int):
+                self.pages[position] = page
+            # The kept copy of repeated text answers for every source and page it was found on
+            for occurrence in metadata.get("occurrences") or ():
+                source = occurrence.get("source")
+                if source not in (None, ""):
+                    self.values["source"][str(source).lower()].append(position)
+                if isinstance(occurrence.get("page"), int) and occurrence["page"] != page:
+                    extra_positions.append(position)
+                    extra_pages.append(occurrence["page"])
+        self.extra_positions = np.asarray(extra_positions, dtype=np.int64)
+        self.extra_pages = np.asarray(extra_pages, dtype=np.int64)
+        self.values = {field: {value: np.unique(positions) for value, positions in index.items()}
+                       for field, index in self.values.items()}
+
+    def select(self, filters: Dict) -> Optional[np.ndarray]:
+        """
+        Positions matching every filter, or None when no filter applies to this store.
+
+        Args:
+            filters: Field -> value (strings match case-insensitively; "source" also
+                     matches by file name suffix) plus "page_range" as 1-based (first, last)
+        """
+        selected = None
+        for field, wanted in filters.items():
+            if field == "page_range":
+                first, last = wanted
+                # Loader pages are 0-based; users count from 1
+                positions = np.flatnonzero((self.pages >= first - 1) & (self.pages <= last - 1))
+                if len(self.extra_pages):
+                    in_range = (self.extra_pages >= first - 1) & (self.extra_pages <= last - 1)
+                    positions = np.union1d(positions, self.extra_positions[in_range])
+            elif field in self.values:
+                index = self.values[field]
+                wanted = str(wanted).lower()
+                if field == "source":
+                    keys = [value for value in index if wanted in value]
+                else:
+                    keys = [wanted] if wanted in index else []
+                positions = np.unique(np.concatenate([index[key] for key in keys])) if keys else np.empty(0, dtype=np.int64)
+            else:
+                continue
+            selected = positions if selected is None else np.intersect1d(selected, positions, assume_unique=True)
+        return selected
+
+
+_metadata_indexes = weakref.WeakKeyDictionary()
+
+
+def get_metadata_index(vectorstore) -> MetadataIndex:
+    """
+    Metadata index of a loaded vectorstore (built on first use, rebuilt if the store grew).
+    """
+    index = _metadata_indexes.get(vectorstore)
+    if index is None or index.size != len(vectorstore.index_to_docstore_id):
+        index = MetadataIndex(vectorstore)
+        _metadata_indexes[vectorstore] = index
+    return index
+
+
+def id_selector(positions: np.ndarray) -> faiss.IDSelector:
+    """
+    FAISS ID selector for sorted positions; contiguous runs (one file, a page range)
+    use a range selector that flat indexes scan without per-ID membership checks.
+    """
+    if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+        selector = faiss.IDSelectorRange(int(positions[0]), int(positions[-1]) + 1)
+        selector.assume_sorted = True
+        return selector
+    return faiss.IDSelectorBatch(np.ascontiguousarray(positions, dtype=np.int64))
+
+
+def describe_filters(filters: Dict) -> str:
+    parts = []
+    for field, value in filters.items():
+        if field == "page_range":
+            parts.append(f"pages {value[0]}-{value[1]}" if value[0] != value[1] else f"page {value[0]}")
+        else:
+            parts.append(f"{field}={value}")
+    return ", ".join(parts)
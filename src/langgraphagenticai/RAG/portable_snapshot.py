@@ -0,0 +1,246 @@
+"""
+Portable snapshot format: raw vectors plus a columnar chunk table, no pickle.
+
+A portable snapshot does not depend on FAISS, LangChain or Python versions: the
+index is rebuilt on load from the stored full-precision vectors, in the storage
+mode and dimension reduction recorded in metadata.json. Stores can be saved in
+this format (SNAPSHOT_FORMAT = portable) and any store can be exported to it
+and imported into another vectorstore directory or app instance.
+
+Layout::
+
+    <snapshot>/
+        portable.json          -> format version, chunk count, dimension, metadata columns
+        vectors.f32.npy        -> embeddings (row i = chunk i), memory-mapped on load
+        chunks.columns.json    -> {"text": [...], "metadata": {column: [...]}}
+        metadata.json          -> file names, embedding backend, storage mode, reduction
+
+Usage (from the repository root):
+    python -m src.langgraphagenticai.RAG.portable_snapshot export --store vectorstore_db/vectorstore_<hash> --out /backups/acme
+    python -m src.langgraphagenticai.RAG.portable_snapshot import --src /backups/acme
+    python -m src.langgraphagenticai.RAG.portable_snapshot import --src /backups/acme --owner <session id> --name acme
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+PORTABLE_FILE = "portable.json"
+CHUNK_TABLE_FILE = "chunks.columns.json"
+VECTORS_FILE = "vectors.f32.npy"
+FORMAT_VERSION = 1
+
+
+def is_portable_snapshot(path: str) -> bool:
+    return os.path.exists(os.path.join(path, PORTABLE_FILE))
+
+
+def write_portable(path: str, texts: List[str], metadatas: List[dict], vectors):
+    """
+    Write chunks and their full-precision vectors as a portable snapshot.
+
+    Metadata is stored column by column; keys a chunk does not have are null
+    and are left out again when the table is read.
+    """
+    vectors = np.ascontiguousarray(np.asarray(vectors), dtype=np.float32)
+    if len(vectors) != len(texts):
+        raise ValueError(f"{len(vectors)} vectors for {len(texts)} chunks")
+    columns = []
+    for metadata in metadatas:
+        columns.extend(key for key in metadata if key not in columns)
+    table = {
+        "text": list(texts),
+        "metadata": {column: [metadata.get(column) for metadata in metadatas] for column in columns},
+    }
+    np.save(os.path.join(path, VECTORS_FILE), vectors)
+    with open(os.path.join(path, CHUNK_TABLE_FILE), "w") as f:
+        json.dump(table, f, default=str)
+    with open(os.path.join(path, PORTABLE_FILE), "w") as f:
+        json.dump({"format": FORMAT_VERSION, "num_chunks": len(texts), "dimension": int(vectors.shape[1]),
+                   "dtype": "float32", "vectors": VECTORS_FILE, "chunks": CHUNK_TABLE_FILE, "columns": columns},
+                  f, indent=2)
+
+
+def read_portable(path: str, mmap: bool = True) -> Tuple[List[str], List[dict], np.ndarray]:
+    """
+    Read a portable snapshot.
+
+    Args:
+        path: Snapshot directory
+        mmap: Memory-map the vectors instead of reading them into RAM
+
+    Returns:
+        (texts, metadatas, vectors)
+    """
+    with open(os.path.join(path, PORTABLE_FILE)) as f:
+        info = json.load(f)
+    if info.get("format", 0) > FORMAT_VERSION:
+        raise ValueError(f"Portable snapshot format {info['format']} is newer than this app supports ({FORMAT_VERSION})")
+    with open(os.path.join(path, info.get("chunks", CHUNK_TABLE_FILE))) as f:
+        table = json.load(f)
+    texts = table["text"]
+    columns = table["metadata"]
+    metadatas = [
+        {column: values[i] for column, values in columns.items() if values[i] is not None}
+        for i in range(len(texts))
+    ]
+    vectors = np.load(os.path.join(path, info.get("vectors", VECTORS_FILE)), mmap_mode="r" if mmap else None)
+    if len(vectors) != len(texts) or vectors.shape[1] != info["dimension"]:
+        raise ValueError(f"Portable snapshot {path} is inconsistent: {vectors.shape} vectors for {len(texts)} chunks")
+    return texts, metadatas, vectors
+
+
+def _read_metadata(path: str) -> dict:
+    metadata_file = os.path.join(path, "metadata.json")
+    if not os.path.exists(metadata_file):
+        return {}
+    with open(metadata_file) as f:
+        return json.load(f)
+
+
+def snapshot_vectors(module, snapshot_path: str, store_path: str) -> Tuple[List[str], List[dict], np.ndarray]:
+    """
+    Chunks and full-precision vectors of a saved snapshot, whatever its layout.
+
+    FAISS and sharded snapshots without stored full vectors give their decoded
+    index vectors, which are exact for flat indexes only.
+    """
+    from src.langgraphagenticai.RAG.segment_store import is_segment_snapshot
+    from src.langgraphagenticai.RAG.sharded_store import read_snapshot_vectors
+
+    if is_portable_snapshot(snapshot_path):
+        return read_portable(snapshot_path)
+    if is_segment_snapshot(snapshot_path):
+        texts, metadatas, vectors = module._read_segment_snapshot(snapshot_path, store_path)
+        return texts, metadatas, np.asarray(vectors)
+    texts, metadatas, index_vectors, full_vectors = read_snapshot_vectors(snapshot_path)
+    if full_vectors is not None:
+        return texts, metadatas, full_vectors
+    metadata = _read_metadata(snapshot_path)
+    if metadata.get("index_dimension"):
+        raise ValueError(f"{snapshot_path} has a reduced-dimension index and no full vectors")
+    if metadata.get("index_type", "flat") != "flat":
+        print(f"⚠️ {snapshot_path} keeps no full vectors: exporting the decoded {metadata['index_type']} approximations")
+    return texts, metadatas, index_vectors
+
+
+def export_snapshot(module, store_path: str, output_dir: str) -> str:
+    """
+    Export the serving snapshot of a store as a portable snapshot.
+
+    Args:
+        module: RAGModule (reads segment-composed snapshots)
+        store_path: Store directory
+        output_dir: New directory to write (must not exist)
+
+    Returns:
+        output_dir
+    """
+    from src.langgraphagenticai.RAG.snapshot_store import SnapshotStore
+
+    snapshot_path = SnapshotStore(store_path).current_path()
+    if snapshot_path is None:
+        raise ValueError(f"No published snapshot at {store_path}")
+    if os.path.exists(output_dir):
+        raise ValueError(f"{output_dir} already exists")
+    start_time = time.perf_counter()
+    texts, metadatas, vectors = snapshot_vectors(module, snapshot_path, store_path)
+    metadata = {key: value for key, value in _read_metadata(snapshot_path).items()
+                if key not in ("version", "shards", "segments")}
+    metadata["num_chunks"] = len(texts)
+    metadata["exported_from"] = os.path.basename(os.path.normpath(store_path))
+    metadata["exported_at"] = str(time.time())
+    tmp_dir = f"{output_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    write_portable(tmp_dir, texts, metadatas, vectors)
+    with open(os.path.join(tmp_dir, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_dir, output_dir)
+    print(f"📦 Exported {len(texts)} chunks ({vectors.shape[1]} dims) of {store_path} to {output_dir} "
+          f"in {time.perf_counter() - start_time:.2f}s")
+    return output_dir
+
+
+def import_snapshot(module, source_dir: str, owner: Optional[str] = None, name: Optional[str] = None) -> Dict:
+    """
+    Publish a portable snapshot as the serving version of the store its documents map to.
+
+    The vectors must come from the module's embedding backend; the index is
+    built with the module's storage mode and dimension reduction.
+
+    Args:
+        module: RAGModule of the target vectorstore directory and settings
+        source_dir: Exported portable snapshot
+        owner: Register the collection in the catalog for this owner (session id)
+        name: Collection name (default: derived from the file names)
+
+    Returns:
+        {"store_path", "snapshot_path", "num_chunks"}
+    """
+    from src.langgraphagenticai.RAG.snapshot_store import SnapshotStore
+
+    if not is_portable_snapshot(source_dir):
+        raise ValueError(f"{source_dir} is not a portable snapshot")
+    source_metadata = _read_metadata(source_dir)
+    if not module.embeddings.is_compatible(source_metadata):
+        raise ValueError(f"{source_dir} was embedded with {source_metadata.get('embedding_backend')} "
+                         f"({source_metadata.get('embedding_dimension')} dims); current backend is "
+                         f"{module.embeddings.backend_id} ({module.embeddings.dimension} dims)")
+    texts, metadatas, vectors = read_portable(source_dir)
+    if vectors.shape[1] != module.embeddings.dimension:
+        raise ValueError(f"Vectors have {vectors.shape[1]} dims, the embedding backend {module.embeddings.dimension}")
+    file_names = source_metadata.get("file_names") \
+        or sorted({metadata.get("source") for metadata in metadatas if metadata.get("source")})
+    store_path = module.get_vectorstore_path(file_names)
+    metadata = {
+        "file_names": file_names,
+        "num_chunks": len(texts),
+        "created_at": str(time.time()),
+        "index_type": module.storage_mode,
+        "rescore": module.reducer is not None or (module.rescore_enabled and module.storage_mode != "flat"),
+        "imported_from": source_metadata.get("exported_from"),
+        **module.embeddings.describe(),
+        **(module.reducer.describe() if module.reducer is not None else {}),
+    }
+    snapshot_path = SnapshotStore(store_path).publish(lambda path: write_portable(path, texts, metadatas, vectors),
+                                                     metadata=metadata)
+    print(f"📥 Imported {len(texts)} chunks from {source_dir} into {snapshot_path}")
+    if owner:
+        module.catalog.register_collection(
+            owner=owner,
+            name=name or module.get_collection_name(file_names),
+            store_path=store_path,
+            file_names=file_names,
+            index_type=module.storage_mode,
+            num_chunks=len(texts),
+        )
+    return {"store_path": store_path, "snapshot_path": snapshot_path, "num_chunks": len(texts)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write a store's serving snapshot as a portable snapshot")
+    export_parser.add_argument("--store", required=True, help="Store directory (vectorstore_db/vectorstore_<hash>)")
+    export_parser.add_argument("--out", required=True, help="Output directory (must not exist)")
+    import_parser = commands.add_parser("import", help="Publish a portable snapshot into VECTORSTORE_DIR")
+    import_parser.add_argument("--src", required=True, help="Portable snapshot directory")
+    import_parser.add_argument("--owner", help="Register the collection for this owner (session id)")
+    import_parser.add_argument("--name", help="Collection name (default: derived from the file names)")
+    args = parser.parse_args()
+
+    from src.langgraphagenticai.RAG.rag_module import RAGModule
+    module = RAGModule(os.environ.get("OPENAI_API_KEY"))
+    if args.command == "export":
+        export_snapshot(module, args.store, args.out)
+    else:
+        import_snapshot(module, args.src, owner=args.owner, name=args.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+class CollectionPreloader:
+    """
+    Background thread loading the configured hot collections into the process-wide store cache.
+
+    The first session to search a hot collection then reuses the loaded copy
+    instead of paying the index load inside its request. ``ready`` is set once
+    every hot collection was loaded or failed to load, and the readiness file
+    (if configured) is written at that moment, for orchestrator readiness probes.
+    """
+
+    def __init__(self, persist_directory: str, names: List[str], ready_file: Optional[str] = None,
+                 openai_api_key: Optional[str] = None):
+        """
+        Args:
+            persist_directory: Vectorstore root
+            names: Collection names (any owner) or store directory names to load
+            ready_file: File created once preloading is done (removed at start)
+            openai_api_key: Key for the "openai" embedding backend; loaded copies are shared with every
+                            session on the same backend, whatever key it uses
+        """
+        self.persist_directory = persist_directory
+        self.ready_file = ready_file
+        self.openai_api_key = openai_api_key
+        self.status: Dict[str, Dict] = OrderedDict((name, {"state": "pending"}) for name in names)
+        self.ready = threading.Event()
+        self.seconds: Optional[float] = None
+        if ready_file:
+            try:
+                os.remove(ready_file)
+            except FileNotFoundError:
+                pass
+        self._thread = threading.Thread(target=self._run, name="vectorstore-preload", daemon=True)
+        self._thread.start()
+
+    def _store_records(self, module, name: str) -> List[Dict]:
+        """
+        Catalog records to load for a hot collection name (a bare store directory gets a record of its own).
+        """
+        records = module.catalog.find_collections(name)
+        if records:
+            # One load per store; sessions' entries for the same documents share it
+            return list({record["store_path"]: record for record in reversed(records)}.values())
+        store_path = os.path.join(self.persist_directory, name)
+        return [{"store_path": store_path, "documents": []}] if os.path.isdir(store_path) else []
+
+    def _run(self):
+        start_time = time.perf_counter()
+        try:
+            if not self.status:
+                return
+            from src.langgraphagenticai.RAG.rag_module import RAGModule
+            module = RAGModule(self.openai_api_key, persist_directory=self.persist_directory)
+            cache_size = module.batching_settings["store_cache_size"]
+            if len(self.status) > cache_size:
+                print(f"⚠️ {len(self.status)} hot collections but STORE_CACHE_SIZE is {cache_size}: "
+                      f"only the last {cache_size} stay loaded")
+            for name, status in self.status.items():
+                status["state"] = "loading"
+                load_start = time.perf_counter()
+                try:
+                    records = self._store_records(module, name)
+                    stores = [module.load_collection_store(record) for record in records]
+                    if not stores or any(store is None for store in stores):
+                        raise ValueError("no loadable store" if stores else "not found in the catalog")
+                    status.update(state="loaded", vectors=sum(store.index.ntotal for store in stores))
+                except Exception as e:
+                    status.update(state="failed", error=str(e))
+                    print(f"⚠️ Could not preload collection '{name}': {str(e)}")
+                status["seconds"] = round(time.perf_counter() - load_start, 3)
+        except Exception as e:
+            for status in self.status.values():
+                if status["state"] in ("pending", "loading"):
+                    status.update(state="failed", error=str(e))
+            print(f"⚠️ Collection preloading failed: {str(e)}")
+        finally:
+            self.seconds = round(time.perf_counter() - start_time, 3)
+            loaded = sum(1 for status in self.status.values() if status["state"] == "loaded")
+            if self.ready_file:
+                try:
+                    with open(self.ready_file, "w") as f:
+                        f.write(f"{loaded}/{len(self.status)} hot collection(s) loaded in {self.seconds}s\n")
+                except OSError as e:
+                    print(f"⚠️ Could not write readiness file {self.ready_file}: {str(e)}")
+            self.ready.set()
+            if self.status:
+                print(f"🔥 Preloaded {loaded}/{len(self.status)} hot collection(s) in {self.seconds:.2f}s")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def describe(self) -> str:
+        """
+        One-line readiness summary (used by the UI).
+        """
+        loaded = sum(1 for status in self.status.values() if status["state"] == "loaded")
+        if not self.ready.is_set():
+            return f"🔥 Warming up: {loaded}/{len(self.status)} hot collection(s) loaded"
+        failed = [name for name, status in self.status.items() if status["state"] == "failed"]
+        return f"✅ Ready: {loaded}/{len(self.status)} hot collection(s) loaded in {self.seconds:.1f}s" \
+            + (f" ({', '.join(failed)} failed)" if failed else "")
+
+
+_preloaders: Dict[str, CollectionPreloader] = {}
+_preloaders_lock = threading.Lock()
+
+
+def start_preloader(persist_directory: str, names: List[str], ready_file: Optional[str] = None,
+                    openai_api_key: Optional[str] = None) -> CollectionPreloader:
+    """
+    Process-wide preloader for a vectorstore root (started once per directory).
+
+    With no hot collections it is ready right away, so the readiness file still appears.
+    """
+    key = os.path.abspath(persist_directory)
+    with _preloaders_lock:
+        preloader = _preloaders.get(key)
+        if preloader is None:
+            preloader = CollectionPreloader(persist_directory, names, ready_file, openai_api_key)
+            _preloaders[key] = preloader
+            if names:
+                print(f"🔥 Preloading {len(names)} hot collection(s) from {persist_directory}")
+        return preloader
+
+
+def get_preloader(persist_directory: str) -> Optional[CollectionPreloader]:
+    with _preloaders_lock:
+        return _preloaders.get(os.path.abspath(persist_directory))
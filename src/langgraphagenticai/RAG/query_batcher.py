@@ -0,0 +1,189 @@
+import time
+import queue
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.langgraphagenticai.RAG.vector_compression import search_vectorstore_batch
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for a few milliseconds and serves them with one call.
+
+    Callers ``submit`` an item and block on the returned future. Worker threads take
+    the first waiting item, gather whatever else arrives within ``max_wait_ms`` (up
+    to ``max_batch_size`` items), run ``batch_fn`` on the whole batch and fan the
+    results back out in order. While a batch is running, new requests queue up and
+    form the next batch, so batches grow with load instead of with the wait time.
+    """
+
+    def __init__(self, batch_fn: Callable[[List], List], max_batch_size: int = 64,
+                 max_wait_ms: float = 5.0, workers: int = 1, name: str = "batcher"):
+        """
+        Args:
+            batch_fn: Maps a list of items to a list of results of the same length
+            max_batch_size: Largest batch handed to batch_fn
+            max_wait_ms: How long the first item of a batch waits for company
+            workers: Batches that may run concurrently
+            name: Thread name prefix
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "items": 0, "largest_batch": 0}
+        self.workers = max(1, workers)
+        for i in range(self.workers):
+            threading.Thread(target=self._run, name=f"{name}-{i}", daemon=True).start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """
+        Stop the worker threads once the requests already queued are served.
+        """
+        for _ in range(self.workers):
+            self._queue.put((_STOP, None))
+
+    def _collect(self) -> Optional[List]:
+        first = self._queue.get()
+        if first[0] is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Take anything already queued without waiting, then wait until the deadline
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry[0] is _STOP:
+                # Serve this batch, then let the next _collect see the stop marker
+                self._queue.put(entry)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["items"] += len(batch)
+                self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+
+_embedding_batchers: Dict[str, MicroBatcher] = {}
+_search_batchers: "OrderedDict[tuple, MicroBatcher]" = OrderedDict()
+# Reentrant: a store's finalizer can run from garbage collection while this thread holds the lock
+_batchers_lock = threading.RLock()
+# Search batchers are per store object and only hold it weakly; the bound caps idle dispatcher threads
+_MAX_SEARCH_BATCHERS = 64
+
+
+def get_embedding_batcher(backend, max_batch_size: int = 64, max_wait_ms: float = 5.0, workers: int = 2) -> MicroBatcher:
+    """
+    Process-wide query-embedding batcher for an embedding backend and credential.
+
+    Sessions create their own backend objects, so batchers are keyed by the
+    backend's ``batch_key``; queries from every session using the same model and
+    key are embedded together in one ``embed_documents`` call.
+    """
+    key = backend.batch_key
+    with _batchers_lock:
+        batcher = _embedding_batchers.get(key)
+        if batcher is None:
+            def embed_batch(items):
+                # All items share the batch key, so any of their backends can serve the batch
+                return items[0][0].embed_documents([text for _, text in items])
+
+            batcher = MicroBatcher(embed_batch, max_batch_size, max_wait_ms, workers, name="embed-batch")
+            _embedding_batchers[key] = batcher
+        return batcher
+
+
+def embed_query_batched(backend, text: str, **settings) -> List[float]:
+    """
+    Embed one query through the shared batcher (blocks until its batch completes).
+    """
+    return get_embedding_batcher(backend, **settings).submit((backend, text)).result()
+
+
+def get_search_batcher(vectorstore, rescore_factor: int = 1, max_batch_size: int = 64,
+                       max_wait_ms: float = 5.0) -> MicroBatcher:
+    """
+    Process-wide search batcher for one vectorstore object.
+
+    Concurrent searches of the same store run as a single matrix ``index.search``
+    (plus per-row re-scoring) and each caller gets its own top-k back.
+    """
+    key = (id(vectorstore), rescore_factor)
+    with _batchers_lock:
+        batcher = _search_batchers.get(key)
+        if batcher is not None:
+            _search_batchers.move_to_end(key)
+            return batcher
+
+        # The batcher and its thread must not keep an evicted store (and its index) alive
+        store_ref = weakref.ref(vectorstore)
+
+        def search_batch(items):
+            store = store_ref()
+            if store is None:
+                raise RuntimeError("Vectorstore was released before its searches ran")
+            vectors = np.asarray([vector for vector, _ in items], dtype=np.float32)
+            max_k = max(k for _, k in items)
+            results = search_vectorstore_batch(store, vectors, max_k, rescore_factor=rescore_factor)
+            return [hits[:k] for hits, (_, k) in zip(results, items)]
+
+        batcher = MicroBatcher(search_batch, max_batch_size, max_wait_ms, workers=1, name="search-batch")
+        _search_batchers[key] = batcher
+        # Dropped when the store is collected, before its id can be reused by another object
+        weakref.finalize(vectorstore, _release_search_batcher, key, batcher)
+        while len(_search_batchers) > _MAX_SEARCH_BATCHERS:
+            _search_batchers.popitem(last=False)[1].close()
+        return batcher
+
+
+def _release_search_batcher(key: tuple, batcher: MicroBatcher):
+    with _batchers_lock:
+        if _search_batchers.get(key) is not batcher:
+            # Already evicted (and closed) by the size bound
+            return
+        del _search_batchers[key]
+    batcher.close()
+
+
+def batching_stats() -> Dict:
+    """
+    Batch counts and sizes of every live batcher (for logs and benchmarks).
+    """
+    with _batchers_lock:
+        return {
+            "embedding": {key: dict(b.stats) for key, b in _embedding_batchers.items()},
+            "search": [dict(b.stats) for b in list(_search_batchers.values())],
+        }
@@ -0,0 +1,275 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import HumanMessage
+
+# Interchangeable terms in filings; the first entry is what other terms are swapped to
+FINANCE_SYNONYMS = [
+    ("net sales", "revenue", "total revenue", "sales", "top line"),
+    ("net income", "net earnings", "profit", "bottom line"),
+    ("operating income", "operating profit", "income from operations", "ebit"),
+    ("earnings per share", "eps", "diluted eps"),
+    ("capital expenditures", "capex", "purchases of property and equipment"),
+    ("free cash flow", "fcf"),
+    ("net cash provided by operating activities", "operating cash flow", "cash from operations"),
+    ("outlook", "guidance", "forecast"),
+    ("gross margin", "gross profit margin"),
+    ("year-over-year", "yoy", "compared with the prior year"),
+    ("employees", "headcount", "workforce"),
+]
+_ORDINALS = {"1": "first", "2": "second", "3": "third", "4": "fourth"}
+_FISCAL_SHORT_PATTERN = re.compile(r"\bFY\s?'?(\d{2}|\d{4})\b", re.IGNORECASE)
+_FISCAL_LONG_PATTERN = re.compile(r"\bfiscal(?: year)? (\d{4})\b", re.IGNORECASE)
+_QUARTER_SHORT_PATTERN = re.compile(r"\bQ([1-4])\b", re.IGNORECASE)
+_QUARTER_LONG_PATTERN = re.compile(r"\b(first|second|third|fourth) quarter\b", re.IGNORECASE)
+
+_PARAPHRASE_PROMPT = """Rewrite the question below in {count} different ways for searching financial filings.
+Use the wording a 10-K, 10-Q or earnings release would use. One rewrite per line, no numbering, no commentary.
+
+Question: {query}"""
+_HYDE_PROMPT = """Write a short passage (2-3 sentences) as it might appear in a company's earnings release or
+filing that answers the question below. Invent plausible figures if needed; do not add commentary.
+
+Question: {query}"""
+
+# LLM calls and the retrieval of their variants have pools of their own: an LLM call
+# abandoned at the deadline finishes in the background without delaying retrieval.
+# The raw query is searched in the calling thread and never waits behind either.
+_retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="query-expansion-retrieval")
+_llm_pool: Optional[ThreadPoolExecutor] = None
+_llm_slots: Optional[threading.BoundedSemaphore] = None
+_llm_pool_lock = threading.Lock()
+
+
+def _get_llm_pool(workers: int) -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    """
+    Process-wide pool for paraphrase/HyDE calls (sized by the first expander) and its free slots.
+    """
+    global _llm_pool, _llm_slots
+    with _llm_pool_lock:
+        if _llm_pool is None:
+            _llm_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-expansion-llm")
+            _llm_slots = threading.BoundedSemaphore(workers)
+        return _llm_pool, _llm_slots
+
+
+def _term_pattern(term: str) -> re.Pattern:
+    return re.compile(r"(?<![\w-])" + re.escape(term) + r"(?![\w-])", re.IGNORECASE)
+
+
+def _normalize_periods(query: str) -> str:
+    """
+    Swap fiscal period notations: FY24 <-> fiscal 2024, Q3 <-> third quarter.
+    """
+    def fiscal_long(match):
+        year = match.group(1)
+        return f"fiscal {'20' + year if len(year) == 2 else year}"
+
+    swapped = _FISCAL_SHORT_PATTERN.sub(fiscal_long, query)
+    if swapped == query:
+        swapped = _FISCAL_LONG_PATTERN.sub(lambda m: f"FY{m.group(1)[-2:]}", query)
+    quarters = _QUARTER_SHORT_PATTERN.sub(lambda m: f"{_ORDINALS[m.group(1)]} quarter", swapped)
+    if quarters == swapped:
+        by_name = {name: number for number, name in _ORDINALS.items()}
+        quarters = _QUARTER_LONG_PATTERN.sub(lambda m: f"Q{by_name[m.group(1).lower()]}", swapped)
+    return quarters
+
+
+def synonym_variants(query: str, max_variants: int = 2) -> List[str]:
+    """
+    Rewrite a query with finance synonyms and alternative period notation.
+
+    The first variant swaps each recognised term for its alternative ("revenue" ->
+    "net sales", "FY24" -> "fiscal 2024"); the second appends every alternative
+    term to the original query.
+
+    Args:
+        query: User question
+        max_variants: Most variants to return
+
+    Returns:
+        Variants that differ from the query (possibly none)
+    """
+    swapped = query
+    extra_terms = []
+    for group in FINANCE_SYNONYMS:
+        # Longest terms first so "total revenue" wins over "revenue"
+        for term in sorted(group, key=len, reverse=True):
+            pattern = _term_pattern(term)
+            if pattern.search(swapped):
+                alternatives = [t for t in group if t != term]
+                swapped = pattern.sub(alternatives[0], swapped)
+                extra_terms.extend(alternatives)
+                break
+    swapped = _normalize_periods(swapped)
+    normalized = _normalize_periods(query)
+    if normalized != query:
+        extra_terms.append(normalized)
+
+    variants = []
+    if swapped.lower() != query.lower():
+        variants.append(swapped)
+    if extra_terms:
+        variants.append(f"{query} ({'; '.join(extra_terms)})")
+    return variants[:max_variants]
+
+
+def reciprocal_rank_fusion(ranked_lists: List[List], rrf_k: int = 60) -> List[Tuple]:
+    """
+    Fuse ranked (document, score) lists; a document's score is sum(1 / (rrf_k + rank)).
+
+    Returns:
+        (document, fused score) pairs, best first (documents keyed by their text)
+    """
+    fused = {}
+    for hits in ranked_lists:
+        for rank, (doc, _) in enumerate(hits, start=1):
+            key = doc.page_content.strip()
+            entry = fused.setdefault(key, [doc, 0.0])
+            entry[1] += 1.0 / (rrf_k + rank)
+    return sorted(((doc, score) for doc, score in fused.values()), key=lambda pair: pair[1], reverse=True)
+
+
+class QueryExpander:
+    """
+    Retrieve with several phrasings of a question and fuse the results.
+
+    Variants are the raw query, finance-synonym rewrites, LLM paraphrases and
+    optionally a HyDE-style hypothetical answer. The LLM calls and the first
+    retrieval run concurrently; anything still running when the latency budget
+    is spent is dropped and the stage returns with what it has. The raw query is
+    always searched, whatever the budget, so its hits always take part in the fusion.
+    LLM calls only start when the LLM pool has a free worker; while earlier
+    stragglers occupy it, the LLM variants are dropped instead of queued.
+    """
+
+    def __init__(self, rag_module, llm=None, paraphrases: int = 2, synonyms: bool = True,
+                 hyde: bool = False, budget_ms: float = 1500, rrf_k: int = 60, llm_workers: int = 4):
+        """
+        Args:
+            rag_module: RAGModule to retrieve from (uses retrieve_documents_batch)
+            llm: Language model for paraphrases and HyDE (None disables both)
+            paraphrases: Number of LLM paraphrases (0 disables)
+            synonyms: Add finance-synonym rewrites
+            hyde: Add a hypothetical answer passage as a query
+            budget_ms: Latency budget for the whole stage
+            rrf_k: Reciprocal rank fusion constant
+            llm_workers: Size of the process-wide LLM pool (concurrent paraphrase/HyDE calls)
+        """
+        self.rag_module = rag_module
+        self.llm = llm
+        self.paraphrases = paraphrases
+        self.synonyms = synonyms
+        self.hyde = hyde
+        self.budget = budget_ms / 1000
+        self.rrf_k = rrf_k
+        self.llm_workers = max(1, llm_workers)
+
+    def _paraphrase(self, query: str) -> List[str]:
+        response = self.llm.invoke([HumanMessage(content=_PARAPHRASE_PROMPT.format(count=self.paraphrases, query=query))])
+        lines = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip() for line in str(response.content).splitlines()]
+        return [line for line in lines if line and line.lower() != query.lower()][:self.paraphrases]
+
+    def _hypothetical_answer(self, query: str) -> List[str]:
+        response = self.llm.invoke([HumanMessage(content=_HYDE_PROMPT.format(query=query))])
+        text = str(response.content).strip()
+        return [text] if text else []
+
+    def retrieve(self, query: str, k: int = 5, filters: Optional[Dict] = None,
+                 with_scores: bool = False) -> Tuple[List, Dict]:
+        """
+        Retrieve documents for a query and its variants, fused with reciprocal rank fusion.
+
+        Args:
+            query: User question
+            k: Number of documents to return
+            filters: Metadata filters applied to every variant
+            with_scores: Return (document, fused RRF score) pairs instead of documents
+
+        Returns:
+            (documents, report) where report lists the variants used, the ones dropped
+            by the budget, the documents expansion added to the raw query's top-k and
+            that gain per millisecond of stage time
+        """
+        start_time = time.perf_counter()
+        deadline = start_time + self.budget
+
+        dropped = []
+        llm_tasks = {}
+        kinds = []
+        if self.llm is not None and self.paraphrases > 0:
+            kinds.append(("paraphrase", self._paraphrase))
+        if self.llm is not None and self.hyde:
+            kinds.append(("hyde", self._hypothetical_answer))
+        if kinds:
+            llm_pool, slots = _get_llm_pool(self.llm_workers)
+            for kind, generate in kinds:
+                if not slots.acquire(blocking=False):
+                    dropped.append(kind)
+                    continue
+                future = llm_pool.submit(generate, query)
+                future.add_done_callback(lambda _: slots.release())
+                llm_tasks[kind] = future
+
+        # The raw query and the rule-based rewrites need no LLM; retrieve them right away, in this thread.
+        # The raw query's results are required, so this is not bounded by the budget
+        variants = [("original", query)]
+        if self.synonyms:
+            variants += [("synonym", v) for v in synonym_variants(query)]
+        ranked = list(zip(variants, self.rag_module.retrieve_documents_batch([v for _, v in variants], k, filters)))
+
+        llm_variants = []
+        if llm_tasks:
+            done, pending = wait(llm_tasks.values(), timeout=max(0.0, deadline - time.perf_counter()))
+            for kind, future in llm_tasks.items():
+                if future in pending:
+                    future.cancel()
+                    dropped.append(kind)
+                    continue
+                try:
+                    llm_variants += [(kind, v) for v in future.result()]
+                except Exception as e:
+                    print(f"⚠️ Warning: Query expansion ({kind}) failed: {str(e)}")
+
+        if llm_variants:
+            remaining = deadline - time.perf_counter()
+            second_batch = _retrieval_pool.submit(self.rag_module.retrieve_documents_batch, [v for _, v in llm_variants], k, filters)
+            try:
+                ranked += list(zip(llm_variants, second_batch.result(timeout=max(0.0, remaining))))
+            except FutureTimeoutError:
+                second_batch.cancel()
+                dropped += sorted({kind for kind, _ in llm_variants})
+            except Exception as e:
+                print(f"⚠️ Warning: Retrieval for expanded queries failed: {str(e)}")
+
+        fused = reciprocal_rank_fusion([hits for _, hits in ranked], self.rrf_k)[:k]
+        documents = [doc for doc, _ in fused]
+
+        # Gain: documents in the fused top-k the raw query alone did not return
+        baseline = {doc.page_content.strip() for doc, _ in ranked[0][1]}
+        added = [doc for doc in documents if doc.page_content.strip() not in baseline]
+        contributed = {}
+        for doc in added:
+            text = doc.page_content.strip()
+            kinds = {kind for (kind, _), hits in ranked[1:] if any(hit.page_content.strip() == text for hit, _ in hits)}
+            for kind in kinds:
+                contributed[kind] = contributed.get(kind, 0) + 1
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        used = {}
+        for (kind, _), _hits in ranked[1:]:
+            used[kind] = used.get(kind, 0) + 1
+        report = {
+            "variants": used,
+            "dropped": dropped,
+            "added_documents": len(added),
+            "added_by": contributed,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "added_per_ms": round(len(added) / elapsed_ms, 5) if elapsed_ms else 0.0,
+        }
+        print(f"🧩 Query expansion: {sum(used.values())} variant(s) {used}, "
+              f"+{len(added)} document(s) in {elapsed_ms:.0f} ms"
+              + (f", dropped {', '.join(dropped)} (over budget or LLM pool busy)" if dropped else ""))
+        return (fused if with_scores else documents), report
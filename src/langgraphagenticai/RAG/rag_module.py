@@ -1,37 +1,159 @@
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
-from typing import List, Optional
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from typing import Dict, List, Optional
 import os
 import tempfile
+import time
 import hashlib
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
+import numpy as np
+from src.langgraphagenticai.RAG.snapshot_store import SnapshotStore
+from src.langgraphagenticai.RAG.catalog import VectorstoreCatalog
+from src.langgraphagenticai.RAG.chunker import FinancialDocumentChunker
+from src.langgraphagenticai.RAG.dedup import NearDuplicateFilter
+from src.langgraphagenticai.RAG.extraction import ExtractionCache, content_hash, get_extraction_backend
+from src.langgraphagenticai.RAG.embedding_backends import EmbeddingBackend, LEGACY_BACKEND_ID, get_embedding_backend
+from src.langgraphagenticai.RAG.dimension_reduction import (
+    DimensionReducer, attach_reducer, default_reduction_method, supports_truncation
+)
+from src.langgraphagenticai.RAG.query_batcher import embed_query_batched, get_search_batcher
+from src.langgraphagenticai.RAG.metadata_filters import annotate_filing_metadata, describe_filters, get_metadata_index
+from src.langgraphagenticai.RAG.portable_snapshot import PORTABLE_FILE, is_portable_snapshot, read_portable, write_portable
+from src.langgraphagenticai.RAG.segment_store import (
+    SEGMENTS_FILE, SegmentStore, SegmentVectors, collect_garbage, is_segment_snapshot, read_segment_manifest,
+    start_collector, texts_digest, touch_last_used, write_segment_manifest
+)
+from src.langgraphagenticai.RAG.sharded_store import (
+    SHARDS_FILE, ShardedVectorStore, is_sharded_snapshot, read_snapshot_vectors, write_shard, write_shards
+)
+from src.langgraphagenticai.RAG.vector_compression import (
+    attach_full_vectors, compression_report, create_index, format_compression_report,
+    get_full_vectors, index_storage_mode, load_full_vectors, save_full_vectors, search_vectorstore,
+    search_vectorstore_batch
+)
+from src.langgraphagenticai.ui.uiconfigfile import Config
+from src.langgraphagenticai.state.payloads import chunk_id
+from src.langgraphagenticai.utils.profiler import profile_stage
+
+# Loaded snapshots shared by every session in the process. Published snapshot
+# versions are immutable, so a loaded version can be reused until it is evicted.
+_loaded_stores = OrderedDict()
+_loaded_stores_lock = threading.Lock()
+
+
+def _loaded_store_paths() -> List[str]:
+    """
+    Store directories with a snapshot loaded in this process (never evicted by the disk GC).
+    """
+    with _loaded_stores_lock:
+        snapshot_paths = [key[0] for key in _loaded_stores]
+    return [os.path.dirname(os.path.dirname(path)) if os.path.basename(os.path.dirname(path)) == "versions" else path
+            for path in snapshot_paths]
+
 
 class RAGModule:
     """
     RAG Module for document processing, embedding generation, and vector store management.
     """
     
-    def __init__(self, openai_api_key: str, persist_directory: str = "./vectorstore_db"):
+    def __init__(self, openai_api_key: str, persist_directory: Optional[str] = None,
+                 embedding_backend: Optional[EmbeddingBackend] = None, storage_mode: Optional[str] = None):
         """
         Initialize RAG Module with OpenAI API key.
         
         Args:
-            openai_api_key: OpenAI API key for embeddings
-            persist_directory: Directory to persist FAISS vectorstore (default: ./vectorstore_db)
+            openai_api_key: OpenAI API key for embeddings (only needed by the "openai" backend)
+            persist_directory: Directory to persist FAISS vectorstore (default: VECTORSTORE_DIR, ./vectorstore_db)
+            embedding_backend: Embedding backend (default: the one selected in uiconfigfile.ini)
+            storage_mode: Vector storage mode - flat, fp16, int8 or pq (default: from uiconfigfile.ini)
         """
         self.openai_api_key = openai_api_key
-        self.embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+        config = Config()
+        persist_directory = persist_directory or config.get_vectorstore_dir()
+        if embedding_backend is None:
+            embedding_backend = get_embedding_backend(
+                config.get_embedding_backend(),
+                openai_api_key=openai_api_key,
+                settings=config.get_embedding_settings(),
+            )
+        self.embeddings = embedding_backend
+        print(f"🧠 Embedding backend: {self.embeddings.backend_id}")
+        # Compressed vector storage; full-precision vectors are kept on disk for exact re-scoring
+        storage_settings = config.get_vector_storage_settings()
+        self.storage_mode = storage_mode or storage_settings["mode"]
+        self.rescore_enabled = storage_settings["rescore"]
+        self.rescore_factor = storage_settings["rescore_factor"]
+        self.pq_subvectors = storage_settings["pq_subvectors"]
+        # Plain snapshots are saved as FAISS + pickle, or as raw vectors and a chunk table ("portable")
+        self.snapshot_format = storage_settings["snapshot_format"]
+        # Optional reduced-dimension first-stage index (full vectors re-rank the candidates)
+        reduction_settings = config.get_dimension_reduction_settings()
+        self.reducer = None
+        if reduction_settings["index_dimension"]:
+            method = reduction_settings["method"]
+            if method == "auto":
+                method = default_reduction_method(self.embeddings.backend_id)
+            elif method == "truncate" and not supports_truncation(self.embeddings.backend_id):
+                print(f"⚠️ Warning: DIMENSION_REDUCTION = truncate with {self.embeddings.backend_id}, which is not "
+                      f"trained for truncation; first-stage recall will suffer (use auto or project)")
+            self.reducer = DimensionReducer(
+                self.embeddings.dimension,
+                reduction_settings["index_dimension"],
+                method=method,
+                seed=reduction_settings["seed"],
+            )
+        chunking_settings = config.get_chunking_settings()
+        self.chunker_name = chunking_settings["chunker"]
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
+            chunk_size=chunking_settings["chunk_size"],
+            chunk_overlap=chunking_settings["chunk_overlap"]
+        )
+        self.chunker = FinancialDocumentChunker(
+            chunk_tokens=chunking_settings["chunk_tokens"],
+            min_chunk_tokens=chunking_settings["min_chunk_tokens"],
+            max_workers=chunking_settings["workers"] or None,
+        )
+        # Text extraction backend and cache of extracted pages keyed by file content
+        extraction_settings = config.get_extraction_settings()
+        self.pdf_backend = extraction_settings["pdf_backend"]
+        self.extraction_cache = ExtractionCache(
+            extraction_settings["cache_dir"] or os.path.join(persist_directory, "extracted_text")
         )
+        self.extraction_stats = {}
+        # Near-duplicate chunk elimination between splitting and embedding
+        dedup_settings = config.get_dedup_settings()
+        self.dedup_filter = None
+        if dedup_settings["enabled"]:
+            self.dedup_filter = NearDuplicateFilter(
+                threshold=dedup_settings["threshold"],
+                num_perm=dedup_settings["num_perm"],
+                shingle_size=dedup_settings["shingle_size"],
+            )
+        # Cross-session micro-batching of query embeddings and index searches
+        self.batching_settings = config.get_query_batching_settings()
+        # Collections saved with more than one shard are searched by shard worker processes
+        self.sharding_settings = config.get_sharding_settings()
         self.vectorstore = None
+        # Snapshot directory written by the last create_vectorstore (None if it was not saved)
+        self.published_snapshot = None
         self.persist_directory = persist_directory
         # Create persist directory if it doesn't exist
         os.makedirs(self.persist_directory, exist_ok=True)
+        # Catalog of named collections and the ones loaded so far (loaded lazily on first search)
+        self.catalog = VectorstoreCatalog(os.path.join(self.persist_directory, "catalog.sqlite3"))
+        self.collections = {}
+        # Per-document vector segments shared by collections, and the disk-budget collector
+        self.segment_settings = config.get_segment_settings()
+        self.segments = SegmentStore(self.persist_directory) if self.segment_settings["enabled"] else None
+        if self.segment_settings["disk_budget_mb"] > 0 and self.segment_settings["gc_interval"] > 0:
+            start_collector(self.persist_directory, int(self.segment_settings["disk_budget_mb"] * 1e6),
+                            self.segment_settings["gc_interval"], self.segment_settings["gc_min_idle"],
+                            _loaded_store_paths, self.extraction_cache.cache_dir)
     
     def load_documents(self, uploaded_files: List) -> List:
         """
@@ -52,27 +174,50 @@ class RAGModule:
             file_extension = uploaded_file.name.split('.')[-1].lower()
             print(f"  📄 File {idx}/{len(uploaded_files)}: {uploaded_file.name} ({file_extension.upper()})")
             
+            backend = get_extraction_backend(file_extension, self.pdf_backend)
+            file_bytes = uploaded_file.getvalue()
+            file_hash = content_hash(file_bytes)
+            
+            # Reuse previously extracted text for identical file content
+            cached_docs = self.extraction_cache.get(file_hash, backend.name)
+            if cached_docs is not None:
+                for doc in cached_docs:
+                    doc.metadata["source"] = uploaded_file.name
+                annotate_filing_metadata(cached_docs, uploaded_file.name)
+                print(f"    ⚡ Extraction cache hit ({backend.name}): {len(cached_docs)} page(s), parsing skipped")
+                documents.extend(cached_docs)
+                continue
+            
             # Save uploaded file to temporary location
             with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{file_extension}') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
+                tmp_file.write(file_bytes)
                 tmp_path = tmp_file.name
                 print(f"    💾 Saved to temp file: {tmp_path}")
             
             try:
-                # Load document based on file type
-                if file_extension == 'pdf':
-                    print(f"    📖 Loading PDF...")
-                    loader = PyPDFLoader(tmp_path)
-                elif file_extension == 'txt':
-                    print(f"    📖 Loading text file...")
-                    loader = TextLoader(tmp_path)
-                else:
-                    raise ValueError(f"Unsupported file type: {file_extension}")
-                
-                # Load and add documents
-                print(f"    🔄 Calling loader.load()...")
-                loaded_docs = loader.load()
+                # Load document with the configured backend for its file type
+                print(f"    📖 Extracting text with {backend.name}...")
+                extract_start = time.perf_counter()
+                loaded_docs = backend.extract(tmp_path)
+                extract_seconds = time.perf_counter() - extract_start
+                pages_per_second = len(loaded_docs) / extract_seconds if extract_seconds > 0 else 0.0
                 print(f"    ✅ Loaded {len(loaded_docs)} page(s)/section(s) from {uploaded_file.name}")
+                print(f"    ⏱️ {backend.name}: {extract_seconds:.2f}s ({pages_per_second:.1f} pages/s)")
+                
+                # Record the upload name and content hash instead of the temp path
+                for doc in loaded_docs:
+                    doc.metadata["source"] = uploaded_file.name
+                    doc.metadata["file_hash"] = file_hash
+                
+                stats = self.extraction_stats.setdefault(backend.name, {"files": 0, "pages": 0, "seconds": 0.0})
+                stats["files"] += 1
+                stats["pages"] += len(loaded_docs)
+                stats["seconds"] += extract_seconds
+                self.extraction_cache.put(file_hash, backend.name, loaded_docs, stats={
+                    "pages": len(loaded_docs),
+                    "seconds": round(extract_seconds, 4),
+                    "pages_per_second": round(pages_per_second, 2),
+                })
                 
                 # Check if documents have content
                 if len(loaded_docs) > 0:
@@ -102,6 +247,10 @@ class RAGModule:
                     print(f"    ❌ ERROR: No documents loaded from {uploaded_file.name}!")
                     print(f"    PDF might be empty or unreadable")
                 
+                # Filterable filing metadata (doc type, fiscal period, ticker) inherited by every chunk
+                filing = annotate_filing_metadata(loaded_docs, uploaded_file.name)
+                if filing:
+                    print(f"    🏷️ Filing metadata: {filing}")
                 documents.extend(loaded_docs)
                 
             except Exception as e:
@@ -114,6 +263,9 @@ class RAGModule:
                     print(f"    🗑️ Cleaned up temp file")
         
         print(f"✅ Total documents loaded: {len(documents)}")
+        for backend_name, stats in self.extraction_stats.items():
+            if stats["seconds"] > 0:
+                print(f"⏱️ {backend_name}: {stats['pages']} page(s) from {stats['files']} file(s) at {stats['pages'] / stats['seconds']:.1f} pages/s")
         
         # Final check: ensure we have documents with content
         if len(documents) == 0:
@@ -152,22 +304,40 @@ class RAGModule:
             List of document chunks
         """
         print(f"✂️ Splitting {len(documents)} documents into chunks...")
+        
+        if self.chunker_name == "structured":
+            print(f"   Structured chunker: {self.chunker.chunk_tokens} tokens/chunk, no overlap")
+            chunks = self.chunker.split_documents(documents)
+            stats = self.chunker.last_stats
+            print(f"✅ Created {stats['chunks']} chunks from {stats['pages']} pages in {stats['seconds']}s ({stats['mode']})")
+            print(f"📊 {stats['total_tokens']} tokens, avg {stats['avg_tokens']} tokens/chunk, {stats['table_chunks']} chunk(s) with tables")
+            if stats['empty_pages'] > 0:
+                print(f"⚠️ WARNING: {stats['empty_pages']} pages are empty!")
+            if chunks:
+                print(f"📄 Sample chunk: {chunks[0].page_content[:200]}...")
+            return chunks
+        
         print(f"   Chunk size: {self.text_splitter._chunk_size}, Overlap: {self.text_splitter._chunk_overlap}")
         
         chunks = self.text_splitter.split_documents(documents)
         print(f"✅ Created {len(chunks)} chunks")
         
+        # Gather stats in a single pass over the chunks
+        total_chunk_chars = 0
+        non_empty_chunks = []
+        for chunk in chunks:
+            if chunk.page_content:
+                total_chunk_chars += len(chunk.page_content)
+                if chunk.page_content.strip():
+                    non_empty_chunks.append(chunk)
+        empty_chunks = len(chunks) - len(non_empty_chunks)
+        
         if len(chunks) > 0:
-            # Check chunk content
-            total_chunk_chars = sum(len(chunk.page_content) if chunk.page_content else 0 for chunk in chunks)
-            empty_chunks = sum(1 for chunk in chunks if not chunk.page_content or len(chunk.page_content.strip()) == 0)
-            
             print(f"📊 Total characters in chunks: {total_chunk_chars}")
             if empty_chunks > 0:
                 print(f"⚠️ WARNING: {empty_chunks} chunks are empty!")
             
             # Show sample chunks
-            non_empty_chunks = [chunk for chunk in chunks if chunk.page_content and len(chunk.page_content.strip()) > 0]
             if len(non_empty_chunks) > 0:
                 print(f"✅ {len(non_empty_chunks)} chunks have content")
                 sample = non_empty_chunks[0].page_content[:200]
@@ -177,6 +347,163 @@ class RAGModule:
         
         return chunks
     
+    def deduplicate_chunks(self, chunks: List) -> List:
+        """
+        Collapse near-duplicate chunks (repeated disclaimers, headers, footers) into one.
+        
+        Args:
+            chunks: List of document chunks
+            
+        Returns:
+            Chunks with near-duplicates removed; kept chunks list every page they occur on
+        """
+        if self.dedup_filter is None or not chunks:
+            return chunks
+        print(f"🧹 Removing near-duplicate chunks (similarity >= {self.dedup_filter.threshold})...")
+        if self.segments is None:
+            kept = self.dedup_filter.deduplicate(chunks)
+            stats = self.dedup_filter.last_stats
+        else:
+            # Within each document only, so a document's segment is the same whatever it is uploaded with
+            kept, stats = [], {"input_chunks": 0, "kept_chunks": 0, "removed_chunks": 0, "removed_chars": 0, "seconds": 0.0}
+            for document_chunks in self._group_by_document(chunks).values():
+                kept.extend(self.dedup_filter.deduplicate(document_chunks))
+                for key in stats:
+                    stats[key] += self.dedup_filter.last_stats[key]
+            stats["seconds"] = round(stats["seconds"], 3)
+        print(f"✅ Kept {stats['kept_chunks']} of {stats['input_chunks']} chunks "
+              f"({stats['removed_chunks']} duplicates, {stats['removed_chars']} chars not embedded) in {stats['seconds']}s")
+        return kept
+    
+    @staticmethod
+    def _group_by_document(chunks: List) -> "OrderedDict":
+        """
+        Chunks grouped by source document content hash (first-appearance order).
+        """
+        groups = OrderedDict()
+        for chunk in chunks:
+            groups.setdefault(chunk.metadata.get("file_hash"), []).append(chunk)
+        return groups
+    
+    def _embed_with_segments(self, chunks: List):
+        """
+        Embed chunks document by document, reusing stored segments.
+        
+        Documents whose segment exists (same content, embedding backend, chunking and
+        dedup settings, same chunk texts) are not embedded again; the others are
+        embedded in one call and written as new segments.
+        
+        Returns:
+            (texts, metadatas, vectors, manifest entries), grouped by document
+        """
+        groups = self._group_by_document(chunks)
+        signature = self.get_segment_signature()
+        plan, missing_texts = [], []
+        for file_hash, document_chunks in groups.items():
+            texts = [chunk.page_content for chunk in document_chunks]
+            key = SegmentStore.segment_key(file_hash, signature)
+            info = self.segments.info(key)
+            reuse = info is not None and info.get("num_chunks") == len(texts) and info.get("texts_digest") == texts_digest(texts)
+            if reuse:
+                # A fresh last-used time keeps the collector (which only evicts idle segments) off it while we embed
+                touch_last_used(self.segments.path(key))
+            plan.append((key, document_chunks, texts, reuse))
+            if not reuse:
+                missing_texts.extend(texts)
+        
+        new_vectors = np.asarray(self.embeddings.embed_documents(missing_texts), dtype=np.float32) if missing_texts else None
+        all_texts, all_metadatas, parts, entries = [], [], [], []
+        offset = 0
+        embedded = len(missing_texts)
+        with self.segments.lock():
+            for position, (key, document_chunks, texts, reuse) in enumerate(plan):
+                metadatas = [chunk.metadata for chunk in document_chunks]
+                if reuse and not self.segments.exists(key):
+                    # Evicted by a collection that was already past its idle check; rare, so embed it here
+                    print(f"⚠️ Segment of {metadatas[0].get('source')} was evicted during the upload; embedding it again")
+                    vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+                    embedded += len(texts)
+                    reuse = False
+                    plan[position] = (key, document_chunks, texts, False)
+                elif reuse:
+                    vectors = np.asarray(self.segments.read_vectors(key), dtype=np.float32)
+                else:
+                    vectors = new_vectors[offset:offset + len(texts)]
+                    offset += len(texts)
+                if not reuse:
+                    self.segments.write(key, texts, metadatas, vectors, info={
+                        "file_name": metadatas[0].get("source"),
+                        "file_hash": metadatas[0].get("file_hash"),
+                        **self.embeddings.describe(),
+                    })
+                all_texts.extend(texts)
+                all_metadatas.extend(metadatas)
+                parts.append(vectors)
+                entries.append({"key": key, "file_name": metadatas[0].get("source"), "num_chunks": len(texts)})
+        reused = [entry for entry, (_, _, _, reuse) in zip(entries, plan) if reuse]
+        print(f"🧩 Segments: reused {len(reused)} of {len(entries)} document(s) "
+              f"({sum(e['num_chunks'] for e in reused)} chunks not re-embedded), embedded {embedded} chunks")
+        return all_texts, all_metadatas, np.concatenate(parts), entries
+    
+    def _read_segment_snapshot(self, snapshot_path: str, store_path: str):
+        """
+        Texts, metadata and full vectors of a snapshot composed of segments.
+        
+        Segments live next to the store directory (``<persist_directory>/segments``);
+        each chunk's source is the file name the collection was uploaded with.
+        """
+        segments = SegmentStore(os.path.dirname(os.path.abspath(store_path)))
+        texts, metadatas, parts = [], [], []
+        for entry in read_segment_manifest(snapshot_path):
+            if not segments.exists(entry["key"]):
+                raise FileNotFoundError(f"Segment {entry['key']} ({entry.get('file_name')}) is missing")
+            segment_texts, segment_metadatas, vectors = segments.read(entry["key"])
+            for metadata in segment_metadatas:
+                metadata["source"] = entry.get("file_name") or metadata.get("source")
+            texts.extend(segment_texts)
+            metadatas.extend(segment_metadatas)
+            parts.append(vectors)
+        return texts, metadatas, SegmentVectors(parts)
+    
+    def _compose_from_segments(self, snapshot_path: str, store_path: str, metadata: dict):
+        """
+        Build the in-process FAISS store of a segment-composed snapshot.
+        
+        The index uses the storage mode and dimension reduction recorded in the
+        snapshot metadata; full vectors stay memory-mapped in the segments.
+        """
+        start_time = time.perf_counter()
+        texts, metadatas, vectors = self._read_segment_snapshot(snapshot_path, store_path)
+        vectorstore = self._build_from_vectors(texts, metadatas, vectors, metadata)
+        print(f"🧩 Composed {len(texts)} vectors from {len(vectors.parts)} segment(s) in {time.perf_counter() - start_time:.2f}s")
+        return vectorstore
+    
+    def _build_from_vectors(self, texts: List[str], metadatas: List[dict], vectors, metadata: dict):
+        """
+        Build an in-process FAISS store over stored full vectors (segment-composed and portable snapshots).
+        
+        The index uses the storage mode and dimension reduction recorded in the
+        snapshot metadata; the full vectors stay memory-mapped for re-scoring.
+        """
+        full = np.asarray(vectors)
+        reducer = DimensionReducer.from_metadata(metadata, self.embeddings.dimension)
+        index_vectors = reducer.reduce(full) if reducer is not None else full
+        index = create_index(index_vectors.shape[1], metadata.get("index_type", "flat"), training_vectors=index_vectors,
+                             pq_subvectors=self.pq_subvectors)
+        index.add(np.ascontiguousarray(index_vectors, dtype=np.float32))
+        # The chunks come from files this app wrote: skip per-document validation and random ids
+        ids = [str(position) for position in range(len(texts))]
+        docstore = InMemoryDocstore({
+            doc_id: Document.model_construct(id=doc_id, page_content=text, metadata=chunk_metadata)
+            for doc_id, text, chunk_metadata in zip(ids, texts, metadatas)
+        })
+        vectorstore = FAISS(embedding_function=self.embeddings, index=index, docstore=docstore,
+                            index_to_docstore_id=dict(enumerate(ids)))
+        attach_reducer(vectorstore, reducer)
+        if reducer is not None or (self.rescore_enabled and index_storage_mode(index) != "flat"):
+            attach_full_vectors(vectorstore, vectors)
+        return vectorstore
+    
     def create_embeddings(self):
         """
         Initialize embeddings model.
@@ -184,6 +511,62 @@ class RAGModule:
         """
         return self.embeddings
     
+    def get_store_signature(self) -> str:
+        """
+        Suffix identifying the ingest configuration a store is built with.
+        
+        Stores built by other embedding backends, storage modes, chunkers or dedup
+        settings live in their own directories; the original configuration has an
+        empty suffix so existing stores keep their paths.
+        
+        Returns:
+            Signature string appended to the file names before hashing
+        """
+        parts = []
+        if self.embeddings.backend_id != LEGACY_BACKEND_ID:
+            parts.append(self.embeddings.backend_id)
+        if self.storage_mode != "flat":
+            parts.append(self.storage_mode)
+        if self.reducer is not None:
+            parts.append(f"{self.reducer.method}{self.reducer.target_dimension}")
+        if self.chunker_name != "recursive" or self.text_splitter._chunk_size != 1000 or self.text_splitter._chunk_overlap != 200:
+            parts.append(f"{self.chunker_name}{self.chunker.chunk_tokens if self.chunker_name == 'structured' else self.text_splitter._chunk_size}")
+        if self.dedup_filter is not None:
+            parts.append(f"dedup{self.dedup_filter.threshold}")
+        return "".join(f"|{part}" for part in parts)
+    
+    def get_segment_signature(self) -> str:
+        """
+        Ingest settings that determine a document's chunks and vectors (part of its segment key).
+        
+        Storage mode and dimension reduction are not included: they are applied when
+        a collection is composed, so every collection can share the same segments.
+        """
+        chunking = (f"structured{self.chunker.chunk_tokens}-{self.chunker.min_chunk_tokens}" if self.chunker_name == "structured"
+                    else f"{self.chunker_name}{self.text_splitter._chunk_size}-{self.text_splitter._chunk_overlap}")
+        dedup = f"dedup{self.dedup_filter.threshold}" if self.dedup_filter is not None else "nodedup"
+        return f"{self.embeddings.backend_id}|{self.embeddings.dimension}|{chunking}|{dedup}"
+    
+    def get_ingest_settings(self) -> Dict:
+        """
+        Every chunking and dedup parameter a store's chunks depend on (written to its metadata.json).
+        
+        The store signature only carries what picks the store directory, so a
+        snapshot found at the same path may have been built with other values.
+        """
+        dedup = None
+        if self.dedup_filter is not None:
+            dedup = {"threshold": self.dedup_filter.threshold, "num_perm": self.dedup_filter.num_perm,
+                     "shingle_size": self.dedup_filter.shingle_size}
+        return {
+            "chunker": self.chunker_name,
+            "chunk_size": self.text_splitter._chunk_size,
+            "chunk_overlap": self.text_splitter._chunk_overlap,
+            "chunk_tokens": self.chunker.chunk_tokens,
+            "min_chunk_tokens": self.chunker.min_chunk_tokens,
+            "dedup": dedup,
+        }
+    
     def get_vectorstore_path(self, file_names: List[str]) -> str:
         """
         Generate a path for storing vectorstore based on file names.
@@ -195,12 +578,13 @@ class RAGModule:
             Path to vectorstore directory
         """
         # Create a hash from file names to create unique directory
-        file_names_str = ",".join(sorted(file_names))
+        file_names_str = ",".join(sorted(file_names)) + self.get_store_signature()
         file_hash = hashlib.md5(file_names_str.encode()).hexdigest()[:8]
         vectorstore_path = os.path.join(self.persist_directory, f"vectorstore_{file_hash}")
         return vectorstore_path
     
-    def create_vectorstore(self, chunks: List, file_names: Optional[List[str]] = None, save_to_disk: bool = True):
+    def create_vectorstore(self, chunks: List, file_names: Optional[List[str]] = None, save_to_disk: bool = True,
+                           make_current: bool = True):
         """
         Create FAISS vector store from document chunks and optionally save to disk.
         
@@ -208,6 +592,7 @@ class RAGModule:
             chunks: List of document chunks
             file_names: List of file names (optional, for persistence path)
             save_to_disk: Whether to save vectorstore to disk (default: True)
+            make_current: Serve the saved snapshot right away; False stages it (see RAG/reindex.py)
             
         Returns:
             FAISS vector store
@@ -217,13 +602,39 @@ class RAGModule:
         
         print(f"🔧 Creating FAISS vector store with {len(chunks)} chunks...")
         print("   Generating embeddings (this may take a moment)...")
-        print("   This involves calling OpenAI API for each chunk...")
+        print(f"   Embedding backend: {self.embeddings.backend_id}")
         
         import time
         start_time = time.time()
         
+        self.published_snapshot = None
         try:
-            self.vectorstore = FAISS.from_documents(chunks, self.embeddings)
+            # Documents already stored as segments are not embedded again
+            segment_entries = None
+            if self.segments is not None and save_to_disk and file_names and all(chunk.metadata.get("file_hash") for chunk in chunks):
+                texts, metadatas, vectors, segment_entries = self._embed_with_segments(chunks)
+            else:
+                texts = [chunk.page_content for chunk in chunks]
+                metadatas = [chunk.metadata for chunk in chunks]
+                vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+            # The index may hold reduced-dimension vectors; full ones are kept for re-ranking
+            index_vectors = self.reducer.reduce(vectors) if self.reducer is not None else vectors
+            
+            index = create_index(index_vectors.shape[1], self.storage_mode, training_vectors=index_vectors,
+                                 pq_subvectors=self.pq_subvectors)
+            self.vectorstore = FAISS(
+                embedding_function=self.embeddings,
+                index=index,
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+            )
+            self.vectorstore.add_embeddings(zip(texts, index_vectors), metadatas=metadatas)
+            storage_mode = index_storage_mode(index)
+            keep_full_vectors = self.reducer is not None or (self.rescore_enabled and storage_mode != "flat")
+            attach_reducer(self.vectorstore, self.reducer)
+            if keep_full_vectors:
+                attach_full_vectors(self.vectorstore, vectors)
+            print(f"🗜️ Storage mode: {storage_mode}, {index.d} dims" + (" (full vectors kept for re-scoring, memory-mapped once saved)" if keep_full_vectors else ""))
             elapsed_time = time.time() - start_time
             print(f"✅ Vector store created successfully!")
             print(f"⏱️ Embedding generation took {elapsed_time:.2f} seconds")
@@ -241,19 +652,55 @@ class RAGModule:
                 vectorstore_path = self.get_vectorstore_path(file_names)
                 print(f"💾 Saving vectorstore to disk at: {vectorstore_path}")
                 try:
-                    self.vectorstore.save_local(vectorstore_path)
-                    print(f"✅ Vectorstore saved successfully!")
-                    
-                    # Save metadata about files
-                    metadata_file = os.path.join(vectorstore_path, "metadata.json")
+                    # Metadata is written inside the snapshot so index and metadata publish together
                     metadata = {
                         "file_names": file_names,
                         "num_chunks": len(chunks),
-                        "created_at": str(time.time())
+                        "created_at": str(time.time()),
+                        "index_type": storage_mode,
+                        "rescore": keep_full_vectors,
+                        "ingest": self.get_ingest_settings(),
+                        **self.embeddings.describe(),
+                        **(self.reducer.describe() if self.reducer is not None else {})
                     }
-                    with open(metadata_file, 'w') as f:
-                        json.dump(metadata, f, indent=2)
-                    print(f"✅ Metadata saved to {metadata_file}")
+                    
+                    shard_count = min(self.sharding_settings["shard_count"], len(chunks))
+                    if shard_count > 1:
+                        metadata["shards"] = shard_count
+                    elif segment_entries:
+                        metadata["segments"] = len(segment_entries)
+                    
+                    def write_snapshot(path):
+                        if shard_count > 1:
+                            write_shards(path, texts, metadatas, index_vectors, vectors if keep_full_vectors else None,
+                                         self.storage_mode, shard_count, pq_subvectors=self.pq_subvectors)
+                            return
+                        if segment_entries:
+                            # Vectors live in the shared segments; the snapshot only lists them
+                            write_segment_manifest(path, segment_entries)
+                            return
+                        if self.snapshot_format == "portable":
+                            # The index is rebuilt from the vectors on load
+                            write_portable(path, texts, metadatas, vectors)
+                            return
+                        self.vectorstore.save_local(path)
+                        if keep_full_vectors:
+                            save_full_vectors(path, vectors)
+                    
+                    snapshot_path = SnapshotStore(vectorstore_path).publish(write_snapshot, metadata=metadata,
+                                                                            make_current=make_current)
+                    self.published_snapshot = snapshot_path
+                    touch_last_used(vectorstore_path)
+                    print(f"✅ Vectorstore saved successfully to {snapshot_path}")
+                    if shard_count > 1:
+                        # Search the shards from now on; the in-process copy is released
+                        self.vectorstore = self._open_sharded(snapshot_path, metadata)
+                    elif keep_full_vectors:
+                        # Re-score from the saved copy (memory-mapped) instead of keeping the full matrix in RAM
+                        saved_vectors = (SegmentVectors([self.segments.read_vectors(entry["key"]) for entry in segment_entries])
+                                         if segment_entries else load_full_vectors(snapshot_path))
+                        if saved_vectors is not None:
+                            attach_full_vectors(self.vectorstore, saved_vectors)
                 except Exception as save_error:
                     print(f"⚠️ Warning: Could not save vectorstore to disk: {str(save_error)}")
             
@@ -264,18 +711,22 @@ class RAGModule:
             traceback.print_exc()
             raise
     
-    def load_vectorstore(self, file_names: Optional[List[str]] = None, persist_directory: Optional[str] = None):
+    def load_vectorstore(self, file_names: Optional[List[str]] = None, persist_directory: Optional[str] = None,
+                         snapshot_path: Optional[str] = None):
         """
         Load existing vector store from disk.
         
         Args:
             file_names: List of file names (optional, to find matching vectorstore)
             persist_directory: Directory where vector store is persisted (optional, if not using file_names)
+            snapshot_path: Load exactly this snapshot version, e.g. a staged one being validated
             
         Returns:
             FAISS vector store if found, None otherwise
         """
-        if persist_directory:
+        if snapshot_path:
+            vectorstore_path = os.path.dirname(os.path.dirname(snapshot_path))
+        elif persist_directory:
             vectorstore_path = persist_directory
         elif file_names:
             vectorstore_path = self.get_vectorstore_path(file_names)
@@ -283,43 +734,210 @@ class RAGModule:
             print("⚠️ Warning: No file names or persist_directory provided")
             return None
         
-        if os.path.exists(vectorstore_path):
-            print(f"📂 Loading vectorstore from: {vectorstore_path}")
+        snapshot_paths = [snapshot_path] if snapshot_path else SnapshotStore(vectorstore_path).candidate_paths()
+        if not snapshot_paths:
+            print(f"ℹ️  No existing vectorstore found at: {vectorstore_path}")
+            return None
+        
+        # Try the CURRENT snapshot first, then older retained versions, before giving up
+        for snapshot_path in snapshot_paths:
+            print(f"📂 Loading vectorstore from: {snapshot_path}")
             try:
-                # Check if required files exist
-                index_file = os.path.join(vectorstore_path, "index.faiss")
-                pkl_file = os.path.join(vectorstore_path, "index.pkl")
+                # Check if required files exist (sharded snapshots keep their indexes in shard_* directories,
+                # segment-composed ones only list the segments they are built from and portable ones
+                # hold raw vectors the index is built from)
+                sharded = is_sharded_snapshot(snapshot_path)
+                composed = not sharded and is_segment_snapshot(snapshot_path)
+                portable = not sharded and not composed and is_portable_snapshot(snapshot_path)
+                layout_file = SHARDS_FILE if sharded else SEGMENTS_FILE if composed else PORTABLE_FILE if portable else None
+                index_file = os.path.join(snapshot_path, layout_file or "index.faiss")
+                pkl_file = os.path.join(snapshot_path, layout_file or "index.pkl")
                 
                 if not os.path.exists(index_file) or not os.path.exists(pkl_file):
-                    print(f"⚠️ Warning: Vectorstore files not found at {vectorstore_path}")
-                    return None
+                    print(f"⚠️ Warning: Vectorstore files not found at {snapshot_path}")
+                    continue
                 
-                self.vectorstore = FAISS.load_local(
-                    vectorstore_path,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                print(f"✅ Vectorstore loaded successfully from disk!")
-                
-                # Load and display metadata
-                metadata_file = os.path.join(vectorstore_path, "metadata.json")
+                # Load metadata first: never query a store with a different embedding model
+                metadata = {}
+                metadata_file = os.path.join(snapshot_path, "metadata.json")
                 if os.path.exists(metadata_file):
                     try:
                         with open(metadata_file, 'r') as f:
                             metadata = json.load(f)
-                        print(f"📄 Metadata: {metadata.get('num_chunks', 'N/A')} chunks from {len(metadata.get('file_names', []))} file(s)")
+                        print(f"📄 Metadata: {metadata.get('num_chunks', 'N/A')} chunks from {len(metadata.get('file_names', []))} file(s) (version {metadata.get('version', 'legacy')})")
                     except Exception as e:
                         print(f"⚠️ Could not load metadata: {str(e)}")
                 
+                # Reuse a copy of this snapshot another session (or the preloader) already loaded. Keyed by
+                # backend, not credential: queries are always embedded with the session's own backend
+                # (_embed_query) and searched by vector, never through the store's embedding_function
+                cache_key = (os.path.abspath(snapshot_path), os.path.getmtime(index_file),
+                             self.embeddings.backend_id, self.rescore_enabled)
+                with _loaded_stores_lock:
+                    cached = _loaded_stores.get(cache_key)
+                    if cached is not None:
+                        _loaded_stores.move_to_end(cache_key)
+                touch_last_used(vectorstore_path)
+                if cached is not None:
+                    self.vectorstore = cached
+                    print(f"♻️ Reusing vectorstore already loaded in this process ({index_storage_mode(cached.index)} index)")
+                    return self.vectorstore
+                
+                if not self.embeddings.is_compatible(metadata):
+                    print(f"⚠️ Skipping {snapshot_path}: built with {metadata.get('embedding_backend', LEGACY_BACKEND_ID)} "
+                          f"({metadata.get('embedding_dimension', 'unknown')} dims), current backend is "
+                          f"{self.embeddings.backend_id} ({self.embeddings.dimension} dims)")
+                    continue
+                
+                if sharded:
+                    vectorstore = self._open_sharded(snapshot_path, metadata)
+                    with _loaded_stores_lock:
+                        _loaded_stores[cache_key] = vectorstore
+                        while len(_loaded_stores) > max(1, self.batching_settings["store_cache_size"]):
+                            _loaded_stores.popitem(last=False)
+                    print(f"✅ Sharded vectorstore loaded: {len(vectorstore.shards)} shard(s), "
+                          f"{vectorstore.index.ntotal} vectors ({index_storage_mode(vectorstore.index)} index)")
+                    return self.vectorstore
+                
+                if composed:
+                    vectorstore = self._compose_from_segments(snapshot_path, vectorstore_path, metadata)
+                elif portable:
+                    start_time = time.perf_counter()
+                    texts, metadatas, vectors = read_portable(snapshot_path)
+                    vectorstore = self._build_from_vectors(texts, metadatas, vectors, metadata)
+                    print(f"📦 Built {len(texts)} vectors from portable snapshot in {time.perf_counter() - start_time:.2f}s")
+                else:
+                    vectorstore = FAISS.load_local(
+                        snapshot_path,
+                        self.embeddings,
+                        allow_dangerous_deserialization=True
+                    )
+                reducer = DimensionReducer.from_metadata(metadata, self.embeddings.dimension)
+                expected_dimension = reducer.target_dimension if reducer is not None else self.embeddings.dimension
+                if vectorstore.index.d != expected_dimension:
+                    print(f"⚠️ Skipping {snapshot_path}: index dimension {vectorstore.index.d} does not match expected dimension {expected_dimension}")
+                    continue
+                attach_reducer(vectorstore, reducer)
+                # Reduced stores always re-rank with full vectors; compressed ones only if re-scoring is on
+                if not composed and not portable and (reducer is not None or self.rescore_enabled):
+                    attach_full_vectors(vectorstore, load_full_vectors(snapshot_path))
+                self.vectorstore = vectorstore
+                with _loaded_stores_lock:
+                    _loaded_stores[cache_key] = vectorstore
+                    while len(_loaded_stores) > max(1, self.batching_settings["store_cache_size"]):
+                        _loaded_stores.popitem(last=False)
+                print(f"✅ Vectorstore loaded successfully from disk! ({index_storage_mode(vectorstore.index)} index)")
+                
                 return self.vectorstore
             except Exception as e:
-                print(f"❌ Error loading vectorstore: {str(e)}")
+                print(f"❌ Error loading vectorstore snapshot {snapshot_path}: {str(e)}")
                 import traceback
                 traceback.print_exc()
-                return None
+                continue
+        
+        print(f"⚠️ No loadable snapshot found at: {vectorstore_path}")
+        return None
+    
+    def _open_sharded(self, snapshot_path: str, metadata: dict) -> ShardedVectorStore:
+        """
+        Start the shard workers of a sharded snapshot and make it the current vectorstore.
+        """
+        vectorstore = ShardedVectorStore(
+            snapshot_path,
+            metadata,
+            self.embeddings,
+            self.embeddings.dimension,
+            rescore=self.rescore_enabled,
+            start_method=self.sharding_settings["start_method"],
+            timeout=self.sharding_settings["timeout"],
+        )
+        reducer = DimensionReducer.from_metadata(metadata, self.embeddings.dimension)
+        expected_dimension = reducer.target_dimension if reducer is not None else self.embeddings.dimension
+        if vectorstore.index.d != expected_dimension:
+            vectorstore.close()
+            raise ValueError(f"Shard index dimension {vectorstore.index.d} does not match expected dimension {expected_dimension}")
+        self.vectorstore = vectorstore
+        return vectorstore
+    
+    def read_snapshot_chunks(self, snapshot_path: str, store_path: str):
+        """
+        Chunk texts and metadata of a saved snapshot, whatever its layout (FAISS, sharded, segments or portable).
+        
+        Returns:
+            (texts, metadatas)
+        """
+        if is_segment_snapshot(snapshot_path):
+            texts, metadatas, _ = self._read_segment_snapshot(snapshot_path, store_path)
+        elif is_portable_snapshot(snapshot_path):
+            texts, metadatas, _ = read_portable(snapshot_path)
         else:
-            print(f"ℹ️  No existing vectorstore found at: {vectorstore_path}")
-            return None
+            texts, metadatas, _, _ = read_snapshot_vectors(snapshot_path)
+        return texts, metadatas
+    
+    def reshard_vectorstore(self, num_shards: int, file_names: Optional[List[str]] = None,
+                            persist_directory: Optional[str] = None):
+        """
+        Re-partition a saved collection into num_shards shards (1 = a single in-process index).
+        
+        The new layout is published as a new snapshot version, so sessions still
+        searching the old layout keep working and a rollback is a pointer swap.
+        Indexes are rebuilt from the stored full vectors when the snapshot has them.
+        
+        Args:
+            num_shards: Number of shards for the new layout
+            file_names: List of file names (to find the vectorstore)
+            persist_directory: Store directory (instead of file_names)
+            
+        Returns:
+            The reloaded vectorstore (sharded or FAISS)
+        """
+        vectorstore_path = persist_directory or self.get_vectorstore_path(file_names or [])
+        snapshots = SnapshotStore(vectorstore_path)
+        with snapshots.lock():
+            current_path = snapshots.current_path()
+            if current_path is None:
+                raise ValueError(f"No vectorstore found at: {vectorstore_path}")
+            metadata = {}
+            metadata_file = os.path.join(current_path, "metadata.json")
+            if os.path.exists(metadata_file):
+                with open(metadata_file, "r") as f:
+                    metadata = json.load(f)
+            if not self.embeddings.is_compatible(metadata):
+                raise ValueError(f"{vectorstore_path} was built with a different embedding backend")
+            
+            start_time = time.perf_counter()
+            if is_segment_snapshot(current_path):
+                texts, metadatas, full_vectors = self._read_segment_snapshot(current_path, vectorstore_path)
+                full_vectors = np.asarray(full_vectors)
+                index_vectors = full_vectors
+            elif is_portable_snapshot(current_path):
+                texts, metadatas, full_vectors = read_portable(current_path)
+                index_vectors = full_vectors
+            else:
+                texts, metadatas, index_vectors, full_vectors = read_snapshot_vectors(current_path)
+            reducer = DimensionReducer.from_metadata(metadata, self.embeddings.dimension)
+            if full_vectors is not None:
+                # Retrain quantizers on exact vectors rather than on decoded approximations
+                index_vectors = reducer.reduce(full_vectors) if reducer is not None else full_vectors
+            storage_mode = metadata.get("index_type", "flat")
+            num_shards = max(1, min(num_shards, len(texts)))
+            metadata = {key: value for key, value in metadata.items() if key not in ("version", "shards", "segments")}
+            metadata["created_at"] = str(time.time())
+            if num_shards > 1:
+                metadata["shards"] = num_shards
+            
+            def write_snapshot(path):
+                if num_shards > 1:
+                    write_shards(path, texts, metadatas, index_vectors, full_vectors, storage_mode, num_shards,
+                                 pq_subvectors=self.pq_subvectors)
+                else:
+                    write_shard(path, texts, metadatas, index_vectors, full_vectors, storage_mode,
+                                pq_subvectors=self.pq_subvectors)
+            
+            snapshot_path = snapshots.publish(write_snapshot, metadata=metadata)
+            print(f"🧩 Resharded {len(texts)} vectors into {num_shards} shard(s) in "
+                  f"{time.perf_counter() - start_time:.2f}s: {snapshot_path}")
+        return self.load_vectorstore(persist_directory=vectorstore_path)
     
     def find_or_create_vectorstore(self, file_names: List[str], chunks: List):
         """
@@ -332,28 +950,424 @@ class RAGModule:
         Returns:
             FAISS vector store
         """
-        # Try to load existing vectorstore
-        existing_vectorstore = self.load_vectorstore(file_names=file_names)
+        # Hold the per-store writer lock so concurrent sessions uploading the same
+        # files embed once; the second writer finds the first one's snapshot.
+        with SnapshotStore(self.get_vectorstore_path(file_names)).lock():
+            # Try to load existing vectorstore
+            existing_vectorstore = self.load_vectorstore(file_names=file_names)
+            
+            if existing_vectorstore:
+                print("✅ Using existing vectorstore from disk")
+                self.vectorstore = existing_vectorstore
+                return self.vectorstore
+            else:
+                print("📝 Creating new vectorstore (not found on disk)")
+                return self.create_vectorstore(chunks, file_names=file_names, save_to_disk=True)
+    
+    def get_collection_name(self, file_names: List[str]) -> str:
+        """
+        Default collection name for a set of files (the vectorstore directory name).
+        """
+        return os.path.basename(self.get_vectorstore_path(file_names))
+    
+    def compute_fingerprint(self, uploaded_files: List) -> str:
+        """
+        Content fingerprint of a set of uploaded files (independent of upload order).
         
-        if existing_vectorstore:
-            print("✅ Using existing vectorstore from disk")
-            self.vectorstore = existing_vectorstore
-            return self.vectorstore
-        else:
-            print("📝 Creating new vectorstore (not found on disk)")
-            return self.create_vectorstore(chunks, file_names=file_names, save_to_disk=True)
+        Args:
+            uploaded_files: List of uploaded file objects from Streamlit
+            
+        Returns:
+            Hex digest identifying the file contents
+        """
+        digests = sorted(
+            f"{uploaded_file.name}:{hashlib.sha256(uploaded_file.getvalue()).hexdigest()}"
+            for uploaded_file in uploaded_files
+        )
+        return hashlib.sha256("\n".join(digests).encode()).hexdigest()
+    
+    def register_collection(self, owner: str, file_names: List[str], fingerprint: Optional[str] = None,
+                            num_chunks: int = 0, name: Optional[str] = None) -> dict:
+        """
+        Record the current vectorstore as a named collection in the catalog.
+        
+        Args:
+            owner: Owner id (session id)
+            file_names: Names of the documents in the collection
+            fingerprint: Content fingerprint of the documents
+            num_chunks: Number of indexed chunks
+            name: Collection name (default: derived from file names)
+            
+        Returns:
+            The catalog record
+        """
+        name = name or self.get_collection_name(file_names)
+        index_type = index_storage_mode(self.vectorstore.index) if self.vectorstore is not None else None
+        record = self.catalog.register_collection(
+            owner=owner,
+            name=name,
+            store_path=self.get_vectorstore_path(file_names),
+            file_names=file_names,
+            fingerprint=fingerprint,
+            index_type=index_type,
+            num_chunks=num_chunks,
+        )
+        if self.vectorstore is not None:
+            self.collections[name] = self.vectorstore
+        return record
+    
+    def load_collection_store(self, record: dict):
+        """
+        Load the store of a catalog record.
+        
+        Falls back to the store its documents map to under the current ingest
+        settings (collections re-indexed while this process ran on other settings).
+        
+        Returns:
+            The vectorstore, or None if neither can be loaded
+        """
+        store = self.load_vectorstore(persist_directory=record["store_path"])
+        if store is None and record["documents"]:
+            current_path = self.get_vectorstore_path(record["documents"])
+            if current_path != record["store_path"]:
+                store = self.load_vectorstore(persist_directory=current_path)
+        return store
+    
+    def load_collections(self, owner: str, names: List[str]) -> List[str]:
+        """
+        Load the named collections of an owner, skipping ones already in memory.
+        
+        Args:
+            owner: Owner id (session id)
+            names: Collection names to make searchable
+            
+        Returns:
+            Names of the collections that are loaded and searchable
+        """
+        loaded = []
+        for name in names:
+            if name not in self.collections:
+                record = self.catalog.get_collection(owner, name)
+                if record is None:
+                    print(f"⚠️ Collection '{name}' not found in catalog for this session")
+                    continue
+                store = self.load_collection_store(record)
+                if store is None:
+                    continue
+                self.collections[name] = store
+            loaded.append(name)
+        
+        if loaded:
+            self.catalog.touch(owner, loaded)
+            # Keep the single-store attribute pointing at the first requested collection
+            self.vectorstore = self.collections[loaded[0]]
+            # Only the requested collections take part in search
+            self.collections = {name: self.collections[name] for name in loaded}
+        return loaded
+    
+    def similarity_search_with_score(self, query: str, k: int = 4, filters: Optional[dict] = None) -> List:
+        """
+        Similarity search over every loaded collection with a merged top-k.
+        
+        Args:
+            query: User query string
+            k: Number of results to return
+            filters: Metadata filters (see metadata_filters.parse_query_filters); matching is
+                     done inside FAISS, so top-k is filled from matching chunks only
+            
+        Returns:
+            List of (document, score) tuples, best (lowest L2 distance) first
+        """
+        stores = self._search_stores()
+        positions = self._filter_positions(stores, filters)
+        
+        # Embed once and search every collection by vector (re-scoring compressed indexes)
+        with profile_stage("embed_query"):
+            query_vector = self._embed_query(query)
+        with profile_stage("vector_search"):
+            if positions is not None:
+                # Filtered searches have their own ID selector, so they bypass the shared search batcher
+                results = {name: search_vectorstore(store, query_vector, k, rescore_factor=self.rescore_factor,
+                                                    positions=positions[name])
+                           for name, store in stores.items()}
+            elif self.batching_settings["enabled"]:
+                # Concurrent sessions share one embedding call and one matrix search per store
+                batch_settings = {"max_batch_size": self.batching_settings["max_batch_size"],
+                                  "max_wait_ms": self.batching_settings["max_wait_ms"]}
+                futures = {
+                    name: get_search_batcher(store, self.rescore_factor, **batch_settings).submit((query_vector, k))
+                    for name, store in stores.items()
+                }
+                results = {name: future.result() for name, future in futures.items()}
+            else:
+                results = {name: search_vectorstore(store, query_vector, k, rescore_factor=self.rescore_factor)
+                           for name, store in stores.items()}
+        if len(stores) > 1:
+            print(f"🔀 Merging {sum(len(r) for r in results.values())} result(s) from {len(stores)} collection(s)")
+        return self._merge_store_results(results, k)
     
-    def retrieve_documents(self, query: str, k: int = 3) -> List:
+    def search_current_store(self, query: str, k: int = 4) -> List:
+        """
+        Search only the current vectorstore (e.g. the one just built), by vector.
+        
+        Goes through the same reduced-dimension, re-scoring and shard-aware search
+        as collection searches; the store's own text search would query a reduced
+        index with a full-dimension vector.
+        
+        Returns:
+            List of (document, score) tuples, best first
+        """
+        if self.vectorstore is None:
+            raise ValueError("Vector store not initialized. Please create or load vector store first.")
+        return search_vectorstore(self.vectorstore, self.embeddings.embed_query(query), k,
+                                  rescore_factor=self.rescore_factor)
+    
+    def _embed_query(self, query: str):
+        if self.batching_settings["enabled"]:
+            return embed_query_batched(self.embeddings, query, workers=self.batching_settings["embed_workers"],
+                                       max_batch_size=self.batching_settings["max_batch_size"],
+                                       max_wait_ms=self.batching_settings["max_wait_ms"])
+        return self.embeddings.embed_query(query)
+    
+    def _filter_positions(self, stores: dict, filters: Optional[dict]) -> Optional[dict]:
+        """
+        Index positions matching the filters in each collection (name -> positions).
+        
+        Returns None (search everything) when there are no filters or nothing in any
+        collection matches them, e.g. a fiscal year that was never uploaded.
+        """
+        if not filters:
+            return None
+        positions = {
+            name: store.select(filters) if isinstance(store, ShardedVectorStore) else get_metadata_index(store).select(filters)
+            for name, store in stores.items()
+        }
+        matched = sum(len(p) for p in positions.values() if p is not None)
+        if matched == 0:
+            print(f"⚠️ No chunks match {describe_filters(filters)} - searching all chunks")
+            return None
+        total = sum(store.index.ntotal for store in stores.values())
+        print(f"🎯 Filter {describe_filters(filters)}: searching {matched} of {total} chunks")
+        return positions
+    
+    def _search_stores(self) -> dict:
+        """
+        Collections taking part in search (name -> store).
+        """
+        stores = self.collections or ({"default": self.vectorstore} if self.vectorstore is not None else {})
+        if not stores:
+            raise ValueError("Vector store not initialized. Please create or load vector store first.")
+        return stores
+    
+    def _merge_store_results(self, results: dict, k: int) -> List:
+        """
+        Merge per-collection (document, score) lists into one top-k, best first.
+        """
+        merged = []
+        for name, store_results in results.items():
+            for doc, score in store_results:
+                if len(results) > 1:
+                    doc.metadata.setdefault("collection", name)
+                merged.append((doc, score))
+        merged.sort(key=lambda pair: pair[1])
+        return merged[:k]
+    
+    def fetch_chunks(self, refs: List[dict]) -> List:
+        """
+        Documents for chunk references ({"id", "collection", "score"}) from the loaded collections.
+        
+        Used when the retrieved documents behind a context handle are gone (evicted, or
+        the state was restored from a checkpoint in another process). Chunks of
+        sharded collections live in the shard workers and are not returned.
+        
+        Args:
+            refs: Chunk references, best first
+            
+        Returns:
+            Documents in reference order; references that no longer resolve are skipped
+        """
+        stores = self._search_stores()
+        wanted = {ref["id"] for ref in refs}
+        found = {}
+        for store in stores.values():
+            if isinstance(store, ShardedVectorStore):
+                continue
+            for doc_id in store.index_to_docstore_id.values():
+                doc = store.docstore.search(doc_id)
+                key = chunk_id(doc)
+                if key in wanted and key not in found:
+                    found[key] = doc
+            if len(found) == len(wanted):
+                break
+        return [found[ref["id"]] for ref in refs if ref["id"] in found]
+    
+    def similarity_search_with_score_batch(self, queries: List[str], k: int = 4,
+                                           filters: Optional[dict] = None) -> List[List]:
+        """
+        Similarity search for several queries: one embedding call for all queries and
+        one matrix search per collection.
+        
+        Args:
+            queries: Query strings
+            k: Number of results per query
+            filters: Metadata filters applied to every query
+            
+        Returns:
+            One list of (document, score) tuples per query, best first
+        """
+        if not queries:
+            return []
+        stores = self._search_stores()
+        with profile_stage("embed_queries"):
+            query_vectors = np.asarray(self.embeddings.embed_documents(list(queries)), dtype=np.float32)
+        return self._search_vectors_batch(stores, query_vectors, k, filters)
+    
+    def _search_vectors_batch(self, stores: dict, query_vectors: np.ndarray, k: int,
+                              filters: Optional[dict] = None) -> List[List]:
+        positions = self._filter_positions(stores, filters) or {}
+        with profile_stage("vector_search"):
+            per_store = {
+                name: search_vectorstore_batch(store, query_vectors, k, rescore_factor=self.rescore_factor,
+                                               positions=positions.get(name))
+                for name, store in stores.items()
+            }
+        return [
+            self._merge_store_results({name: rows[i] for name, rows in per_store.items()}, k)
+            for i in range(len(query_vectors))
+        ]
+    
+    # L2 distance above which hits are only used when nothing closer was found
+    SCORE_THRESHOLD = 2.0
+    
+    def select_documents(self, docs_with_scores: List, k: int) -> List:
+        """
+        Pick the final hits from ranked (document, score) pairs.
+        
+        Prefers hits within SCORE_THRESHOLD and falls back to the best hits when none
+        qualify (something is better than nothing). Empty chunks and repeated chunk
+        text (e.g. the same chunk found in two collections) are dropped.
+        
+        Args:
+            docs_with_scores: (document, score) pairs, best first
+            k: Number of hits to keep
+            
+        Returns:
+            Up to k (document, score) pairs, best first
+        """
+        candidates = [(doc, score) for doc, score in docs_with_scores
+                      if doc.page_content and len(doc.page_content.strip()) > 0]
+        filtered = [(doc, score) for doc, score in candidates if score <= self.SCORE_THRESHOLD]
+        selected, seen = [], set()
+        for doc, score in (filtered or candidates):
+            text = doc.page_content.strip()
+            if text in seen:
+                continue
+            seen.add(text)
+            selected.append((doc, score))
+            if len(selected) == k:
+                break
+        return selected
+    
+    def retrieve_documents_batch(self, queries: List[str], k: int = 3, filters: Optional[dict] = None) -> List[List]:
+        """
+        Retrieve documents for several queries at once.
+        
+        All queries are embedded in one call and searched with one vectorized FAISS
+        search per collection; each query's hits go through the same selection as
+        ``retrieve_documents`` (threshold, empty-chunk and duplicate filtering).
+        
+        Args:
+            queries: Query strings
+            k: Number of documents per query (default: 3)
+            filters: Metadata filters applied to every query
+            
+        Returns:
+            One list per query of (document, score) tuples, best first; the
+            document metadata carries source, page, section and collection
+        """
+        start_time = time.perf_counter()
+        ranked = self.similarity_search_with_score_batch(queries, k=max(k, 5) * 2, filters=filters)
+        results = [self.select_documents(hits, k) for hits in ranked]
+        print(f"⏱️ Batch retrieval: {len(queries)} queries in {time.perf_counter() - start_time:.3f}s")
+        return results
+    
+    async def aretrieve_documents_batch(self, queries: List[str], k: int = 3,
+                                        filters: Optional[dict] = None) -> List[List]:
+        """
+        Async ``retrieve_documents_batch``: awaits the embedding call and runs the
+        FAISS search in a worker thread so the event loop is not blocked.
+        """
+        import asyncio
+        
+        if not queries:
+            return []
+        start_time = time.perf_counter()
+        stores = self._search_stores()
+        query_vectors = np.asarray(await self.embeddings.aembed_documents(list(queries)), dtype=np.float32)
+        ranked = await asyncio.to_thread(self._search_vectors_batch, stores, query_vectors, max(k, 5) * 2, filters)
+        results = [self.select_documents(hits, k) for hits in ranked]
+        print(f"⏱️ Async batch retrieval: {len(queries)} queries in {time.perf_counter() - start_time:.3f}s")
+        return results
+    
+    def collect_garbage(self, budget_mb: Optional[float] = None) -> dict:
+        """
+        Evict least recently used segments, cached extractions and collections until
+        the vectorstore directory fits the disk budget (what the background collector runs).
+        
+        Args:
+            budget_mb: Disk budget in MB (default: DISK_BUDGET_MB)
+            
+        Returns:
+            Eviction stats
+        """
+        budget_mb = self.segment_settings["disk_budget_mb"] if budget_mb is None else budget_mb
+        return collect_garbage(self.persist_directory, int(budget_mb * 1e6), self.segment_settings["gc_min_idle"],
+                               _loaded_store_paths, self.extraction_cache.cache_dir)
+    
+    def compression_report(self, k: int = 10, num_queries: int = 200) -> str:
+        """
+        Compare storage modes on the current vectorstore: size, speed and recall loss.
+        
+        Args:
+            k: Recall is measured against the exact top-k
+            num_queries: Number of sampled queries
+            
+        Returns:
+            Plain-text report table
+        """
+        if self.vectorstore is None:
+            raise ValueError("Vector store not initialized. Please create or load vector store first.")
+        if isinstance(self.vectorstore, ShardedVectorStore):
+            raise ValueError("Compression reports need an in-process index; reshard the collection to 1 shard first")
+        vectors = get_full_vectors(self.vectorstore)
+        if vectors is None:
+            # Flat indexes hold the exact vectors; compressed ones only approximate them
+            if index_storage_mode(self.vectorstore.index) != "flat":
+                print("⚠️ No full-precision vectors stored - report is relative to the compressed vectors")
+            vectors = self.vectorstore.index.reconstruct_n(0, self.vectorstore.index.ntotal)
+        vectors = np.asarray(vectors)
+        # Evaluate the configured reduction only when the report has full-dimension vectors
+        reducer = self.reducer if self.reducer is not None and vectors.shape[1] == self.reducer.source_dimension else None
+        report = compression_report(vectors, k=k, num_queries=num_queries,
+                                    rescore_factor=self.rescore_factor, pq_subvectors=self.pq_subvectors,
+                                    reducer=reducer)
+        return format_compression_report(report)
+    
+    def retrieve_documents(self, query: str, k: int = 3, filters: Optional[dict] = None,
+                           with_scores: bool = False) -> List:
         """
         Retrieve relevant documents based on query.
         
         Args:
             query: User query string
             k: Number of documents to retrieve (default: 3)
+            filters: Metadata filters, e.g. {"doc_type": "10-K", "fiscal_year": 2023, "page_range": (40, 60)}
+            with_scores: Return (document, L2 distance) pairs; the score is None for fallback hits
             
         Returns:
             List of relevant document chunks
         """
+        scores = {}
         print(f"🔎 Starting retrieval with query: '{query}'")
         print(f"   Retrieving top {k} documents")
         
@@ -363,12 +1377,9 @@ class RAGModule:
         
         print("✅ Vector store exists, checking accessibility...")
         try:
-            # Try to get document count if possible
-            # Note: FAISS doesn't expose a direct count, but we can check with a test search
-            # Use a generic query instead of empty string
-            test_search = self.vectorstore.similarity_search("test", k=1)
-            print(f"✅ Vector store is accessible (test search returned {len(test_search)} doc)")
-            if len(test_search) == 0:
+            # Check the vector count directly instead of paying for a test embedding call
+            print(f"✅ Vector store is accessible ({self.vectorstore.index.ntotal} vectors)")
+            if self.vectorstore.index.ntotal == 0:
                 print("⚠️ WARNING: Vector store is empty - no documents found!")
         except Exception as e:
             print(f"⚠️ Warning: Could not test vector store: {str(e)}")
@@ -379,7 +1390,7 @@ class RAGModule:
         try:
             # First try with similarity_search_with_score to see actual scores
             # Use a larger k to ensure we get results
-            docs_with_scores = self.vectorstore.similarity_search_with_score(query, k=max(k, 5))
+            docs_with_scores = self.similarity_search_with_score(query, k=max(k, 5), filters=filters)
             print(f"✅ Similarity search with scores completed!")
             print(f"   Found {len(docs_with_scores)} document(s) with scores")
             
@@ -391,46 +1402,35 @@ class RAGModule:
                     print(f"      Preview: {content_preview}...")
                 
                 # FAISS uses L2 distance, so lower score = more similar
-                # For OpenAI embeddings, typical good matches are < 1.0, acceptable < 1.5
-                # But we'll be lenient and accept most results unless score is extremely high
-                threshold = 2.0  # Lenient threshold to ensure we get results
-                filtered_docs = [(doc, score) for doc, score in docs_with_scores if score <= threshold]
-                
-                # If we have any docs with reasonable scores, use them
-                # Otherwise, use all docs regardless of score (something is better than nothing)
-                if len(filtered_docs) >= k:
-                    docs = [doc for doc, score in filtered_docs[:k]]
-                    print(f"✅ Using {len(docs)} docs with scores <= {threshold}")
-                elif len(filtered_docs) > 0:
-                    # Use filtered docs even if less than k
-                    docs = [doc for doc, score in filtered_docs]
-                    print(f"✅ Using {len(docs)} docs with scores <= {threshold} (less than requested {k})")
+                # For normalized embeddings (OpenAI, local, hashing), typical good matches are < 1.0, acceptable < 1.5
+                # Lenient threshold; if nothing is within it, the best hits are used anyway
+                selected = self.select_documents(docs_with_scores, k)
+                within = sum(1 for _, score in selected if score <= self.SCORE_THRESHOLD)
+                if within:
+                    print(f"✅ Using {len(selected)} docs with scores <= {self.SCORE_THRESHOLD}")
+                elif selected:
+                    print(f"⚠️ All scores > {self.SCORE_THRESHOLD}, using top {len(selected)} docs anyway")
+                    print(f"   Best score: {selected[0][1]:.4f}")
                 else:
-                    # If all scores are too high, still use the top k (maybe query is just not well matched)
-                    docs = [doc for doc, score in docs_with_scores[:k]]
-                    print(f"⚠️ All scores > {threshold}, using top {len(docs)} docs anyway")
-                    print(f"   Best score: {docs_with_scores[0][1]:.4f}")
-                
-                # Ensure we have non-empty documents
-                docs = [doc for doc in docs if doc.page_content and len(doc.page_content.strip()) > 0]
-                if len(docs) == 0 and len(docs_with_scores) > 0:
                     print("⚠️ WARNING: All retrieved docs have empty content!")
-                    # Try to get docs that might have content
-                    docs = [doc for doc, score in docs_with_scores if doc.page_content and len(doc.page_content.strip()) > 0][:k]
+                docs = [doc for doc, _ in selected]
+                scores = {id(doc): score for doc, score in selected}
                 
                 print(f"✅ Returning {len(docs)} document(s)")
             else:
                 print("⚠️ WARNING: No documents retrieved from similarity search!")
                 docs = []
             
-            # Fallback: If we get no results, try MMR search
-            if len(docs) == 0:
-                print("🔄 Trying MMR (Maximum Marginal Relevance) search as fallback...")
+            # Fallback: If the filters left nothing, search without them
+            if len(docs) == 0 and filters:
+                print("🔄 Retrying without metadata filters...")
                 try:
-                    docs = self.vectorstore.max_marginal_relevance_search(query, k=k, fetch_k=min(k*3, 20))
-                    print(f"✅ MMR search returned {len(docs)} document(s)")
-                except Exception as mmr_error:
-                    print(f"⚠️ MMR search also failed: {str(mmr_error)}")
+                    selected = self.select_documents(self.similarity_search_with_score(query, k=max(k, 5)), k)
+                    docs = [doc for doc, _ in selected]
+                    scores = {id(doc): score for doc, score in selected}
+                    print(f"✅ Unfiltered search returned {len(docs)} document(s)")
+                except Exception as unfiltered_error:
+                    print(f"⚠️ Unfiltered search also failed: {str(unfiltered_error)}")
             
             # Final fallback: If still no results, try retrieving ALL documents (last resort)
             if len(docs) == 0:
@@ -440,7 +1440,7 @@ class RAGModule:
                     fallback_queries = ["the", "a", "and", "or", query]  # Include original query too
                     for fallback_query in fallback_queries:
                         try:
-                            all_docs = self.vectorstore.similarity_search(fallback_query, k=max(5, k*2))
+                            all_docs = [doc for doc, _ in self.similarity_search_with_score(fallback_query, k=max(5, k*2))]
                             print(f"   Trying '{fallback_query}': returned {len(all_docs)} docs")
                             if len(all_docs) > 0:
                                 docs = all_docs[:k]
@@ -454,7 +1454,7 @@ class RAGModule:
                     # If still nothing, try with ANY query string that should exist
                     if len(docs) == 0:
                         print("   Trying with k=20 to get any results...")
-                        any_docs = self.vectorstore.similarity_search(query, k=20)
+                        any_docs = [doc for doc, _ in self.similarity_search_with_score(query, k=20)]
                         if len(any_docs) > 0:
                             docs = any_docs[:k]
                             print(f"✅ Retrieved {len(docs)} docs with k=20")
@@ -471,18 +1471,20 @@ class RAGModule:
             else:
                 print(f"✅ Final result: Returning {len(docs)} document(s)")
             
+            if with_scores:
+                return [(doc, scores.get(id(doc))) for doc in docs]
             return docs
         except Exception as e:
             print(f"❌ ERROR during similarity search: {str(e)}")
             import traceback
             traceback.print_exc()
             
-            # Last resort: try simple similarity_search without scores
-            print("🔄 Attempting fallback: Simple similarity_search...")
+            # Last resort: search the current store directly (no batching, filters or merging)
+            print("🔄 Attempting fallback: direct search of the current vectorstore...")
             try:
-                docs = self.vectorstore.similarity_search(query, k=k)
+                docs = [doc for doc, _ in self.search_current_store(query, k=k)]
                 print(f"✅ Fallback search returned {len(docs)} document(s)")
-                return docs
+                return [(doc, None) for doc in docs] if with_scores else docs
             except Exception as fallback_error:
                 print(f"❌ Fallback also failed: {str(fallback_error)}")
                 raise
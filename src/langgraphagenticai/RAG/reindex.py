@@ -0,0 +1,477 @@
+"""
+Online re-indexing: rebuild saved collections under new ingest settings (embedding
+model, chunking, index type, ...) while the current ones keep serving, validate
+the new versions, then switch every process to them at once. Rollback restores
+the previous settings and versions.
+
+Each store is rebuilt from the cached extracted text of its documents (no
+re-upload, no re-parsing) into the directory the new settings map to, as a
+staged snapshot version that nothing serves yet. The switch points CURRENT at
+the new versions, moves the catalog entries and rewrites the changed keys of
+uiconfigfile.ini in one atomic replace; running processes pick the settings up
+on their next message. Old stores stay on disk for rollback until the disk
+budget collector evicts them.
+
+Usage (from the repository root):
+    python -m src.langgraphagenticai.RAG.reindex --set EMBEDDING_BACKEND=local --dry-run
+    python -m src.langgraphagenticai.RAG.reindex --set OPENAI_EMBEDDING_MODEL=text-embedding-3-small
+    python -m src.langgraphagenticai.RAG.reindex --set CHUNK_TOKENS=300 --set VECTOR_STORAGE_MODE=int8 --no-switch
+    python -m src.langgraphagenticai.RAG.reindex --switch <id>
+    python -m src.langgraphagenticai.RAG.reindex --rollback            # the latest switched re-index
+    python -m src.langgraphagenticai.RAG.reindex --list
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from src.langgraphagenticai.RAG.catalog import VectorstoreCatalog
+from src.langgraphagenticai.RAG.metadata_filters import annotate_filing_metadata
+from src.langgraphagenticai.RAG.segment_store import SegmentStore, texts_digest
+from src.langgraphagenticai.RAG.sharded_store import ShardedVectorStore
+from src.langgraphagenticai.RAG.snapshot_store import CURRENT_POINTER, LEGACY_VERSION, SnapshotStore
+from src.langgraphagenticai.ui.uiconfigfile import CONFIG_FILE, Config, apply_overrides, update_config_file
+from src.langgraphagenticai.utils.rate_limiter import provider_priority
+
+RECORDS_DIR = "reindex"
+
+
+def _read_metadata(snapshot_path: str) -> dict:
+    try:
+        with open(os.path.join(snapshot_path, "metadata.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def list_stores(persist_directory: str) -> List[str]:
+    """
+    Store directories with a published snapshot, in name order.
+    """
+    if not os.path.isdir(persist_directory):
+        return []
+    paths = [os.path.join(persist_directory, name) for name in sorted(os.listdir(persist_directory))
+             if name.startswith("vectorstore_") and os.path.isdir(os.path.join(persist_directory, name))]
+    return [path for path in paths if SnapshotStore(path).current_path() is not None]
+
+
+def _texts_to_embed(module, chunks: List):
+    """
+    Chunk texts the build has to embed, and the number of documents whose stored segments are reused.
+    """
+    if module.segments is None or not all(chunk.metadata.get("file_hash") for chunk in chunks):
+        return [chunk.page_content for chunk in chunks], 0
+    signature = module.get_segment_signature()
+    texts, reused = [], 0
+    for file_hash, document_chunks in module._group_by_document(chunks).items():
+        document_texts = [chunk.page_content for chunk in document_chunks]
+        info = module.segments.info(SegmentStore.segment_key(file_hash, signature))
+        if info is not None and info.get("num_chunks") == len(document_texts) \
+                and info.get("texts_digest") == texts_digest(document_texts):
+            reused += 1
+        else:
+            texts.extend(document_texts)
+    return texts, reused
+
+
+def plan_store(module, store_path: str) -> Dict:
+    """
+    Work needed to rebuild one store under the module's (new) settings.
+
+    Documents are re-chunked from the extraction cache. A document whose text is
+    no longer cached keeps its current chunks, which are re-embedded as they are.
+
+    Args:
+        module: RAGModule created with the new settings
+        store_path: Store directory serving now
+
+    Returns:
+        Plan with the source and target stores, the new chunks and the embedding work
+    """
+    source_snapshot = SnapshotStore(store_path).current_path()
+    if source_snapshot is None:
+        raise ValueError(f"No published snapshot at {store_path}")
+    texts, metadatas = module.read_snapshot_chunks(source_snapshot, store_path)
+    file_names = _read_metadata(source_snapshot).get("file_names") \
+        or sorted({metadata.get("source") for metadata in metadatas if metadata.get("source")})
+
+    old_chunks = OrderedDict()
+    for text, metadata in zip(texts, metadatas):
+        old_chunks.setdefault(metadata.get("source"), []).append(Document(page_content=text, metadata=dict(metadata)))
+    documents, carried, missing_text = [], [], []
+    for name in file_names:
+        chunks = old_chunks.get(name, [])
+        file_hash = next((chunk.metadata["file_hash"] for chunk in chunks if chunk.metadata.get("file_hash")), None)
+        pages = module.extraction_cache.get_any(file_hash) if file_hash else None
+        if pages:
+            for page in pages:
+                page.metadata["source"] = name
+                page.metadata["file_hash"] = file_hash
+            annotate_filing_metadata(pages, name)
+            documents.extend(pages)
+        else:
+            missing_text.append(name)
+            carried.extend(chunks)
+    chunks = (module.deduplicate_chunks(module.split_documents(documents)) if documents else []) + carried
+    if not chunks:
+        raise ValueError(f"Nothing to index for {store_path}")
+
+    target = module.get_vectorstore_path(file_names)
+    target_store = SnapshotStore(target)
+    # The new settings may already have a store for these files, built earlier. Its path only
+    # fixes the signature, so every chunking and dedup parameter must match too (snapshots
+    # written before the settings were recorded are rebuilt)
+    reuse_snapshot = None
+    if target != store_path:
+        current = target_store.current_path()
+        current_metadata = _read_metadata(current) if current else {}
+        if current and module.embeddings.is_compatible(current_metadata) \
+                and current_metadata.get("ingest") == module.get_ingest_settings():
+            reuse_snapshot = current
+    embed_texts, reused_documents = _texts_to_embed(module, chunks) if reuse_snapshot is None else ([], 0)
+    return {
+        "source": store_path,
+        "source_snapshot": source_snapshot,
+        "target": target,
+        "previous_version": target_store.current_version(),
+        "reuse_snapshot": reuse_snapshot,
+        "file_names": file_names,
+        "chunks": chunks,
+        "old_texts": texts,
+        "old_metadatas": metadatas,
+        "missing_text": missing_text,
+        "embed_chunks": len(embed_texts),
+        "reused_documents": reused_documents,
+        "tokens": sum(len(text) for text in embed_texts) // 4,
+    }
+
+
+def estimate(module, plans: List[Dict], settings: dict) -> Dict:
+    """
+    Embedding cost and duration of a re-index.
+
+    The price comes from EMBEDDING_PRICES (USD per 1M tokens, ~4 characters per
+    token). The duration is measured on a sample of the chunks and is never
+    below what the provider's RATE_LIMITS allow.
+    """
+    tokens = sum(plan["tokens"] for plan in plans)
+    chunks = sum(plan["embed_chunks"] for plan in plans)
+    backend_id = module.embeddings.backend_id
+    price = settings["prices"].get(backend_id, 0.0)
+    result = {"backend": backend_id, "chunks": chunks, "tokens": tokens, "price_per_million": price,
+              "cost": round(tokens / 1e6 * price, 4), "seconds": None, "chunks_per_second": None, "tokens_per_minute": None}
+    sample = [chunk.page_content for plan in plans for chunk in plan["chunks"]][:settings["sample_chunks"]]
+    if chunks and sample:
+        start_time = time.perf_counter()
+        with provider_priority("batch"):
+            module.embeddings.embed_documents(sample)
+        elapsed = max(time.perf_counter() - start_time, 1e-6)
+        result["chunks_per_second"] = round(len(sample) / elapsed, 1)
+        result["seconds"] = chunks / result["chunks_per_second"]
+    rate_limits = Config().get_rate_limit_settings()
+    if rate_limits["enabled"] and tokens:
+        provider, _, model = backend_id.partition(":")
+        _, tokens_per_minute = rate_limits["limits"].get(f"{provider}:{model}", rate_limits["limits"].get(provider, (0, 0)))
+        if tokens_per_minute:
+            result["tokens_per_minute"] = tokens_per_minute
+            result["seconds"] = max(result["seconds"] or 0.0, tokens / tokens_per_minute * 60)
+    return result
+
+
+def build_store(module, plan: Dict) -> str:
+    """
+    Build the new version of a store as a staged snapshot (CURRENT is left alone).
+
+    Returns:
+        Path of the new snapshot version
+    """
+    if plan["reuse_snapshot"]:
+        print(f"♻️ {os.path.basename(plan['target'])} already built with these settings: {plan['reuse_snapshot']}")
+        return plan["reuse_snapshot"]
+    # Bulk embedding queues behind the interactive calls of this process at the provider scheduler
+    with provider_priority("batch"):
+        module.create_vectorstore(plan["chunks"], file_names=plan["file_names"], save_to_disk=True, make_current=False)
+    if module.published_snapshot is None:
+        raise RuntimeError(f"Could not save the new version of {plan['source']}")
+    return module.published_snapshot
+
+
+def validate_store(module, plan: Dict, snapshot_path: str, settings: dict) -> Dict:
+    """
+    Check a new version before traffic is switched to it.
+
+    The snapshot must load with the new settings and hold every document. Its
+    chunks, used as queries, must find themselves (self-recall), and chunks of
+    the serving version must find a chunk of the same document first (source
+    agreement).
+    """
+    store = module.load_vectorstore(snapshot_path=snapshot_path)
+    if store is None:
+        return {"ok": False, "reason": "snapshot does not load with the new settings"}
+    try:
+        module.collections = {}
+        texts, metadatas = module.read_snapshot_chunks(snapshot_path, plan["target"])
+        missing = sorted(set(plan["file_names"]) - {metadata.get("source") for metadata in metadatas})
+        rng = random.Random(0)
+        probes = rng.sample(range(len(texts)), min(settings["probes"], len(texts)))
+        old_probes = rng.sample(range(len(plan["old_texts"])), min(settings["probes"], len(plan["old_texts"])))
+        with provider_priority("batch"):
+            results = module.similarity_search_with_score_batch(
+                [texts[i] for i in probes] + [plan["old_texts"][i] for i in old_probes], k=5)
+        found = sum(
+            any(doc.page_content == texts[i] and doc.metadata.get("source") == metadatas[i].get("source") for doc, _ in hits)
+            for i, hits in zip(probes, results)
+        )
+        agreed = sum(
+            bool(hits) and hits[0][0].metadata.get("source") == plan["old_metadatas"][i].get("source")
+            for i, hits in zip(old_probes, results[len(probes):])
+        )
+        report = {
+            "vectors": int(store.index.ntotal),
+            "chunks": len(texts),
+            "missing_documents": missing,
+            "self_recall": round(found / len(probes), 3) if probes else 0.0,
+            "source_agreement": round(agreed / len(old_probes), 3) if old_probes else 1.0,
+        }
+    finally:
+        if isinstance(store, ShardedVectorStore):
+            store.close()
+    problems = []
+    if not report["chunks"] or report["vectors"] != report["chunks"]:
+        problems.append(f"{report['vectors']} vectors for {report['chunks']} chunks")
+    if missing:
+        problems.append(f"documents missing: {', '.join(missing)}")
+    if report["self_recall"] < settings["min_self_recall"]:
+        problems.append(f"self-recall {report['self_recall']} < {settings['min_self_recall']}")
+    if report["source_agreement"] < settings["min_source_agreement"]:
+        problems.append(f"source agreement {report['source_agreement']} < {settings['min_source_agreement']}")
+    report["ok"] = not problems
+    report["reason"] = "; ".join(problems)
+    return report
+
+
+def _discard(store: Dict):
+    """
+    Remove a staged version that failed validation (reused versions are left alone).
+    """
+    if store.get("reused") or not store.get("snapshot"):
+        return
+    shutil.rmtree(store["snapshot"], ignore_errors=True)
+    target = SnapshotStore(store["target"])
+    if not target.list_versions() and target.current_version() is None:
+        shutil.rmtree(store["target"], ignore_errors=True)
+
+
+def _point_current(store_path: str, version: Optional[str]):
+    if version == LEGACY_VERSION or version is None:
+        # Legacy stores are served from their flat layout when there is no pointer; a store
+        # that had no version before the switch is unpublished, so it is neither served nor reused
+        try:
+            os.remove(os.path.join(store_path, CURRENT_POINTER))
+        except FileNotFoundError:
+            pass
+    elif version:
+        SnapshotStore(store_path).set_current(version)
+
+
+def _records_dir(persist_directory: str) -> str:
+    return os.path.join(persist_directory, RECORDS_DIR)
+
+
+def save_record(persist_directory: str, record: Dict):
+    os.makedirs(_records_dir(persist_directory), exist_ok=True)
+    path = os.path.join(_records_dir(persist_directory), f"{record['id']}.json")
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def list_records(persist_directory: str) -> List[Dict]:
+    """
+    Re-index records, oldest first.
+    """
+    records = []
+    directory = _records_dir(persist_directory)
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), "r") as f:
+                records.append(json.load(f))
+    return records
+
+
+def find_record(persist_directory: str, record_id: Optional[str], status: str) -> Dict:
+    records = [record for record in list_records(persist_directory)
+               if (record["id"] == record_id if record_id else record["status"] == status)]
+    if not records:
+        raise SystemExit(f"No re-index {record_id or f'with status {status!r}'} in {_records_dir(persist_directory)}")
+    return records[-1]
+
+
+def switch(record: Dict, persist_directory: str, config_file: str = CONFIG_FILE):
+    """
+    Serve the new versions: CURRENT pointers, catalog entries, then the settings of every process.
+
+    Each step is atomic on its own. Between them, processes on either settings
+    still find a compatible store: RAGModule.load_collections falls back to the
+    store of its own settings, and the old stores stay unchanged.
+    """
+    catalog = VectorstoreCatalog(os.path.join(persist_directory, "catalog.sqlite3"))
+    for store in record["stores"]:
+        _point_current(store["target"], store["version"])
+        if store["target"] != store["source"]:
+            store["catalog_entries"] = catalog.move_store(store["source"], store["target"])
+    record["previous"] = update_config_file(record["overrides"], config_file)
+    record["status"] = "switched"
+    record["switched_at"] = time.time()
+    save_record(persist_directory, record)
+    print(f"🔀 Switched {len(record['stores'])} store(s) and {', '.join(record['overrides'])} "
+          f"in {config_file}; roll back with --rollback {record['id']}")
+
+
+def rollback(record: Dict, persist_directory: str, config_file: str = CONFIG_FILE):
+    """
+    Undo a switch: previous settings, catalog entries and CURRENT pointers.
+    """
+    update_config_file(record["previous"], config_file)
+    catalog = VectorstoreCatalog(os.path.join(persist_directory, "catalog.sqlite3"))
+    for store in record["stores"]:
+        if not os.path.isdir(store["source"]):
+            print(f"⚠️ {store['source']} was evicted by the disk budget collector; "
+                  f"its documents are embedded again on their next upload")
+        if store["target"] != store["source"]:
+            catalog.move_store(store["target"], store["source"])
+        _point_current(store["target"], store["previous_version"])
+    record["status"] = "rolled_back"
+    record["rolled_back_at"] = time.time()
+    save_record(persist_directory, record)
+    print(f"↩️ Rolled back re-index {record['id']}: restored {', '.join(record['previous'])} "
+          f"and {len(record['stores'])} store(s)")
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "unknown"
+    return f"{seconds:.0f}s" if seconds < 120 else f"{seconds / 60:.1f} min"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="New uiconfigfile.ini setting to re-index with (repeatable)")
+    parser.add_argument("--store", action="append", default=[],
+                        help="Store directory to re-index (repeatable; default: every store in VECTORSTORE_DIR)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the plan, cost and duration estimate")
+    parser.add_argument("--no-switch", action="store_true", help="Build and validate, switch later with --switch")
+    parser.add_argument("--switch", metavar="ID", help="Switch to a re-index built with --no-switch")
+    parser.add_argument("--rollback", nargs="?", const="", metavar="ID",
+                        help="Roll back a switched re-index (default: the latest)")
+    parser.add_argument("--list", action="store_true", help="List re-index records")
+    args = parser.parse_args()
+
+    persist_directory = Config().get_vectorstore_dir()
+    if args.list:
+        for record in list_records(persist_directory):
+            print(f"{record['id']}  {record['status']:<12} {len(record['stores'])} store(s)  "
+                  f"{', '.join(f'{k}={v}' for k, v in record['overrides'].items())}")
+        return
+    if args.rollback is not None:
+        rollback(find_record(persist_directory, args.rollback or None, "switched"), persist_directory)
+        return
+    if args.switch:
+        record = find_record(persist_directory, args.switch, "built")
+        if record["status"] != "built":
+            raise SystemExit(f"Re-index {record['id']} is {record['status']}, not built")
+        switch(record, persist_directory)
+        return
+    if not args.set:
+        parser.error("give the new settings with --set KEY=VALUE")
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key.strip().upper()] = value.strip()
+    # This process builds with the new settings; every other process keeps the ones in the ini file
+    apply_overrides(overrides)
+    settings = Config().get_reindex_settings()
+    from src.langgraphagenticai.RAG.rag_module import RAGModule
+    module = RAGModule(os.environ.get("OPENAI_API_KEY"))
+
+    stores = args.store or list_stores(persist_directory)
+    print(f"🔁 Re-index of {len(stores)} store(s) with {', '.join(f'{k}={v}' for k, v in overrides.items())}")
+    plans = []
+    for store_path in stores:
+        try:
+            plans.append(plan_store(module, store_path))
+        except Exception as e:
+            print(f"⚠️ Skipping {store_path}: {str(e)}")
+    if not plans:
+        raise SystemExit("Nothing to re-index")
+
+    cost = estimate(module, plans, settings)
+    print(f"📋 Plan: {len(plans)} store(s), {sum(len(p['chunks']) for p in plans)} chunk(s), "
+          f"{cost['chunks']} to embed (~{cost['tokens']:,} tokens), "
+          f"{sum(p['reused_documents'] for p in plans)} document(s) reuse stored segments, "
+          f"{sum(1 for p in plans if p['reuse_snapshot'])} store(s) already built")
+    print(f"💰 Estimated cost: ${cost['cost']:.4f} ({cost['backend']} at ${cost['price_per_million']}/1M tokens)")
+    print(f"⏱️ Estimated embedding time: {_format_seconds(cost['seconds'])}"
+          + (f" (sampled {cost['chunks_per_second']} chunks/s)" if cost["chunks_per_second"] else "")
+          + (f", rate limit {cost['tokens_per_minute']:,.0f} tokens/min" if cost["tokens_per_minute"] else ""))
+    missing_text = sorted({name for plan in plans for name in plan["missing_text"]})
+    if missing_text:
+        print(f"⚠️ No cached text for {', '.join(missing_text)}: their current chunks are re-embedded as they are")
+    if args.dry_run:
+        return
+
+    record = {"id": f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}", "status": "building",
+              "created_at": time.time(), "overrides": overrides, "estimate": cost, "stores": []}
+    save_record(persist_directory, record)
+    start_time, done_tokens = time.perf_counter(), 0
+    for number, plan in enumerate(plans, 1):
+        name = os.path.basename(plan["source"])
+        print(f"🔁 [{number}/{len(plans)}] {name}: {len(plan['chunks'])} chunk(s), {plan['embed_chunks']} to embed")
+        store = {"source": plan["source"], "target": plan["target"], "file_names": plan["file_names"],
+                 "previous_version": plan["previous_version"], "reused": bool(plan["reuse_snapshot"]),
+                 "snapshot": None, "version": None}
+        record["stores"].append(store)
+        try:
+            store["snapshot"] = build_store(module, plan)
+            store["version"] = os.path.basename(store["snapshot"])
+            store["validation"] = validate_store(module, plan, store["snapshot"], settings)
+        except Exception as e:
+            store["validation"] = {"ok": False, "reason": str(e)}
+        validation = store["validation"]
+        done_tokens += plan["tokens"]
+        elapsed = time.perf_counter() - start_time
+        remaining = cost["tokens"] - done_tokens
+        eta = elapsed / done_tokens * remaining if done_tokens else None
+        if not validation["ok"]:
+            print(f"❌ {name} failed validation: {validation['reason']}")
+            for built in record["stores"]:
+                _discard(built)
+            record["status"] = "failed"
+            save_record(persist_directory, record)
+            raise SystemExit(f"Re-index {record['id']} failed; nothing was switched")
+        print(f"✅ {name} -> {os.path.basename(plan['target'])}/{store['version']}: "
+              f"self-recall {validation['self_recall']}, source agreement {validation['source_agreement']} | "
+              f"{done_tokens:,}/{cost['tokens']:,} tokens in {_format_seconds(elapsed)}"
+              + (f", ETA {_format_seconds(eta)}" if remaining > 0 and eta is not None else ""))
+        save_record(persist_directory, record)
+
+    record["status"] = "built"
+    save_record(persist_directory, record)
+    if args.no_switch:
+        print(f"📦 Re-index {record['id']} built and validated; switch with --switch {record['id']}")
+        return
+    switch(record, persist_directory)
+
+
+if __name__ == "__main__":
+    main()
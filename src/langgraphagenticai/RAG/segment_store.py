@@ -0,0 +1,361 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.langgraphagenticai.RAG.catalog import VectorstoreCatalog, directory_size
+from src.langgraphagenticai.RAG.snapshot_store import SnapshotStore, process_lock
+
+SEGMENTS_DIR = "segments"
+SEGMENTS_FILE = "segments.json"
+LAST_USED_FILE = ".last_used"
+_CHUNKS_FILE = "chunks.json"
+_VECTORS_FILE = "vectors.f32.npy"
+_SEGMENT_INFO_FILE = "segment.json"
+
+
+def touch_last_used(path: str):
+    """
+    Record that a store or segment directory was just used (its LRU timestamp).
+    """
+    marker = os.path.join(path, LAST_USED_FILE)
+    try:
+        with open(marker, "a"):
+            pass
+        os.utime(marker)
+    except OSError:
+        pass
+
+
+def last_used(path: str) -> float:
+    """
+    LRU timestamp of a directory: its last-used marker, else its modification time.
+    """
+    for candidate in (os.path.join(path, LAST_USED_FILE), path):
+        try:
+            return os.path.getmtime(candidate)
+        except OSError:
+            continue
+    return 0.0
+
+
+def is_segment_snapshot(path: str) -> bool:
+    return os.path.exists(os.path.join(path, SEGMENTS_FILE))
+
+
+def write_segment_manifest(path: str, entries: List[Dict]):
+    """
+    Write the list of segments a collection snapshot is composed of ({"key", "file_name", "num_chunks"}).
+    """
+    with open(os.path.join(path, SEGMENTS_FILE), "w") as f:
+        json.dump({"segments": entries}, f, indent=2)
+
+
+def read_segment_manifest(path: str) -> List[Dict]:
+    with open(os.path.join(path, SEGMENTS_FILE)) as f:
+        return json.load(f)["segments"]
+
+
+def texts_digest(texts: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SegmentVectors:
+    """
+    Full-precision vectors of a composed collection, read from the segments' memory-mapped files.
+
+    Supports what re-scoring needs (``vectors[positions]``) without concatenating
+    every segment into RAM; ``np.asarray`` materializes the whole matrix.
+    """
+
+    def __init__(self, parts: List[np.ndarray]):
+        self.parts = parts
+        self.offsets = np.cumsum([0] + [len(part) for part in parts])
+        self.shape = (int(self.offsets[-1]), parts[0].shape[1] if parts else 0)
+        self.dtype = np.dtype(np.float32)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        if positions.ndim == 0:
+            part = int(np.searchsorted(self.offsets, positions, side="right")) - 1
+            return np.asarray(self.parts[part][positions - self.offsets[part]], dtype=np.float32)
+        rows = np.empty((len(positions), self.shape[1]), dtype=np.float32)
+        owners = np.searchsorted(self.offsets, positions, side="right") - 1
+        for part in np.unique(owners):
+            mask = owners == part
+            rows[mask] = self.parts[part][positions[mask] - self.offsets[part]]
+        return rows
+
+    def __array__(self, dtype=None, copy=None):
+        vectors = np.concatenate([np.asarray(part, dtype=np.float32) for part in self.parts]) if self.parts \
+            else np.empty(self.shape, dtype=np.float32)
+        return vectors if dtype is None else vectors.astype(dtype)
+
+
+class SegmentStore:
+    """
+    Per-document vector segments shared by every collection.
+
+    A segment holds one document's chunks (text and metadata) and their
+    full-precision embeddings, keyed by the document's content hash and the
+    ingest settings that shape its chunks and vectors. A file uploaded alone and
+    again as part of a larger set is embedded and stored once; collection
+    snapshots only list the segments they are composed of.
+
+    Layout::
+
+        vectorstore_db/segments/
+            .lock                      -> held while segments are written or deleted
+            <key>/
+                segment.json           -> file name, content hash, chunk count, texts digest
+                chunks.json            -> chunk texts and metadata
+                vectors.f32.npy        -> embeddings (row i = chunk i)
+                .last_used             -> LRU timestamp
+    """
+
+    def __init__(self, persist_directory: str):
+        """
+        Args:
+            persist_directory: Vectorstore root (segments live in its ``segments/`` directory)
+        """
+        self.root = os.path.join(persist_directory, SEGMENTS_DIR)
+        os.makedirs(self.root, exist_ok=True)
+
+    def lock(self):
+        """
+        Held while segments are written or deleted. Segments a writer just reused are
+        protected by their fresh last-used time (the collector only evicts idle data).
+        """
+        return process_lock(os.path.join(self.root, ".lock"))
+
+    @staticmethod
+    def segment_key(file_hash: str, signature: str) -> str:
+        return hashlib.sha256(f"{file_hash}|{signature}".encode()).hexdigest()[:24]
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.path(key), _SEGMENT_INFO_FILE))
+
+    def info(self, key: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.path(key), _SEGMENT_INFO_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read(self, key: str) -> Tuple[List[str], List[Dict], np.ndarray]:
+        """
+        Chunk texts, chunk metadata and memory-mapped vectors of a segment.
+        """
+        path = self.path(key)
+        with open(os.path.join(path, _CHUNKS_FILE), encoding="utf-8") as f:
+            chunks = json.load(f)
+        vectors = np.load(os.path.join(path, _VECTORS_FILE), mmap_mode="r")
+        touch_last_used(path)
+        return [chunk["page_content"] for chunk in chunks], [chunk["metadata"] for chunk in chunks], vectors
+
+    def read_vectors(self, key: str) -> np.ndarray:
+        path = self.path(key)
+        touch_last_used(path)
+        return np.load(os.path.join(path, _VECTORS_FILE), mmap_mode="r")
+
+    def write(self, key: str, texts: List[str], metadatas: List[Dict], vectors: np.ndarray, info: Dict):
+        """
+        Write a segment atomically (built in a temp directory, then renamed into place).
+        """
+        tmp_path = os.path.join(self.root, f".tmp_{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+        try:
+            with open(os.path.join(tmp_path, _CHUNKS_FILE), "w", encoding="utf-8") as f:
+                json.dump([{"page_content": text, "metadata": metadata} for text, metadata in zip(texts, metadatas)], f)
+            np.save(os.path.join(tmp_path, _VECTORS_FILE), np.ascontiguousarray(vectors, dtype=np.float32))
+            with open(os.path.join(tmp_path, _SEGMENT_INFO_FILE), "w") as f:
+                json.dump(dict(info, num_chunks=len(texts), texts_digest=texts_digest(texts), created_at=time.time()), f)
+            touch_last_used(tmp_path)
+            final_path = self.path(key)
+            if os.path.exists(final_path):
+                shutil.rmtree(final_path)
+            os.rename(tmp_path, final_path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def keys(self) -> List[str]:
+        return [name for name in os.listdir(self.root) if not name.startswith(".") and os.path.isdir(self.path(name))]
+
+
+def _store_dirs(persist_directory: str) -> List[str]:
+    return [os.path.join(persist_directory, name) for name in os.listdir(persist_directory)
+            if name.startswith("vectorstore_") and os.path.isdir(os.path.join(persist_directory, name))]
+
+
+def _referenced_segments(store_path: str) -> set:
+    """
+    Segment keys used by any version of a collection store.
+
+    Every directory below versions/ counts, not only the ones readers may load:
+    staged versions (newer than CURRENT, awaiting validation or a switch) and
+    versions still being written need their segments as much as the serving one.
+    """
+    keys = set()
+    snapshots = SnapshotStore(store_path)
+    paths = [snapshots.store_path]
+    if os.path.isdir(snapshots.versions_path):
+        paths += [os.path.join(snapshots.versions_path, name) for name in os.listdir(snapshots.versions_path)]
+    for snapshot_path in paths:
+        if os.path.isdir(snapshot_path) and is_segment_snapshot(snapshot_path):
+            try:
+                keys.update(entry["key"] for entry in read_segment_manifest(snapshot_path))
+            except (OSError, ValueError, KeyError):
+                continue
+    return keys
+
+
+def collect_garbage(persist_directory: str, budget_bytes: int, min_idle_seconds: float = 3600,
+                    in_use: Callable[[], Iterable[str]] = lambda: (), extraction_cache_dir: Optional[str] = None) -> Dict:
+    """
+    Bring ``persist_directory`` under a disk budget by evicting least recently used data.
+
+    Eviction order: cache entries that nothing depends on go first (segments no
+    collection refers to any more and extracted-text entries), oldest first; only
+    then whole collections, least recently used first, which frees their segments
+    for the next round. Anything used within ``min_idle_seconds`` and collections
+    loaded in this process are never evicted. Deleted collections are removed from
+    the catalog; uploading the files again rebuilds them.
+
+    Args:
+        persist_directory: Vectorstore root
+        budget_bytes: Disk budget for everything below persist_directory
+        min_idle_seconds: Minimum time since last use before anything is evicted
+        in_use: Returns store directories that must be kept (loaded in this process)
+        extraction_cache_dir: Extracted-text cache to evict from (if it is below persist_directory)
+
+    Returns:
+        Stats: bytes before/after, and the collections, segments and cache entries evicted
+    """
+    start_time = time.perf_counter()
+    segments = SegmentStore(persist_directory)
+    catalog = VectorstoreCatalog(os.path.join(persist_directory, "catalog.sqlite3"))
+    total = directory_size(persist_directory)
+    stats = {"bytes_before": total, "budget_bytes": budget_bytes, "collections": 0, "segments": 0, "cache_entries": 0}
+    now = time.time()
+    protected = {os.path.abspath(path) for path in in_use()}
+
+    def idle(path):
+        return now - last_used(path) >= min_idle_seconds
+
+    evicted_stores = set()
+    while total > budget_bytes:
+        with segments.lock():
+            stores = [path for path in _store_dirs(persist_directory) if path not in evicted_stores]
+            referenced = set()
+            for store_path in stores:
+                referenced |= _referenced_segments(store_path)
+            # Caches first: unreferenced segments and extracted text, oldest first
+            candidates = [(last_used(segments.path(key)), "segments", segments.path(key))
+                          for key in segments.keys() if key not in referenced and idle(segments.path(key))]
+            if extraction_cache_dir and os.path.abspath(extraction_cache_dir).startswith(os.path.abspath(persist_directory)) \
+                    and os.path.isdir(extraction_cache_dir):
+                for name in os.listdir(extraction_cache_dir):
+                    path = os.path.join(extraction_cache_dir, name)
+                    if name.endswith(".json") and now - os.path.getmtime(path) >= min_idle_seconds:
+                        candidates.append((os.path.getmtime(path), "cache_entries", path))
+            if candidates:
+                _, kind, path = min(candidates)
+                size = os.path.getsize(path) if os.path.isfile(path) else directory_size(path)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    os.remove(path)
+                total -= size
+                stats[kind] += 1
+                continue
+
+        # Then whole collections, least recently used first
+        collections = [(last_used(path), path) for path in stores
+                       if os.path.abspath(path) not in protected and idle(path)]
+        if not collections:
+            print(f"⚠️ Disk budget {budget_bytes / 1e6:.0f} MB exceeded ({total / 1e6:.0f} MB) "
+                  f"but nothing idle is left to evict")
+            break
+        _, store_path = min(collections)
+        size = directory_size(store_path)
+        with SnapshotStore(store_path).lock():
+            shutil.rmtree(store_path, ignore_errors=True)
+        catalog.delete_by_store_path(store_path)
+        evicted_stores.add(store_path)
+        total -= size
+        stats["collections"] += 1
+
+    stats["bytes_after"] = max(0, total)
+    stats["seconds"] = round(time.perf_counter() - start_time, 3)
+    if stats["collections"] or stats["segments"] or stats["cache_entries"]:
+        print(f"🧹 Disk GC: evicted {stats['collections']} collection(s), {stats['segments']} segment(s), "
+              f"{stats['cache_entries']} cache entr(ies); {stats['bytes_before'] / 1e6:.1f} -> "
+              f"{stats['bytes_after'] / 1e6:.1f} MB (budget {budget_bytes / 1e6:.0f} MB)")
+    return stats
+
+
+class DiskBudgetCollector:
+    """
+    Background thread running ``collect_garbage`` on a vectorstore root every interval.
+    """
+
+    def __init__(self, persist_directory: str, budget_bytes: int, interval_seconds: float, min_idle_seconds: float,
+                 in_use: Callable[[], Iterable[str]], extraction_cache_dir: Optional[str] = None):
+        self.persist_directory = persist_directory
+        self.budget_bytes = budget_bytes
+        self.interval = interval_seconds
+        self.min_idle_seconds = min_idle_seconds
+        self.in_use = in_use
+        self.extraction_cache_dir = extraction_cache_dir
+        self.last_stats: Dict = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vectorstore-gc", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.last_stats = collect_garbage(self.persist_directory, self.budget_bytes, self.min_idle_seconds,
+                                                  self.in_use, self.extraction_cache_dir)
+            except Exception as e:
+                print(f"⚠️ Warning: Disk GC failed: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+
+
+_collectors: Dict[str, DiskBudgetCollector] = {}
+_collectors_lock = threading.Lock()
+
+
+def start_collector(persist_directory: str, budget_bytes: int, interval_seconds: float, min_idle_seconds: float,
+                    in_use: Callable[[], Iterable[str]], extraction_cache_dir: Optional[str] = None) -> DiskBudgetCollector:
+    """
+    Process-wide background collector for a vectorstore root (started once per directory).
+    """
+    key = os.path.abspath(persist_directory)
+    with _collectors_lock:
+        collector = _collectors.get(key)
+        if collector is None:
+            collector = DiskBudgetCollector(persist_directory, budget_bytes, interval_seconds, min_idle_seconds,
+                                            in_use, extraction_cache_dir)
+            _collectors[key] = collector
+            print(f"🧹 Disk GC every {interval_seconds:.0f}s, budget {budget_bytes / 1e6:.0f} MB for {persist_directory}")
+        return collector
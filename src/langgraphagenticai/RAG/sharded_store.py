@@ -0,0 +1,378 @@
+import os
+import json
+import heapq
+import time
+import itertools
+import threading
+import weakref
+import multiprocessing
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.langgraphagenticai.RAG.dimension_reduction import DimensionReducer, attach_reducer
+from src.langgraphagenticai.RAG.metadata_filters import get_metadata_index
+from src.langgraphagenticai.RAG.vector_compression import (
+    attach_full_vectors, create_index, index_storage_mode, load_full_vectors, save_full_vectors,
+    search_vectorstore_batch
+)
+
+SHARDS_FILE = "shards.json"
+
+
+class _VectorsOnly(Embeddings):
+    """
+    Placeholder embedder for stores that are only searched by vector (shards).
+    Queries are embedded once in the parent process, never in a shard worker.
+    """
+
+    def embed_documents(self, texts):
+        raise NotImplementedError("Shard stores are searched by vector; embed queries in the parent process")
+
+    def embed_query(self, text):
+        raise NotImplementedError("Shard stores are searched by vector; embed queries in the parent process")
+
+
+def is_sharded_snapshot(path: str) -> bool:
+    return os.path.exists(os.path.join(path, SHARDS_FILE))
+
+
+def shard_ranges(total: int, num_shards: int) -> List[Tuple[int, int]]:
+    """
+    Split positions 0..total into num_shards contiguous ranges of near-equal size.
+
+    Contiguous ranges keep each file's chunks together, so metadata filters on a
+    file or page range stay range selections inside a shard.
+    """
+    num_shards = max(1, min(num_shards, total))
+    bounds = np.linspace(0, total, num_shards + 1).round().astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(num_shards)]
+
+
+def write_shard(path: str, texts: Sequence[str], metadatas: Sequence[dict], index_vectors: np.ndarray,
+                full_vectors: Optional[np.ndarray], storage_mode: str, pq_subvectors: int = 0) -> str:
+    """
+    Write one FAISS store (index.faiss / index.pkl / full vectors) to path.
+
+    Returns:
+        Storage mode of the written index
+    """
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+
+    os.makedirs(path, exist_ok=True)
+    index = create_index(index_vectors.shape[1], storage_mode, training_vectors=index_vectors, pq_subvectors=pq_subvectors)
+    store = FAISS(embedding_function=_VectorsOnly(), index=index, docstore=InMemoryDocstore(), index_to_docstore_id={})
+    store.add_embeddings(zip(texts, index_vectors), metadatas=list(metadatas))
+    store.save_local(path)
+    if full_vectors is not None:
+        save_full_vectors(path, full_vectors)
+    return index_storage_mode(index)
+
+
+def write_shards(path: str, texts: Sequence[str], metadatas: Sequence[dict], index_vectors: np.ndarray,
+                 full_vectors: Optional[np.ndarray], storage_mode: str, num_shards: int, pq_subvectors: int = 0) -> Dict:
+    """
+    Partition a collection into shard stores under path and write the shard manifest.
+
+    Args:
+        path: Snapshot directory being written
+        texts: Chunk texts, in index order
+        metadatas: Chunk metadata, in index order
+        index_vectors: Vectors held by the index (possibly reduced)
+        full_vectors: Full-precision vectors for re-scoring (None if not kept)
+        storage_mode: flat, fp16, int8 or pq (quantizers are trained per shard)
+        num_shards: Number of shards
+        pq_subvectors: PQ sub-quantizers (0 = auto)
+
+    Returns:
+        The manifest written to shards.json
+    """
+    shards = []
+    for i, (start, end) in enumerate(shard_ranges(len(texts), num_shards)):
+        name = f"shard_{i:03d}"
+        mode = write_shard(os.path.join(path, name), texts[start:end], metadatas[start:end], index_vectors[start:end],
+                           full_vectors[start:end] if full_vectors is not None else None, storage_mode, pq_subvectors)
+        shards.append({"path": name, "num_vectors": end - start, "index_type": mode})
+    manifest = {"num_shards": len(shards), "num_vectors": len(texts), "shards": shards}
+    with open(os.path.join(path, SHARDS_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_snapshot_vectors(path: str) -> Tuple[List[str], List[dict], np.ndarray, Optional[np.ndarray]]:
+    """
+    Read texts, metadata, index vectors and full vectors of a snapshot, sharded or not.
+
+    Used to re-partition a collection. Compressed indexes are decoded, so their
+    vectors are the stored approximations; the full vectors are exact when kept.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    if is_sharded_snapshot(path):
+        with open(os.path.join(path, SHARDS_FILE)) as f:
+            shard_paths = [os.path.join(path, shard["path"]) for shard in json.load(f)["shards"]]
+    else:
+        shard_paths = [path]
+
+    texts, metadatas, index_vectors, full_vectors = [], [], [], []
+    for shard_path in shard_paths:
+        store = FAISS.load_local(shard_path, _VectorsOnly(), allow_dangerous_deserialization=True)
+        for position in range(store.index.ntotal):
+            doc = store.docstore.search(store.index_to_docstore_id[position])
+            texts.append(doc.page_content)
+            metadatas.append(doc.metadata)
+        index_vectors.append(store.index.reconstruct_n(0, store.index.ntotal))
+        full = load_full_vectors(shard_path)
+        full_vectors.append(None if full is None else np.asarray(full, dtype=np.float32))
+    full = None if any(v is None for v in full_vectors) else np.concatenate(full_vectors)
+    return texts, metadatas, np.concatenate(index_vectors), full
+
+
+def _shard_worker(conn, shard_path: str, metadata: dict, dimension: int, rescore: bool):
+    """
+    Shard worker process: load one shard and answer search / count requests until closed.
+    """
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+    # One core per shard; parallelism comes from the shard processes
+    faiss.omp_set_num_threads(1)
+    store = FAISS.load_local(shard_path, _VectorsOnly(), allow_dangerous_deserialization=True)
+    reducer = DimensionReducer.from_metadata(metadata, dimension)
+    attach_reducer(store, reducer)
+    if reducer is not None or rescore:
+        attach_full_vectors(store, load_full_vectors(shard_path))
+    conn.send(("ready", store.index.ntotal, store.index.d))
+
+    while True:
+        try:
+            request_id, command, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        if command == "close":
+            return
+        try:
+            if command == "search":
+                vectors, k, rescore_factor, filters = args
+                positions = get_metadata_index(store).select(filters) if filters else None
+                rows = search_vectorstore_batch(store, vectors, k, rescore_factor, positions)
+                result = [[(doc.page_content, doc.metadata, score) for doc, score in row] for row in rows]
+            elif command == "count":
+                positions = get_metadata_index(store).select(args) if args else None
+                result = store.index.ntotal if positions is None else len(positions)
+            else:
+                raise ValueError(f"Unknown shard command: {command}")
+            conn.send((request_id, True, result))
+        except Exception as e:
+            conn.send((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class _ShardClient:
+    """
+    Parent-side handle of one shard worker.
+
+    Requests are tagged and answered in order over a pipe; a reader thread
+    resolves each caller's future, so many sessions can have requests in
+    flight to the same shard at once.
+    """
+
+    def __init__(self, context, shard_path: str, metadata: dict, dimension: int, rescore: bool):
+        self.shard_path = shard_path
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_shard_worker, args=(child_conn, shard_path, metadata, dimension, rescore),
+                                       name=f"shard-{os.path.basename(shard_path)}", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ntotal = 0
+        self.dimension = 0
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+
+    def wait_ready(self, timeout: float):
+        if not self.conn.poll(timeout):
+            raise RuntimeError(f"Shard worker for {self.shard_path} did not start within {timeout:.0f}s")
+        _, self.ntotal, self.dimension = self.conn.recv()
+        threading.Thread(target=self._read, name=f"{self.process.name}-reader", daemon=True).start()
+
+    def request(self, command: str, args) -> Future:
+        future = Future()
+        with self._send_lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self.conn.send((request_id, command, args))
+            except (OSError, ValueError) as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(RuntimeError(f"Shard worker for {self.shard_path} is not running: {e}"))
+        return future
+
+    def _read(self):
+        while True:
+            try:
+                request_id, ok, result = self.conn.recv()
+            except (EOFError, OSError):
+                for future in list(self._pending.values()):
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"Shard worker for {self.shard_path} exited"))
+                self._pending.clear()
+                return
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(f"Shard {os.path.basename(self.shard_path)}: {result}"))
+
+    def close(self):
+        try:
+            with self._send_lock:
+                self.conn.send((None, "close", None))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+def _close_shards(clients: List[_ShardClient]):
+    for client in clients:
+        client.close()
+
+
+class ShardSelection:
+    """
+    Metadata filter resolved against every shard (how many chunks match in each).
+    """
+
+    def __init__(self, filters: dict, counts: List[int]):
+        self.filters = filters
+        self.counts = counts
+
+    def __len__(self):
+        return sum(self.counts)
+
+
+class ShardedIndexInfo:
+    """
+    What callers read from ``store.index`` of a sharded store (size, dimension, storage mode).
+    """
+
+    def __init__(self, ntotal: int, d: int, storage_mode: str):
+        self.ntotal = ntotal
+        self.d = d
+        self.storage_mode = storage_mode
+
+
+class ShardedVectorStore:
+    """
+    A collection partitioned across shard worker processes.
+
+    Each shard is a regular FAISS store (index, docstore, full vectors) served by
+    its own process, so the collection is not limited by one process's memory and
+    searches run on as many cores as there are shards. A search sends the query
+    vectors to every shard at once (scatter) and merges the per-shard top-k
+    (gather). Metadata filters are evaluated inside the shards; shards with no
+    matching chunks are skipped.
+    """
+
+    def __init__(self, snapshot_path: str, metadata: dict, embeddings, dimension: int, rescore: bool = True,
+                 start_method: str = "spawn", timeout: float = 60):
+        """
+        Args:
+            snapshot_path: Snapshot directory containing shards.json
+            metadata: Snapshot metadata (embedding and reduction settings)
+            embeddings: Embedding backend used for text queries
+            dimension: Full embedding dimension
+            rescore: Re-rank compressed / reduced shards with their full vectors
+            start_method: multiprocessing start method for the workers
+            timeout: Seconds to wait for a worker to start or answer
+        """
+        with open(os.path.join(snapshot_path, SHARDS_FILE)) as f:
+            self.manifest = json.load(f)
+        self.snapshot_path = snapshot_path
+        self.embedding_function = embeddings
+        self.timeout = timeout
+        start_time = time.perf_counter()
+        context = multiprocessing.get_context(start_method)
+        self.shards = [
+            _ShardClient(context, os.path.join(snapshot_path, shard["path"]), metadata, dimension, rescore)
+            for shard in self.manifest["shards"]
+        ]
+        # Workers are stopped when the store is garbage collected or the process exits
+        self._finalizer = weakref.finalize(self, _close_shards, list(self.shards))
+        try:
+            for shard in self.shards:
+                shard.wait_ready(timeout)
+        except Exception:
+            self._finalizer()
+            raise
+        modes = {shard["index_type"] for shard in self.manifest["shards"]}
+        self.index = ShardedIndexInfo(sum(shard.ntotal for shard in self.shards), self.shards[0].dimension,
+                                      modes.pop() if len(modes) == 1 else "mixed")
+        print(f"🧩 Started {len(self.shards)} shard worker(s) for {self.index.ntotal} vectors "
+              f"in {time.perf_counter() - start_time:.2f}s")
+
+    def _gather(self, futures: List[Future]) -> List:
+        return [future.result(timeout=self.timeout) for future in futures]
+
+    def select(self, filters: dict) -> ShardSelection:
+        """
+        Count the chunks matching filters in every shard.
+        """
+        counts = self._gather([shard.request("count", filters) for shard in self.shards])
+        return ShardSelection(filters, counts)
+
+    def search_by_vectors(self, query_vectors, k: int, rescore_factor: int = 1,
+                          positions: Optional[ShardSelection] = None) -> List[List]:
+        """
+        Scatter query vectors to the shards and merge their top-k per query.
+
+        Args:
+            query_vectors: Full-dimension query embeddings (n x d)
+            k: Number of results per query
+            rescore_factor: Candidates fetched per result when shards re-score
+            positions: Metadata selection from ``select`` (None searches everything)
+
+        Returns:
+            One list of (document, squared L2 distance) tuples per query, best first
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        filters = positions.filters if positions is not None else None
+        targets = [shard for i, shard in enumerate(self.shards) if positions is None or positions.counts[i]]
+        futures = [shard.request("search", (queries, k, rescore_factor, filters)) for shard in targets]
+        merged = [[] for _ in range(len(queries))]
+        for shard_rows in self._gather(futures):
+            for row, hits in zip(merged, shard_rows):
+                row.extend(hits)
+        return [
+            [(Document(page_content=text, metadata=metadata), score)
+             for text, metadata, score in heapq.nsmallest(k, row, key=lambda hit: hit[2])]
+            for row in merged
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> List:
+        return self.search_by_vectors([self.embedding_function.embed_query(query)], k)[0]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20, **kwargs) -> List:
+        """
+        Plain similarity search: MMR would need every shard's candidate vectors in one place.
+        """
+        return self.similarity_search(query, k)
+
+    def stats(self) -> List[Dict]:
+        return [{"shard": os.path.basename(shard.shard_path), "pid": shard.process.pid,
+                 "vectors": shard.ntotal, "alive": shard.process.is_alive()} for shard in self.shards]
+
+    def close(self):
+        self._finalizer()
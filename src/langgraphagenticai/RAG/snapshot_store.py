@@ -0,0 +1,358 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+CURRENT_POINTER = "CURRENT"
+VERSIONS_DIR = "versions"
+LOCK_FILE = ".lock"
+TMP_PREFIX = ".tmp-"
+LEGACY_VERSION = "legacy"
+SUPERSEDED_FILE = "superseded.json"
+
+
+def _fsync_file(path: str):
+    """fsync a single file by path."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(path: str):
+    """fsync a directory so renames/creates inside it are durable (no-op where unsupported)."""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_tree(path: str):
+    """fsync every file and directory below path (bottom-up)."""
+    for root, _dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            _fsync_file(os.path.join(root, name))
+        _fsync_dir(root)
+
+
+class _ProcessFileLock:
+    """
+    Exclusive lock on a lock file that is re-entrant within a thread.
+
+    Threads of the same process are serialized by an RLock (flock is per open file
+    description, so two flocks from one process would not exclude each other);
+    other processes are excluded by an OS-level lock on the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._rlock.acquire()
+        if self._depth == 0:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+                else:  # pragma: no cover - Windows
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+            except Exception:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._rlock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:  # pragma: no cover - Windows
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._rlock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+_LOCKS: Dict[str, _ProcessFileLock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _get_lock(lock_path: str) -> _ProcessFileLock:
+    lock_path = os.path.abspath(lock_path)
+    with _LOCKS_GUARD:
+        lock = _LOCKS.get(lock_path)
+        if lock is None:
+            lock = _LOCKS[lock_path] = _ProcessFileLock(lock_path)
+        return lock
+
+
+def process_lock(lock_path: str) -> _ProcessFileLock:
+    """
+    Cross-process lock on a lock file, re-entrant within a thread (use as a context manager).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    return _get_lock(lock_path)
+
+
+class SnapshotStore:
+    """
+    Versioned, crash-safe on-disk layout for a single vectorstore.
+
+    Layout::
+
+        vectorstore_<hash>/
+            CURRENT              -> "v000003" (replaced atomically)
+            .lock                -> writer lock file
+            superseded.json      -> when each version stopped being CURRENT
+            versions/
+                v000001/         -> immutable snapshot (index.faiss, index.pkl, metadata.json)
+                v000002/
+                v000003/
+
+    Writers build a new snapshot in a temp directory, fsync it, rename it into
+    ``versions/`` and then atomically swap the ``CURRENT`` pointer, all while
+    holding the per-store lock. Readers never take the lock: they follow
+    ``CURRENT`` to a directory that is never modified after publish. Since a
+    reader may have resolved ``CURRENT`` just before a switch, a version is only
+    pruned once it has been superseded for ``prune_grace_seconds``.
+    """
+
+    def __init__(self, store_path: str, keep_versions: int = 3, prune_grace_seconds: float = 600):
+        """
+        Args:
+            store_path: Root directory of the store (e.g. ./vectorstore_db/vectorstore_<hash>)
+            keep_versions: Number of published versions to retain (default: 3)
+            prune_grace_seconds: Time a version stays on disk after it stopped being CURRENT,
+                                 for readers that resolved it before the switch to finish loading
+        """
+        self.store_path = store_path
+        self.keep_versions = max(1, keep_versions)
+        self.prune_grace_seconds = prune_grace_seconds
+        self.versions_path = os.path.join(store_path, VERSIONS_DIR)
+
+    def lock(self) -> _ProcessFileLock:
+        """
+        Return the per-store writer lock (use as a context manager).
+        """
+        os.makedirs(self.store_path, exist_ok=True)
+        return _get_lock(os.path.join(self.store_path, LOCK_FILE))
+
+    def list_versions(self) -> List[str]:
+        """
+        List published version names, oldest first.
+        """
+        if not os.path.isdir(self.versions_path):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_path)
+            if name.startswith("v") and os.path.isdir(os.path.join(self.versions_path, name))
+        )
+
+    def current_version(self) -> Optional[str]:
+        """
+        Read the CURRENT pointer. Falls back to the legacy flat layout
+        (index files directly in the store directory) if no pointer exists.
+        """
+        pointer = os.path.join(self.store_path, CURRENT_POINTER)
+        try:
+            with open(pointer, "r") as f:
+                version = f.read().strip()
+            if version and os.path.isdir(os.path.join(self.versions_path, version)):
+                return version
+        except FileNotFoundError:
+            pass
+        if os.path.exists(os.path.join(self.store_path, "index.faiss")):
+            return LEGACY_VERSION
+        return None
+
+    def version_path(self, version: str) -> str:
+        if version == LEGACY_VERSION:
+            return self.store_path
+        return os.path.join(self.versions_path, version)
+
+    def current_path(self) -> Optional[str]:
+        """
+        Path of the snapshot CURRENT points to, or None if nothing is published.
+        """
+        version = self.current_version()
+        return self.version_path(version) if version else None
+
+    def candidate_paths(self) -> List[str]:
+        """
+        Snapshot paths a reader should try, newest usable first: the CURRENT
+        snapshot, then older retained versions, then the legacy layout.
+
+        Versions newer than CURRENT are staged (not switched to yet) or rolled
+        back, and are never served.
+        """
+        paths = []
+        current_version = self.current_version()
+        current = self.version_path(current_version) if current_version else None
+        if current:
+            paths.append(current)
+        for version in reversed(self.list_versions()):
+            if current_version and (current_version == LEGACY_VERSION or version > current_version):
+                continue
+            path = self.version_path(version)
+            if path not in paths:
+                paths.append(path)
+        if os.path.exists(os.path.join(self.store_path, "index.faiss")) and self.store_path not in paths:
+            paths.append(self.store_path)
+        return paths
+
+    def publish(self, write_fn: Callable[[str], None], metadata: Optional[dict] = None,
+                make_current: bool = True) -> str:
+        """
+        Atomically publish a new snapshot version.
+
+        Args:
+            write_fn: Callable that writes the snapshot files into the directory it is given
+            metadata: Optional metadata written to metadata.json inside the snapshot
+            make_current: Swap CURRENT to the new version; False stages it for a later set_current
+
+        Returns:
+            Path to the published snapshot directory
+        """
+        with self.lock():
+            os.makedirs(self.versions_path, exist_ok=True)
+            self._remove_stale_temp_dirs()
+
+            tmp_path = os.path.join(self.versions_path, f"{TMP_PREFIX}{uuid.uuid4().hex}")
+            os.makedirs(tmp_path)
+            try:
+                write_fn(tmp_path)
+
+                existing = self.list_versions()
+                next_number = int(existing[-1][1:]) + 1 if existing else 1
+                version = f"v{next_number:06d}"
+
+                if metadata is not None:
+                    snapshot_metadata = dict(metadata)
+                    snapshot_metadata["version"] = version
+                    with open(os.path.join(tmp_path, "metadata.json"), "w") as f:
+                        json.dump(snapshot_metadata, f, indent=2)
+
+                _fsync_tree(tmp_path)
+                final_path = os.path.join(self.versions_path, version)
+                os.rename(tmp_path, final_path)
+                _fsync_dir(self.versions_path)
+            except Exception:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+
+            if make_current:
+                self._write_pointer(version)
+                self._prune(version)
+                print(f"📌 Published snapshot {version} at {final_path}")
+            else:
+                self._prune(self.current_version() or version)
+                print(f"📌 Staged snapshot {version} at {final_path} (CURRENT unchanged)")
+            return final_path
+
+    def set_current(self, version: str):
+        """
+        Point CURRENT at an existing version (switch to a staged version, or roll back).
+        """
+        with self.lock():
+            if not os.path.isdir(os.path.join(self.versions_path, version)):
+                raise ValueError(f"Snapshot version not found: {version}")
+            self._write_pointer(version)
+
+    def _write_pointer(self, version: str):
+        previous = self.current_version()
+        if previous and previous not in (version, LEGACY_VERSION):
+            superseded = self._read_superseded()
+            superseded[previous] = time.time()
+            self._write_superseded(superseded)
+        pointer = os.path.join(self.store_path, CURRENT_POINTER)
+        tmp_pointer = f"{pointer}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)
+        _fsync_dir(self.store_path)
+
+    def _read_superseded(self) -> Dict[str, float]:
+        try:
+            with open(os.path.join(self.store_path, SUPERSEDED_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_superseded(self, superseded: Dict[str, float]):
+        path = os.path.join(self.store_path, SUPERSEDED_FILE)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(superseded, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _prune(self, current_version: str):
+        """
+        Remove versions beyond the retention window: never the current one, nor one
+        superseded less than prune_grace_seconds ago. Versions without a record
+        (written before records were kept) count as superseded when the next version was published.
+        """
+        versions = self.list_versions()
+        superseded = self._read_superseded()
+        now = time.time()
+        pruned = []
+        for index, version in enumerate(versions[:-self.keep_versions]):
+            if version == current_version:
+                continue
+            superseded_at = superseded.get(version)
+            if superseded_at is None:
+                try:
+                    superseded_at = os.path.getmtime(os.path.join(self.versions_path, versions[index + 1]))
+                except OSError:
+                    continue
+            if now - superseded_at < self.prune_grace_seconds:
+                continue
+            shutil.rmtree(os.path.join(self.versions_path, version), ignore_errors=True)
+            pruned.append(version)
+            print(f"🗑️ Pruned old snapshot {version}")
+        remaining = {version: at for version, at in superseded.items() if version not in pruned and version in versions}
+        if remaining != superseded:
+            self._write_superseded(remaining)
+
+    def _remove_stale_temp_dirs(self, max_age_seconds: float = 3600):
+        """Clean up temp directories left behind by writers that crashed mid-publish."""
+        now = time.time()
+        for name in os.listdir(self.versions_path):
+            if not name.startswith(TMP_PREFIX):
+                continue
+            path = os.path.join(self.versions_path, name)
+            try:
+                if now - os.path.getmtime(path) > max_age_seconds:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,311 @@
+import os
+import time
+import weakref
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import faiss
+
+from src.langgraphagenticai.RAG.dimension_reduction import DimensionReducer, get_reducer
+from src.langgraphagenticai.RAG.metadata_filters import id_selector
+
+
+STORAGE_MODES = ("flat", "fp16", "int8", "pq")
+FULL_VECTORS_FILE = "vectors.f32.npy"
+
+# Minimum training set for 8-bit product quantization (one point per centroid)
+_PQ_MIN_TRAINING = 256
+
+# Full-precision vectors attached to loaded vectorstores, used for exact re-scoring
+_FULL_VECTORS = weakref.WeakKeyDictionary()
+
+
+def _default_pq_subvectors(dimension: int) -> int:
+    """Largest divisor of dimension not above dimension/4 (8-bit codes -> 16x smaller than float32)."""
+    target = max(1, dimension // 4)
+    for m in range(target, 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def create_index(dimension: int, mode: str = "flat", training_vectors: Optional[np.ndarray] = None,
+                 pq_subvectors: int = 0) -> faiss.Index:
+    """
+    Create an empty (trained, if needed) FAISS index for a storage mode.
+
+    Args:
+        dimension: Vector dimension
+        mode: "flat" (float32), "fp16" / "int8" (scalar quantization) or "pq" (product quantization)
+        training_vectors: Vectors used to train quantizers (required for "int8" and "pq")
+        pq_subvectors: Number of PQ sub-quantizers (0 = auto, 16x compression)
+
+    Returns:
+        Empty FAISS index using L2 distance
+    """
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unsupported vector storage mode: {mode}. Choose one of {', '.join(STORAGE_MODES)}")
+
+    if mode == "pq" and (training_vectors is None or len(training_vectors) < _PQ_MIN_TRAINING):
+        count = 0 if training_vectors is None else len(training_vectors)
+        print(f"⚠️ Only {count} vectors - PQ needs at least {_PQ_MIN_TRAINING} to train, using int8 instead")
+        mode = "int8"
+
+    if mode == "flat":
+        return faiss.IndexFlatL2(dimension)
+    if mode == "fp16":
+        return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_L2)
+
+    if mode == "int8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    else:
+        m = pq_subvectors or _default_pq_subvectors(dimension)
+        if dimension % m != 0:
+            raise ValueError(f"PQ sub-quantizers ({m}) must divide the vector dimension ({dimension})")
+        index = faiss.IndexPQ(dimension, m, 8, faiss.METRIC_L2)
+
+    if training_vectors is None:
+        raise ValueError(f"Storage mode '{mode}' needs training vectors")
+    index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+    return index
+
+
+def index_storage_mode(index: faiss.Index) -> str:
+    """
+    Storage mode name of an existing index.
+    """
+    # Sharded stores describe their shards' indexes
+    if isinstance(getattr(index, "storage_mode", None), str):
+        return index.storage_mode
+    if isinstance(index, faiss.IndexPQ):
+        return "pq"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+    return "flat"
+
+
+def save_full_vectors(path: str, vectors: np.ndarray):
+    """
+    Write full-precision vectors next to a snapshot (row i = index position i).
+    """
+    np.save(os.path.join(path, FULL_VECTORS_FILE), np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def load_full_vectors(path: str) -> Optional[np.ndarray]:
+    """
+    Memory-map the full-precision vectors of a snapshot, if it has any.
+    """
+    vectors_file = os.path.join(path, FULL_VECTORS_FILE)
+    if not os.path.exists(vectors_file):
+        return None
+    return np.load(vectors_file, mmap_mode="r")
+
+
+def attach_full_vectors(vectorstore, vectors: Optional[np.ndarray]):
+    """
+    Associate full-precision vectors with a loaded vectorstore for re-scoring.
+    """
+    if vectors is None:
+        _FULL_VECTORS.pop(vectorstore, None)
+    else:
+        _FULL_VECTORS[vectorstore] = vectors
+
+
+def get_full_vectors(vectorstore) -> Optional[np.ndarray]:
+    return _FULL_VECTORS.get(vectorstore)
+
+
+def rescore(query_vector: np.ndarray, candidate_ids: Sequence[int], full_vectors: np.ndarray):
+    """
+    Exact squared L2 distances of candidates, re-ranked.
+
+    Args:
+        query_vector: Full-precision query vector (1-D)
+        candidate_ids: Index positions of the candidates
+        full_vectors: Full-precision vectors (array or memmap) indexed by position
+
+    Returns:
+        (ids, distances) sorted by ascending distance
+    """
+    ids = np.asarray(candidate_ids, dtype=np.int64)
+    if ids.size == 0:
+        return ids, np.empty(0, dtype=np.float32)
+    # Sorted positions make memmap reads sequential
+    order = np.argsort(ids)
+    candidates = np.asarray(full_vectors[ids[order]], dtype=np.float32)
+    distances = ((candidates - query_vector[None, :]) ** 2).sum(axis=1)
+    ranked = np.argsort(distances)
+    return ids[order][ranked], distances[ranked]
+
+
+def search_vectorstore(vectorstore, query_vector, k: int, rescore_factor: int = 1,
+                       positions: Optional[np.ndarray] = None) -> List:
+    """
+    Search a LangChain FAISS vectorstore by vector in up to two stages.
+
+    Stage one searches the index, using the reduced query vector if the store
+    indexes reduced-dimension vectors. Stage two re-ranks the candidates against
+    the full-precision vectors when they are attached (compressed or reduced stores).
+
+    Args:
+        vectorstore: LangChain FAISS vectorstore
+        query_vector: Full-dimension query embedding
+        k: Number of results
+        rescore_factor: Candidates fetched per result when re-scoring
+        positions: Only search these index positions (metadata pre-filter)
+
+    Returns:
+        List of (document, squared L2 distance) tuples, best first
+    """
+    return search_vectorstore_batch(vectorstore, [query_vector], k, rescore_factor, positions)[0]
+
+
+def search_vectorstore_batch(vectorstore, query_vectors, k: int, rescore_factor: int = 1,
+                             positions: Optional[np.ndarray] = None) -> List[List]:
+    """
+    Search a vectorstore for several queries with one matrix ``index.search``.
+
+    Same two stages as ``search_vectorstore``; re-scoring runs per query on its
+    own candidates.
+
+    Args:
+        vectorstore: LangChain FAISS vectorstore
+        query_vectors: Full-dimension query embeddings (n x d)
+        k: Number of results per query
+        rescore_factor: Candidates fetched per result when re-scoring
+        positions: Only search these index positions (sorted; from a metadata filter).
+                   FAISS skips every other vector via an ID selector, so the filter
+                   costs nothing extra and top-k is filled from matching chunks only.
+
+    Returns:
+        One list of (document, squared L2 distance) tuples per query, best first
+    """
+    # Sharded stores scatter the search to their worker processes
+    search_by_vectors = getattr(vectorstore, "search_by_vectors", None)
+    if search_by_vectors is not None:
+        return search_by_vectors(query_vectors, k, rescore_factor, positions)
+    queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+    if positions is not None and len(positions) == 0:
+        return [[] for _ in range(len(queries))]
+    reducer = get_reducer(vectorstore)
+    index_queries = reducer.reduce(queries) if reducer is not None else queries
+    full_vectors = get_full_vectors(vectorstore)
+    fetch_k = k * max(1, rescore_factor) if full_vectors is not None else k
+    searchable = vectorstore.index.ntotal if positions is None else len(positions)
+    if positions is None:
+        distances, found = vectorstore.index.search(index_queries, min(fetch_k, max(1, searchable)))
+    elif isinstance(vectorstore.index, faiss.IndexPQ):
+        # IndexPQ takes no search parameters: score the selected codes directly
+        distances, found = _search_subset(vectorstore.index, index_queries, positions, min(fetch_k, searchable))
+    else:
+        params = faiss.SearchParameters(sel=id_selector(positions))
+        distances, found = vectorstore.index.search(index_queries, min(fetch_k, searchable), params=params)
+
+    all_results = []
+    for row in range(len(queries)):
+        hits = [(int(i), float(d)) for i, d in zip(found[row], distances[row]) if i != -1]
+        if full_vectors is not None and hits:
+            ids, exact = rescore(queries[row], [i for i, _ in hits], full_vectors)
+            hits = list(zip(ids.tolist(), exact.tolist()))
+        results = []
+        for position, score in hits[:k]:
+            doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[position])
+            results.append((doc, score))
+        all_results.append(results)
+    return all_results
+
+
+def _search_subset(index: faiss.Index, queries: np.ndarray, positions: np.ndarray, k: int):
+    """
+    Exact top-k over the decoded vectors at the given positions (same shapes as index.search).
+    """
+    vectors = index.reconstruct_batch(np.ascontiguousarray(positions, dtype=np.int64))
+    distances = ((queries ** 2).sum(axis=1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(axis=1)[None, :])
+    order = np.argsort(distances, axis=1)[:, :k]
+    return np.take_along_axis(distances, order, axis=1), positions[order]
+
+
+def compression_report(vectors: np.ndarray, k: int = 10, num_queries: int = 200,
+                       modes: Sequence[str] = STORAGE_MODES, rescore_factor: int = 4,
+                       pq_subvectors: int = 0, seed: int = 0,
+                       reducer: Optional[DimensionReducer] = None) -> List[Dict]:
+    """
+    Measure size, speed and recall of each storage mode against exact float32 search.
+
+    Queries are a random sample of the stored vectors with small noise added, so
+    the report can run on any collection without a labelled query set.
+
+    Args:
+        vectors: Full-precision vectors of a collection (n x d)
+        k: Recall is measured as overlap with the exact top-k
+        num_queries: Number of sampled queries
+        modes: Storage modes to evaluate
+        rescore_factor: Candidates per result for the re-scored variant
+        pq_subvectors: PQ sub-quantizers (0 = auto)
+        seed: Random seed for query sampling
+        reducer: Optional dimension reducer; the index then holds reduced vectors
+                 and re-scoring uses the full-dimension ones
+
+    Returns:
+        One dict per mode with bytes per vector, compression ratio (of the index
+        alone, and with the full vectors re-scoring saves next to it), recall@k
+        (with and without re-scoring) and search time per query
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, d = vectors.shape
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(n, size=min(num_queries, n), replace=False)
+    queries = vectors[sample] + rng.normal(scale=0.01, size=(len(sample), d)).astype(np.float32)
+
+    exact = faiss.IndexFlatL2(d)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    flat_bytes = len(faiss.serialize_index(exact)) / n
+
+    index_vectors = reducer.reduce(vectors) if reducer is not None else vectors
+    index_queries = reducer.reduce(queries) if reducer is not None else queries
+
+    report = []
+    for mode in modes:
+        index = create_index(index_vectors.shape[1], mode, training_vectors=index_vectors, pq_subvectors=pq_subvectors)
+        index.add(index_vectors)
+        bytes_per_vector = len(faiss.serialize_index(index)) / n
+
+        start = time.perf_counter()
+        _, approx = index.search(index_queries, k)
+        search_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        _, candidates = index.search(index_queries, min(n, k * rescore_factor))
+        rescored = [rescore(q, [c for c in row if c != -1], vectors)[0][:k] for q, row in zip(queries, candidates)]
+
+        # Re-scoring keeps the float32 vectors on disk next to the index (a full-dimension flat index needs none)
+        full_bytes = 0 if index.d == d and index_storage_mode(index) == "flat" else 4 * d
+        recall = np.mean([len(set(a) & set(t)) / k for a, t in zip(approx, truth)])
+        recall_rescored = np.mean([len(set(r.tolist()) & set(t)) / k for r, t in zip(rescored, truth)])
+        report.append({
+            "mode": index_storage_mode(index),
+            "dims": index.d,
+            "bytes_per_vector": round(bytes_per_vector, 1),
+            "compression": round(flat_bytes / bytes_per_vector, 1),
+            "compression_with_rescore": round(flat_bytes / (bytes_per_vector + full_bytes), 1),
+            f"recall@{k}": round(float(recall), 4),
+            f"recall@{k}_rescored": round(float(recall_rescored), 4),
+            "search_ms_per_query": round(search_ms, 4),
+        })
+    return report
+
+
+def format_compression_report(report: List[Dict]) -> str:
+    """
+    Render a compression report as a plain-text table.
+    """
+    if not report:
+        return "(empty report)"
+    columns = list(report[0].keys())
+    widths = {c: max(len(c), *(len(str(row[c])) for row in report)) for c in columns}
+    lines = ["  ".join(c.ljust(widths[c]) for c in columns)]
+    lines.append("  ".join("-" * widths[c] for c in columns))
+    for row in report:
+        lines.append("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+    return "\n".join(lines)
@@ -1,13 +1,12 @@
 from langgraph.graph import StateGraph, START,END, MessagesState
-from langgraph.prebuilt import tools_condition,ToolNode
-from langchain_core.prompts import ChatPromptTemplate
 from src.langgraphagenticai.state.state import State
 from src.langgraphagenticai.nodes.basic_chatbot_node import BasicChatbotNode
-from src.langgraphagenticai.nodes.chatbot_with_Tool_node import ChatbotWithToolNode
-from src.langgraphagenticai.tools.serach_tool import get_tools,create_tool_node
-from src.langgraphagenticai.nodes.rag_node import RAGNode
-
+from src.langgraphagenticai.ui.uiconfigfile import Config
+import time
 
+# Tool, RAG and router dependencies (langgraph.prebuilt, langchain_community,
+# FAISS, the embedding backends) are imported inside the build method of the
+# use case that needs them, so "Basic Chatbot" never pays for them.
 
 
 class GraphBuilder:
@@ -37,6 +36,10 @@ class GraphBuilder:
         capabilities, and sets up conditional and direct edges between nodes. 
         The chatbot node is set as the entry point.
         """
+        from langgraph.prebuilt import tools_condition
+        from src.langgraphagenticai.nodes.chatbot_with_Tool_node import ChatbotWithToolNode
+        from src.langgraphagenticai.tools.serach_tool import get_tools,create_tool_node
+
         ## Define the tool and tool node
 
         tools=get_tools()
@@ -63,8 +66,10 @@ class GraphBuilder:
         Builds a RAG graph with document processing, retrieval, and response generation.
         
         Args:
-            openai_api_key: OpenAI API key for embeddings
+            openai_api_key: OpenAI API key for embeddings (only needed by the "openai" embedding backend)
         """
+        from src.langgraphagenticai.nodes.rag_node import RAGNode
+
         print("rag started--")
         rag_node = RAGNode(self.llm, openai_api_key)
         
@@ -77,13 +82,80 @@ class GraphBuilder:
         self.graph_builder.add_edge("retrieve_context", "generate_response")
         self.graph_builder.add_edge("generate_response", END)
     
+    def agentic_build_graph(self, openai_api_key: str):
+        """
+        Builds a single agentic graph with a router in front of the three paths.
+        
+        The router sends each turn to a direct LLM answer, the RAG pipeline or the
+        web search tool loop. Chit-chat and follow-ups take the direct path and never
+        touch the embedding backend or the vectorstore.
+        
+        Args:
+            openai_api_key: OpenAI API key for embeddings (only needed by the "openai" embedding backend)
+        """
+        from langgraph.prebuilt import tools_condition
+        from src.langgraphagenticai.nodes.chatbot_with_Tool_node import ChatbotWithToolNode
+        from src.langgraphagenticai.nodes.rag_node import RAGNode
+        from src.langgraphagenticai.nodes.router_node import RouterNode, get_routing_stats
+        from src.langgraphagenticai.tools.serach_tool import get_tools,create_tool_node
+
+        router_settings = Config().get_router_settings()
+        stats = get_routing_stats(router_settings["log_file"])
+        routes = {"direct": "direct_answer"}
+
+        # Direct answer
+        self.graph_builder.add_node("direct_answer", BasicChatbotNode(self.llm).process)
+        self.graph_builder.add_edge("direct_answer", END)
+
+        # Retrieval path (skipped if the embedding backend cannot be set up)
+        try:
+            rag_node = RAGNode(self.llm, openai_api_key)
+            retrieval_timer = {}
+
+            def process_documents(state):
+                retrieval_timer["start"] = time.perf_counter()
+                return rag_node.process_documents(state)
+
+            def retrieve_context(state):
+                result = rag_node.retrieve_context(state)
+                if "start" in retrieval_timer and not result.get("error"):
+                    stats.record_retrieval(time.perf_counter() - retrieval_timer["start"])
+                return result
+
+            self.graph_builder.add_node("process_documents", process_documents)
+            self.graph_builder.add_node("retrieve_context", retrieve_context)
+            self.graph_builder.add_node("generate_response", rag_node.generate_response)
+            self.graph_builder.add_edge("process_documents", "retrieve_context")
+            self.graph_builder.add_edge("retrieve_context", "generate_response")
+            self.graph_builder.add_edge("generate_response", END)
+            routes["rag"] = "process_documents"
+        except Exception as e:
+            print(f"⚠️ Warning: Retrieval route disabled: {str(e)}")
+
+        # Web search path (skipped if the search backend cannot be set up)
+        try:
+            tools = get_tools()
+            self.graph_builder.add_node("chatbot", ChatbotWithToolNode(self.llm).create_chatbot(tools))
+            self.graph_builder.add_node("tools", create_tool_node(tools))
+            self.graph_builder.add_conditional_edges("chatbot", tools_condition)
+            self.graph_builder.add_edge("tools", "chatbot")
+            routes["web"] = "chatbot"
+        except Exception as e:
+            print(f"⚠️ Warning: Web search route disabled: {str(e)}")
+
+        router = RouterNode(self.llm, available_routes=routes.keys(),
+                            llm_fallback=router_settings["llm_fallback"], stats=stats)
+        self.graph_builder.add_node("router", router.route)
+        self.graph_builder.add_edge(START, "router")
+        self.graph_builder.add_conditional_edges("router", router.next_node, routes)
+    
     def setup_graph(self, usecase: str, openai_api_key: str = None):
         """
         Sets up the graph for the selected use case.
         
         Args:
             usecase: The selected use case
-            openai_api_key: OpenAI API key (required for RAG Chatbot)
+            openai_api_key: OpenAI API key (required for RAG Chatbot with the "openai" embedding backend)
         """
         print("usecase--",usecase)
         if usecase == "Basic Chatbot":
@@ -93,9 +165,11 @@ class GraphBuilder:
             self.chatbot_with_tools_build_graph()
             
         if usecase == "RAG Chatbot":
-            if not openai_api_key:
-                raise ValueError("OpenAI API key is required for RAG Chatbot")
+            # The embedding backend validates its own credentials (only "openai" needs a key)
             self.rag_build_graph(openai_api_key)
+
+        if usecase == "Agentic Assistant":
+            self.agentic_build_graph(openai_api_key)
             
         return self.graph_builder.compile()
         
@@ -1,9 +1,10 @@
 import streamlit as st
 import json
+import os
+from src.langgraphagenticai.RAG.preloader import start_preloader
 from src.langgraphagenticai.ui.streamlitui.loadui import LoadStreamlitUI
-from src.langgraphagenticai.LLMS.groqllm import GroqLLM
-from src.langgraphagenticai.graph.graph_builder import GraphBuilder
-from src.langgraphagenticai.ui.streamlitui.display_result import DisplayResultStreamlit
+from src.langgraphagenticai.ui.uiconfigfile import Config
+from src.langgraphagenticai.utils.profiler import profile_request, profile_stage, should_profile
 
 # MAIN Function START
 def load_langgraph_agenticai_app():
@@ -14,6 +15,12 @@ def load_langgraph_agenticai_app():
     implementing exception handling for robustness.
     """
    
+    # Warm the hot collections in the background, once per process (the page renders meanwhile)
+    config = Config()
+    preload = config.get_preload_settings()
+    start_preloader(config.get_vectorstore_dir(), preload["collections"], preload["ready_file"] or None,
+                    openai_api_key=os.environ.get("OPENAI_API_KEY"))
+
     # Load UI
     ui = LoadStreamlitUI()
     user_input = ui.load_streamlit_ui()
@@ -26,6 +33,12 @@ def load_langgraph_agenticai_app():
     user_message = st.chat_input("Enter your message:")
 
     if user_message:
+            # LLM, graph and result modules load on the first message so the page renders first
+            from src.langgraphagenticai.LLMS.groqllm import GroqLLM
+            from src.langgraphagenticai.graph.graph_builder import GraphBuilder
+            from src.langgraphagenticai.ui.streamlitui.display_result import DisplayResultStreamlit
+            from src.langgraphagenticai.utils.rate_limiter import describe_rate_limit
+
             try:
                 # Configure LLM
                 obj_llm_config = GroqLLM(user_controls_input=user_input)
@@ -46,13 +59,29 @@ def load_langgraph_agenticai_app():
                 graph_builder=GraphBuilder(model)
                 try:
                     # Get OpenAI API key and uploaded files for RAG Chatbot
-                    openai_api_key = user_input.get('OPENAI_API_KEY', None) if usecase == "RAG Chatbot" else None
-                    uploaded_files = user_input.get('uploaded_files', []) if usecase == "RAG Chatbot" else None
+                    uses_rag = usecase in ("RAG Chatbot", "Agentic Assistant")
+                    openai_api_key = user_input.get('OPENAI_API_KEY', None) if uses_rag else None
+                    uploaded_files = user_input.get('uploaded_files', []) if uses_rag else None
+                    collections = user_input.get('selected_collections', []) if uses_rag else None
                     
-                    graph = graph_builder.setup_graph(usecase, openai_api_key=openai_api_key)
-                    DisplayResultStreamlit(usecase, graph, user_message, uploaded_files=uploaded_files).display_result_on_ui()
+                    # Profile this request if toggled in the sidebar or picked by PROFILING_SAMPLE_RATE
+                    profiling = Config().get_profiling_settings()
+                    enabled = should_profile(user_input.get('profile_request', False), profiling["sample_rate"])
+                    with profile_request(enabled, label=usecase, settings=profiling) as profiler:
+                        with profile_stage("build_graph"):
+                            graph = graph_builder.setup_graph(usecase, openai_api_key=openai_api_key)
+                        DisplayResultStreamlit(usecase, graph, user_message, uploaded_files=uploaded_files,
+                                               session_id=user_input.get('session_id'),
+                                               collections=collections).display_result_on_ui()
+                    if profiler is not None and profiler.output_path:
+                        st.caption(f"🔬 Profile saved to {profiler.output_path} ({profiler.wall_seconds * 1000:.0f} ms)")
                 except Exception as e:
-                    st.error(f"Error: Graph setup failed - {e}")
+                    # Provider rate limits are transient; tell the user when to retry instead of showing the raw error
+                    busy = describe_rate_limit(e)
+                    if busy:
+                        st.warning(busy)
+                    else:
+                        st.error(f"Error: Graph setup failed - {e}")
                     return
                 
 
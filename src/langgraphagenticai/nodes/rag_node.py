@@ -1,7 +1,12 @@
 from src.langgraphagenticai.RAG.rag_module import RAGModule
+from src.langgraphagenticai.RAG.query_expansion import QueryExpander
+from src.langgraphagenticai.RAG.metadata_filters import parse_query_filters
+from src.langgraphagenticai.ui.uiconfigfile import Config
+from src.langgraphagenticai.state.payloads import chunk_refs, load_context, release_context, resolve_uploads, store_context
+from src.langgraphagenticai.utils.profiler import profile_stage, profiled
+from src.langgraphagenticai.utils.rate_limiter import describe_rate_limit, provider_priority
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
-import os
 
 class RAGNode:
     """
@@ -20,16 +25,28 @@ class RAGNode:
         self.rag_module = RAGModule(openai_api_key)
         self.state = {}
         self.vectorstore_created = False
+        expansion = Config().get_query_expansion_settings()
+        self.query_expander = QueryExpander(
+            self.rag_module,
+            llm=llm,
+            paraphrases=expansion["paraphrases"],
+            synonyms=expansion["synonyms"],
+            hyde=expansion["hyde"],
+            budget_ms=expansion["budget_ms"],
+            rrf_k=expansion["rrf_k"],
+            llm_workers=expansion["llm_workers"],
+        ) if expansion["enabled"] else None
     
+    @profiled("process_documents")
     def process_documents(self, state: dict) -> dict:
         """
         Process uploaded documents and create vector store.
         
         Args:
-            state: State dictionary containing 'uploaded_files' and 'messages'
+            state: State dictionary containing 'uploads' (upload references) and 'messages'
             
         Returns:
-            Updated state with vector store information
+            State update with the processing result (only the keys this step sets)
         """
         print("=" * 50)
         print("STEP 1: Processing Documents")
@@ -40,43 +57,51 @@ class RAGNode:
         print(f"🔍 Vectorstore already exists: {self.vectorstore_created}")
         print(f"🔍 Vectorstore object exists: {self.rag_module.vectorstore is not None}")
         
-        uploaded_files = state.get('uploaded_files', [])
-        print(f"📄 Number of uploaded files: {len(uploaded_files)}")
+        update = {}
+        uploads = state.get('uploads') or []
+        print(f"📄 Number of uploaded files: {len(uploads)}")
         
         # If vectorstore already exists in memory, skip reprocessing
         if self.vectorstore_created and self.rag_module.vectorstore is not None:
             print("♻️ Vectorstore already exists in memory - skipping document processing")
             print("   Reusing existing vectorstore for retrieval")
-            state['documents_processed'] = True
-            state['skip_processing'] = True
-            return state
+            update['documents_processed'] = True
+            update['skip_processing'] = True
+            return update
         
         # If no files uploaded, try to load vectorstore from disk (for subsequent queries)
-        if not uploaded_files or len(uploaded_files) == 0:
+        if not uploads:
             print("ℹ️  No documents uploaded in this request")
             print("   Checking for existing vectorstore on disk...")
             
-            # Try to find any existing vectorstore in the persist directory
-            persist_dir = self.rag_module.persist_directory
-            if os.path.exists(persist_dir):
-                vectorstore_dirs = [d for d in os.listdir(persist_dir) if os.path.isdir(os.path.join(persist_dir, d)) and d.startswith("vectorstore_")]
-                if vectorstore_dirs:
-                    # Use the most recent vectorstore
-                    latest_dir = max(vectorstore_dirs, key=lambda d: os.path.getmtime(os.path.join(persist_dir, d)))
-                    vectorstore_path = os.path.join(persist_dir, latest_dir)
-                    print(f"   📂 Found existing vectorstore: {latest_dir}")
-                    existing_vectorstore = self.rag_module.load_vectorstore(persist_directory=vectorstore_path)
-                    if existing_vectorstore:
-                        print("   ✅ Loaded existing vectorstore from disk")
-                        self.rag_module.vectorstore = existing_vectorstore
+            # Look up this session's collections in the catalog (never another session's uploads)
+            owner = state.get('session_id')
+            if owner:
+                collection_names = state.get('collections') or []
+                if not collection_names:
+                    latest = self.rag_module.catalog.latest_collection(owner)
+                    collection_names = [latest['name']] if latest else []
+                if collection_names:
+                    print(f"   📂 Loading collection(s): {', '.join(collection_names)}")
+                    loaded = self.rag_module.load_collections(owner, collection_names)
+                    if loaded:
+                        print("   ✅ Loaded existing collection(s) from disk")
                         self.vectorstore_created = True
-                        state['documents_processed'] = True
-                        state['vectorstore_source'] = "loaded_from_disk"
-                        return state
+                        update['documents_processed'] = True
+                        update['vectorstore_source'] = "loaded_from_disk"
+                        update['collections'] = loaded
+                        return update
             
             print("   ⚠️  No existing vectorstore found - user needs to upload documents first")
-            state['error'] = "No documents uploaded and no existing vectorstore found. Please upload a document first."
-            return state
+            update['error'] = "No documents uploaded and no existing vectorstore found. Please upload a document first."
+            return update
+        
+        # The file bytes are only fetched here, where they are read
+        uploaded_files, missing = resolve_uploads(uploads)
+        if missing:
+            print(f"❌ Upload(s) no longer available: {', '.join(missing)}")
+            update['error'] = f"Uploaded file(s) expired from the server cache: {', '.join(missing)}. Please upload them again."
+            return update
         
         try:
             # Get file names for vectorstore persistence
@@ -85,23 +110,26 @@ class RAGNode:
             
             # Try to load existing vectorstore first
             print("🔍 Checking for existing vectorstore on disk...")
-            existing_vectorstore = self.rag_module.load_vectorstore(file_names=file_names)
+            with profile_stage("load_vectorstore"):
+                existing_vectorstore = self.rag_module.load_vectorstore(file_names=file_names)
             
             if existing_vectorstore:
                 print("✅ Found existing vectorstore - using it!")
                 self.rag_module.vectorstore = existing_vectorstore
                 self.vectorstore_created = True
-                state['documents_processed'] = True
-                state['vectorstore_source'] = "loaded_from_disk"
-                state['num_chunks'] = len(existing_vectorstore.index_to_docstore_id) if hasattr(existing_vectorstore, 'index_to_docstore_id') else 0
-                print(f"✅ Using existing vectorstore with {state['num_chunks']} embeddings")
-                return state
+                update['documents_processed'] = True
+                update['vectorstore_source'] = "loaded_from_disk"
+                update['num_chunks'] = existing_vectorstore.index.ntotal
+                print(f"✅ Using existing vectorstore with {update['num_chunks']} embeddings")
+                self._register_upload(state, update, uploaded_files, file_names, update['num_chunks'])
+                return update
             
             print("📝 No existing vectorstore found - processing documents...")
             
             print("📖 Loading documents...")
             # Load documents
-            documents = self.rag_module.load_documents(uploaded_files)
+            with profile_stage("load_documents"):
+                documents = self.rag_module.load_documents(uploaded_files)
             print(f"✅ Loaded {len(documents)} document(s)")
             
             if len(documents) == 0:
@@ -111,34 +139,41 @@ class RAGNode:
                 print("   - PDF is protected/encrypted")
                 print("   - PDF is corrupted")
                 print("   - File is empty")
-                state['error'] = "No content extracted from uploaded files. PDF might be image-based (scanned) and need OCR, or it might be protected/encrypted."
-                return state
+                update['error'] = "No content extracted from uploaded files. PDF might be image-based (scanned) and need OCR, or it might be protected/encrypted."
+                return update
             
             # Check if documents have actual content
             total_chars = sum(len(doc.page_content) if doc.page_content else 0 for doc in documents)
             if total_chars == 0:
                 print("❌ CRITICAL ERROR: Documents loaded but contain no text!")
                 print("   PDF appears to be image-based or unreadable")
-                state['error'] = "PDF loaded but contains no extractable text. This might be a scanned PDF that requires OCR."
-                return state
+                update['error'] = "PDF loaded but contains no extractable text. This might be a scanned PDF that requires OCR."
+                return update
             
             print(f"✅ Documents contain {total_chars} characters of text")
             
             print("✂️ Splitting documents into chunks...")
             # Split documents into chunks
-            chunks = self.rag_module.split_documents(documents)
+            with profile_stage("split_documents"):
+                chunks = self.rag_module.split_documents(documents)
             print(f"✅ Created {len(chunks)} chunk(s)")
             
             if len(chunks) == 0:
                 print("⚠️ WARNING: No chunks created from documents!")
-                state['error'] = "No chunks created from documents"
-                return state
+                update['error'] = "No chunks created from documents"
+                return update
+            
+            # Collapse repeated boilerplate before paying for embeddings
+            with profile_stage("deduplicate_chunks"):
+                chunks = self.rag_module.deduplicate_chunks(chunks)
             
             print("🔧 Creating and saving vector store to disk...")
             print(f"   Creating embeddings for {len(chunks)} chunks...")
             print(f"   This will be saved to disk for future use")
             # Create vector store and save to disk
-            self.rag_module.find_or_create_vectorstore(file_names=file_names, chunks=chunks)
+            # Bulk embedding calls queue behind interactive queries at the provider scheduler
+            with profile_stage("embed_and_index"), provider_priority("batch"):
+                self.rag_module.find_or_create_vectorstore(file_names=file_names, chunks=chunks)
             self.vectorstore_created = True
             print("✅ Vector store created and saved to disk successfully")
             
@@ -148,7 +183,7 @@ class RAGNode:
             verified = False
             for vq in verification_queries:
                 try:
-                    test_docs = self.rag_module.vectorstore.similarity_search(vq, k=min(5, len(chunks)))
+                    test_docs = [doc for doc, _ in self.rag_module.search_current_store(vq, k=min(5, len(chunks)))]
                     if len(test_docs) > 0:
                         print(f"✅ Verified: Vectorstore contains documents (query '{vq[:30]}...' returned {len(test_docs)} docs)")
                         verified = True
@@ -164,36 +199,71 @@ class RAGNode:
             if not verified:
                 print("❌ CRITICAL: Could not verify vectorstore has any documents!")
                 print("   Vectorstore might be empty or corrupted")
-                state['error'] = "Vectorstore created but appears to be empty"
-                return state
+                update['error'] = "Vectorstore created but appears to be empty"
+                return update
             
-            state['documents_processed'] = True
-            state['num_chunks'] = len(chunks)
+            update['documents_processed'] = True
+            update['num_chunks'] = len(chunks)
+            self._register_upload(state, update, uploaded_files, file_names, len(chunks))
             print(f"✅ Documents processed: {len(chunks)} chunks ready")
             print("=" * 50)
-            return state
+            return update
             
         except Exception as e:
             print(f"❌ Error processing documents: {str(e)}")
             import traceback
             traceback.print_exc()
-            state['error'] = f"Error processing documents: {str(e)}"
-            state['error_traceback'] = traceback.format_exc()
+            update['error'] = f"Error processing documents: {str(e)}"
+            update['error_traceback'] = traceback.format_exc()
             print(f"🚨 ERROR DETAILS:")
             print(f"   Error type: {type(e).__name__}")
             print(f"   Error message: {str(e)}")
             print(f"   Full traceback:\n{traceback.format_exc()}")
-            return state
+            return update
     
+    def _register_upload(self, state: dict, update: dict, uploaded_files, file_names, num_chunks: int):
+        """
+        Register the uploaded files as a collection of this session and make any other
+        selected collections searchable alongside it.
+        
+        Args:
+            state: State dictionary (reads 'session_id' and 'collections')
+            update: State update of this step (sets 'collections')
+            uploaded_files: Uploaded file objects
+            file_names: Names of the uploaded files
+            num_chunks: Number of chunks in the vectorstore
+        """
+        owner = state.get('session_id')
+        if not owner:
+            return
+        try:
+            record = self.rag_module.register_collection(
+                owner,
+                file_names,
+                fingerprint=self.rag_module.compute_fingerprint(uploaded_files),
+                num_chunks=num_chunks,
+            )
+            names = [record['name']] + [n for n in (state.get('collections') or []) if n != record['name']]
+            update['collections'] = self.rag_module.load_collections(owner, names)
+            print(f"🗂️ Searching collection(s): {', '.join(update['collections'])}")
+        except Exception as e:
+            # The catalog is an index only; retrieval still works on the in-memory store
+            print(f"⚠️ Warning: Could not register collection: {str(e)}")
+    
+    @profiled("retrieve_context")
     def retrieve_context(self, state: dict) -> dict:
         """
         Retrieve relevant context from vector store based on user query.
         
+        The retrieved documents stay out of the state: it gets chunk references
+        ({"id", "collection", "score"}) and a handle to the documents, which only
+        the answer step fetches.
+        
         Args:
             state: State dictionary containing 'messages' with user query
             
         Returns:
-            Updated state with retrieved context
+            State update with 'query', 'retrieved_chunks', 'context_handle' and 'context_chars'
         """
         print("=" * 50)
         print("STEP 2: Retrieving Context")
@@ -203,7 +273,7 @@ class RAGNode:
         if 'error' in state:
             print(f"❌ Error from previous step: {state['error']}")
             print("   Cannot retrieve context because document processing failed")
-            return state
+            return {}
         
         # Debug: Check vectorstore status
         print(f"🔍 Vectorstore created flag: {self.vectorstore_created}")
@@ -224,18 +294,17 @@ class RAGNode:
                 print("   ❌ Documents were NOT processed successfully in Step 1")
                 print("   Check Step 1 logs for the actual error")
             
-            state['error'] = "Vector store not initialized - document processing likely failed"
-            return state
+            return {'error': "Vector store not initialized - document processing likely failed"}
         
-        # Get user query from messages
-        user_query = state['messages'][0].content if state.get('messages') else ""
+        # Get user query from messages (the latest one: earlier turns may precede it)
+        user_query = state['messages'][-1].content if state.get('messages') else ""
         print(f"🔍 User query: {user_query}")
         
         if not user_query:
             print("❌ Error: No query provided")
-            state['error'] = "No query provided"
-            return state
+            return {'error': "No query provided"}
         
+        update = {'query': user_query}
         try:
             print("🔎 Starting retrieval process...")
             print(f"   User query: '{user_query}'")
@@ -246,20 +315,34 @@ class RAGNode:
             start_time = time.time()
             
             try:
-                # Increase k to 5 to ensure we get more results
-                retrieved_docs = self.rag_module.retrieve_documents(user_query, k=5)
+                # "in the 2023 10-K only", "pages 40-60": restrict the search and embed the rest of the question
+                filters, search_query = parse_query_filters(user_query)
+                if filters:
+                    print(f"🎯 Query filters: {filters} (searching for '{search_query}')")
+                    update['filters'] = filters
+                retrieved = []
+                if self.query_expander is not None:
+                    # Paraphrases / synonyms / HyDE retrieved concurrently and fused (within the latency budget)
+                    try:
+                        retrieved, update['query_expansion'] = self.query_expander.retrieve(
+                            search_query, k=5, filters=filters, with_scores=True)
+                    except Exception as expansion_error:
+                        print(f"⚠️ Warning: Query expansion failed, using the raw query: {str(expansion_error)}")
+                if not retrieved:
+                    # Increase k to 5 to ensure we get more results
+                    retrieved = self.rag_module.retrieve_documents(search_query, k=5, filters=filters, with_scores=True)
                 elapsed_time = time.time() - start_time
                 print(f"⏱️ Retrieval took {elapsed_time:.2f} seconds")
             except Exception as retrieval_error:
                 print(f"❌ ERROR in retrieve_documents: {str(retrieval_error)}")
                 import traceback
                 traceback.print_exc()
-                state['error'] = f"Error during retrieval: {str(retrieval_error)}"
-                return state
+                update['error'] = f"Error during retrieval: {str(retrieval_error)}"
+                return update
             
-            print(f"✅ Retrieved {len(retrieved_docs)} relevant chunk(s)")
+            print(f"✅ Retrieved {len(retrieved)} relevant chunk(s)")
             
-            if len(retrieved_docs) == 0:
+            if len(retrieved) == 0:
                 print("⚠️ WARNING: No documents retrieved from vector store!")
                 print("   This might indicate:")
                 print("   - Vector store is empty")
@@ -271,181 +354,127 @@ class RAGNode:
                 print("   Attempting diagnostic test and forced retrieval...")
                 try:
                     # Try with the actual query again but with more lenient settings
-                    test_docs = self.rag_module.vectorstore.similarity_search(user_query, k=10)
+                    test_docs = [doc for doc, _ in self.rag_module.similarity_search_with_score(user_query, k=10)]
                     print(f"   Diagnostic test with k=10 returned {len(test_docs)} docs")
                     
                     if len(test_docs) > 0:
                         print("   ✅ Vector store has documents - using all retrieved docs!")
-                        retrieved_docs = test_docs[:5]  # Use top 5
-                        print(f"   ✅ Forced retrieval returned {len(retrieved_docs)} docs")
+                        retrieved = [(doc, None) for doc in test_docs[:5]]  # Use top 5
+                        print(f"   ✅ Forced retrieval returned {len(retrieved)} docs")
                     else:
                         # Try with a generic query
                         print("   Trying generic query...")
-                        generic_docs = self.rag_module.vectorstore.similarity_search("the", k=5)
+                        generic_docs = [doc for doc, _ in self.rag_module.similarity_search_with_score("the", k=5)]
                         if len(generic_docs) > 0:
                             print(f"   ✅ Generic query returned {len(generic_docs)} docs - using these!")
-                            retrieved_docs = generic_docs
+                            retrieved = [(doc, None) for doc in generic_docs]
                         else:
                             # Last resort: try to get ANY documents
                             print("   Last resort: trying empty query...")
-                            any_docs = self.rag_module.vectorstore.similarity_search("", k=5)
+                            any_docs = [doc for doc, _ in self.rag_module.similarity_search_with_score("", k=5)]
                             if len(any_docs) > 0:
                                 print(f"   ✅ Empty query returned {len(any_docs)} docs!")
-                                retrieved_docs = any_docs
+                                retrieved = [(doc, None) for doc in any_docs]
                             else:
                                 print("   ❌ Vector store appears to be completely empty!")
-                                state['retrieved_context'] = ""
-                                state['query'] = user_query
-                                state['retrieved_docs'] = []
-                                return state
+                                update['retrieved_chunks'] = []
+                                return update
                 except Exception as diag_error:
                     print(f"   ❌ Diagnostic test failed: {str(diag_error)}")
                     import traceback
                     traceback.print_exc()
                     # Still return empty to avoid crashing
-                    state['retrieved_context'] = ""
-                    state['query'] = user_query
-                    state['retrieved_docs'] = []
-                    return state
-            
-            print("📝 Formatting retrieved context...")
-            # Format retrieved context - ensure we have valid content
-            context_parts = []
-            for doc in retrieved_docs:
-                if doc.page_content and len(doc.page_content.strip()) > 0:
-                    context_parts.append(doc.page_content.strip())
-            
-            context = "\n\n".join(context_parts)
-            print(f"📝 Context length: {len(context)} characters")
-            print(f"📄 First 200 chars of context: {context[:200]}...")
-            
-            if len(context.strip()) == 0:
-                print("⚠️ WARNING: Context is empty after formatting!")
-                print("   Document page_content might be empty")
-                state['error'] = "Retrieved documents but context is empty"
-                return state
-            
-            # Store in state - make sure we're modifying the state dict
-            state['query'] = user_query
-            state['retrieved_context'] = context
-            # Store retrieved_docs as list of page_content strings for serialization
-            state['retrieved_docs_content'] = [doc.page_content for doc in retrieved_docs]
+                    update['retrieved_chunks'] = []
+                    return update
             
-            print("✅ Context retrieved and formatted successfully")
-            print(f"🔍 DEBUG: State keys before return: {list(state.keys())}")
-            print(f"🔍 DEBUG: Retrieved context length: {len(state.get('retrieved_context', ''))}")
-            print(f"🔍 DEBUG: Query value: '{state.get('query', '')}'")
-            print(f"🔍 DEBUG: State 'query' key exists: {'query' in state}")
-            print(f"🔍 DEBUG: State 'retrieved_context' key exists: {'retrieved_context' in state}")
+            # Keep only chunks with content; the answer step joins them into the prompt
+            retrieved = [(doc, score) for doc, score in retrieved if doc.page_content and doc.page_content.strip()]
+            context_chars = sum(len(doc.page_content.strip()) for doc, _ in retrieved) + 2 * max(len(retrieved) - 1, 0)
+            print(f"📝 Context length: {context_chars} characters from {len(retrieved)} chunk(s)")
             
-            # Return state with all fields explicitly
-            result_state = dict(state)  # Make a copy to ensure all fields are included
-            result_state['query'] = user_query
-            result_state['retrieved_context'] = context
-            
-            print(f"🔍 DEBUG: Result state keys: {list(result_state.keys())}")
-            print(f"🔍 DEBUG: Result state query: '{result_state.get('query', 'MISSING')}'")
-            print(f"🔍 DEBUG: Result state context length: {len(result_state.get('retrieved_context', ''))}")
+            if context_chars == 0:
+                print("⚠️ WARNING: Context is empty after formatting!")
+                print("   Document page_content might be empty")
+                update['error'] = "Retrieved documents but context is empty"
+                return update
             
-            return result_state
+            update['retrieved_chunks'] = chunk_refs(retrieved)
+            update['context_handle'] = store_context([doc for doc, _ in retrieved])
+            update['context_chars'] = context_chars
+            print(f"✅ Context retrieved: {len(retrieved)} chunk reference(s), handle {update['context_handle'][:8]}")
+            return update
             
         except Exception as e:
             print(f"❌ Error retrieving context: {str(e)}")
             import traceback
             traceback.print_exc()
-            state['error'] = f"Error retrieving context: {str(e)}"
-            return state
+            update['error'] = f"Error retrieving context: {str(e)}"
+            return update
+    
+    def _load_context_documents(self, state: dict) -> list:
+        """
+        Documents behind the state's context handle, or re-fetched from its chunk
+        references when the handle is gone (evicted or restored from a checkpoint).
+        """
+        docs = load_context(state.get('context_handle'))
+        if docs is None and state.get('retrieved_chunks'):
+            print("🔄 Context handle expired - fetching chunks by reference...")
+            try:
+                docs = self.rag_module.fetch_chunks(state['retrieved_chunks'])
+            except ValueError as e:
+                print(f"⚠️ Warning: Could not fetch chunks: {str(e)}")
+            print(f"   ✅ Fetched {len(docs or [])} of {len(state['retrieved_chunks'])} chunk(s)")
+        return docs or []
     
+    @profiled("generate_response")
     def generate_response(self, state: dict) -> dict:
         """
         Generate LLM response with retrieved context.
         
         Args:
-            state: State dictionary containing 'retrieved_context' and 'query'
+            state: State dictionary containing 'context_handle' / 'retrieved_chunks' and 'query'
             
         Returns:
-            Updated state with LLM response
+            State update with the LLM response in 'messages'
         """
         print("=" * 50)
         print("STEP 3: Generating Response")
         print("=" * 50)
         
-        # Debug: Print entire state to see what we have
+        # The state only holds references; summarize them instead of printing payloads
         print(f"🔍 State keys: {list(state.keys())}")
-        print(f"🔍 State values preview:")
-        for key in state.keys():
-            if key == 'messages':
-                print(f"   {key}: {len(state[key])} messages")
-            elif key == 'uploaded_files':
-                print(f"   {key}: {len(state[key])} files")
-            else:
-                value = state.get(key, '')
-                if isinstance(value, str):
-                    print(f"   {key}: '{value[:100] if len(str(value)) > 100 else value}' (length: {len(value)})")
-                else:
-                    print(f"   {key}: {value}")
+        print(f"🔍 Chunk references: {len(state.get('retrieved_chunks') or [])}, "
+              f"context handle: {(state.get('context_handle') or 'none')[:8]}, "
+              f"context: {state.get('context_chars', 0)} chars")
         
         if 'error' in state:
             print(f"❌ Error found in state: {state['error']}")
-            state['messages'] = [HumanMessage(content=f"Error: {state['error']}")]
-            return state
+            return {'messages': [HumanMessage(content=f"Error: {state['error']}")]}
         
-        # Try multiple ways to get query and context
         query = state.get('query', '')
-        context = state.get('retrieved_context', '')
         
         # If query is empty, try to get it from messages
         if not query and state.get('messages'):
             try:
-                query = state['messages'][0].content
+                query = state['messages'][-1].content
                 print(f"🔍 Got query from messages: '{query}'")
             except:
                 pass
         
         print(f"❓ Query from state: '{query}'")
-        print(f"📄 Context available: {len(context) > 0}")
-        print(f"📄 Context length: {len(context)} characters")
-        
-        # Debug: Check if retrieved_context exists but is empty
-        if 'retrieved_context' not in state:
-            print("⚠️ WARNING: 'retrieved_context' key not in state!")
-            print(f"   Available keys: {list(state.keys())}")
-        elif state.get('retrieved_context') == '':
-            print("⚠️ WARNING: 'retrieved_context' exists but is empty string!")
-        else:
-            print(f"✅ 'retrieved_context' found in state with {len(context)} characters")
         
-        # If context is missing but retrieved_docs_content exists, recreate it
-        if not context and state.get('retrieved_docs_content'):
-            print("🔄 Recreating context from retrieved_docs_content...")
-            context = "\n\n".join(state['retrieved_docs_content'])
-            state['retrieved_context'] = context
-            print(f"✅ Recreated context: {len(context)} characters")
-        
-        if not context or len(context.strip()) == 0:
-            print("❌ No context in state!")
-            print("   Checking if retrieved_docs exists...")
-            retrieved_docs = state.get('retrieved_docs', [])
-            print(f"   Retrieved docs count: {len(retrieved_docs)}")
-            
-            # If we have retrieved_docs but no context, recreate context
-            if len(retrieved_docs) > 0:
-                print("   🔄 Recreating context from retrieved_docs...")
-                context = "\n\n".join([doc.page_content for doc in retrieved_docs if doc.page_content])
-                state['retrieved_context'] = context
-                print(f"   ✅ Recreated context: {len(context)} characters")
-            else:
-                print("   ⚠️ No documents were retrieved in previous step!")
-                state['messages'] = [HumanMessage(content="No relevant documents found in the uploaded files. Please try a different question or check if the documents contain relevant information.")]
-                return state
+        docs = self._load_context_documents(state)
+        if not docs:
+            print("   ⚠️ No documents were retrieved in previous step!")
+            return {'messages': [HumanMessage(content="No relevant documents found in the uploaded files. Please try a different question or check if the documents contain relevant information.")]}
         
+        context = "\n\n".join(doc.page_content.strip() for doc in docs if doc.page_content and doc.page_content.strip())
         if context:
             print(f"📄 Context found: {len(context)} characters")
             print(f"📄 First 300 chars: {context[:300]}...")
         else:
             print("❌ No relevant context found")
-            state['messages'] = [HumanMessage(content="No relevant context found")]
-            return state
+            return {'messages': [HumanMessage(content="No relevant context found")]}
         
         try:
             print("🤖 Generating LLM response...")
@@ -459,25 +488,25 @@ class RAGNode:
             
             # Generate response
             formatted_prompt = prompt_template.format(context=context, query=query)
-            response = self.llm.invoke(formatted_prompt)
+            with profile_stage("llm_invoke"):
+                response = self.llm.invoke(formatted_prompt)
             
             print("✅ Response generated successfully")
             print(f"📝 Response length: {len(response.content) if hasattr(response, 'content') else 'N/A'} characters")
             
-            # Update state with response
-            state['messages'] = [response]
+            # The documents are no longer needed; the chunk references stay in the state
+            release_context(state.get('context_handle'))
             
             print("=" * 50)
             print("✅ RAG Pipeline Complete")
             print("=" * 50)
             
-            return state
+            return {'messages': [response]}
             
         except Exception as e:
             print(f"❌ Error generating response: {str(e)}")
             import traceback
             traceback.print_exc()
-            state['error'] = f"Error generating response: {str(e)}"
-            state['messages'] = [HumanMessage(content=f"Error: {str(e)}")]
-            return state
-
+            message = describe_rate_limit(e) or f"Error: {str(e)}"
+            return {'error': f"Error generating response: {str(e)}",
+                    'messages': [HumanMessage(content=message)]}
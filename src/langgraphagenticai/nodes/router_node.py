@@ -0,0 +1,224 @@
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+ROUTES = ("direct", "rag", "web")
+
+_CHIT_CHAT_PHRASES = (
+    r"hi|hello|hey|hiya|yo|good (?:morning|afternoon|evening)|thanks?(?: you)?(?: so much| a lot)?|thx|ty|"
+    r"ok(?:ay)?|cool|great|nice|perfect|awesome|got it|understood|sure|yes|no|bye|goodbye|see you|"
+    r"how are you|who are you|what can you do"
+)
+# Only chit-chat phrases and forms of address: "ok thanks", "hi there" are chit-chat, "ok guidance?" is not
+_CHIT_CHAT_PATTERN = re.compile(
+    rf"^\s*(?:{_CHIT_CHAT_PHRASES})\b[\s!.?,:)]*"
+    rf"(?:(?:{_CHIT_CHAT_PHRASES}|there|again|please|all|everyone|team|man|mate|buddy|bot)\b[\s!.?,:)]*)*$",
+    re.IGNORECASE,
+)
+_FOLLOW_UP_PATTERN = re.compile(
+    r"\b(?:rephrase|reword|shorter|simpler|in simple terms|summari[sz]e (?:that|this|it|your answer)|"
+    r"explain (?:that|this|it) (?:again|more)|translate (?:that|this|it)|bullet points?|tl;?dr)\b",
+    re.IGNORECASE,
+)
+_DOCUMENT_REFERENCE_PATTERN = re.compile(
+    r"\b(?:document|documents|file|files|pdf|filing|report|upload(?:ed)?|according to|in the (?:release|statement))\b",
+    re.IGNORECASE,
+)
+_FINANCIAL_TERM_PATTERN = re.compile(
+    r"\b(?:revenue|net (?:sales|income|loss)|operating (?:income|margin|cash)|eps|earnings per share|guidance|segment|"
+    r"margin|cash flow|balance sheet|current (?:assets|liabilities|ratio|portion)|assets|liabilities|quarter|q[1-4]|"
+    r"fiscal|year[- ]over[- ]year|yoy|aws|outlook)\b",
+    re.IGNORECASE,
+)
+# Bare "current" is left out: "current liabilities" and "current ratio" are filing terms
+_WEB_PATTERN = re.compile(
+    r"\b(?:latest|today|tonight|yesterday|this week|right now|currently trading|current (?:price|events|news)|"
+    r"news|headline|breaking|"
+    r"weather|stock price|share price|trading at|search (?:the )?(?:web|internet|online)|google|look up|who won)\b",
+    re.IGNORECASE,
+)
+
+_CLASSIFIER_PROMPT = """Classify the user's message for a financial assistant. Reply with exactly one word:
+direct - greetings, thanks, small talk, or general knowledge that needs no documents or web
+rag - questions about the user's uploaded documents (filings, earnings releases, reports)
+web - questions needing current information from the internet (news, prices, recent events)
+
+Documents available: {documents}
+Message: {message}"""
+
+
+class RoutingStats:
+    """
+    Process-wide record of routing decisions.
+
+    Counts decisions per route and source (rule or LLM), keeps a moving average
+    of the retrieval stages' latency measured on RAG turns, and credits that
+    average as latency saved whenever a turn skips retrieval.
+    """
+
+    def __init__(self, log_file: str = ""):
+        """
+        Args:
+            log_file: JSONL file that every decision is appended to (empty disables the log)
+        """
+        self.log_file = log_file
+        self._lock = threading.Lock()
+        self.routes = {route: 0 for route in ROUTES}
+        self.sources = {"rule": 0, "llm": 0, "default": 0}
+        self.retrieval_seconds_avg = None
+        self.latency_saved_seconds = 0.0
+        self.router_seconds = 0.0
+
+    def record_decision(self, decision: Dict) -> float:
+        """
+        Record a routing decision and return the retrieval latency it saved (estimate).
+        """
+        with self._lock:
+            self.routes[decision["route"]] += 1
+            self.sources[decision["source"]] += 1
+            self.router_seconds += decision["router_seconds"]
+            saved = 0.0
+            if decision["route"] != "rag" and self.retrieval_seconds_avg is not None:
+                saved = self.retrieval_seconds_avg
+                self.latency_saved_seconds += saved
+        if self.log_file:
+            entry = dict(decision, latency_saved_seconds=round(saved, 4), timestamp=time.time())
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.log_file)), exist_ok=True)
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"⚠️ Warning: Could not write routing log: {str(e)}")
+        return saved
+
+    def record_retrieval(self, seconds: float):
+        """
+        Record the measured latency of the retrieval stages of a RAG turn.
+        """
+        with self._lock:
+            if self.retrieval_seconds_avg is None:
+                self.retrieval_seconds_avg = seconds
+            else:
+                self.retrieval_seconds_avg = 0.8 * self.retrieval_seconds_avg + 0.2 * seconds
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "routes": dict(self.routes),
+                "sources": dict(self.sources),
+                "retrieval_seconds_avg": round(self.retrieval_seconds_avg, 4) if self.retrieval_seconds_avg is not None else None,
+                "latency_saved_seconds": round(self.latency_saved_seconds, 4),
+                "router_seconds": round(self.router_seconds, 4),
+            }
+
+
+_stats: Dict[str, RoutingStats] = {}
+_stats_lock = threading.Lock()
+
+
+def get_routing_stats(log_file: str = "") -> RoutingStats:
+    """
+    Return the process-wide routing stats (the graph is rebuilt for every message).
+    """
+    with _stats_lock:
+        if log_file not in _stats:
+            _stats[log_file] = RoutingStats(log_file)
+        return _stats[log_file]
+
+
+class RouterNode:
+    """
+    Cheap per-turn router for the agentic graph.
+
+    Rules decide first; the LLM is asked only when no rule is confident. Routes:
+    "direct" (answer from the LLM alone), "rag" (document retrieval) and "web"
+    (search tool loop). Routes that are not available in the built graph fall
+    back to the nearest available one.
+    """
+
+    def __init__(self, llm, available_routes=ROUTES, llm_fallback: bool = True, stats: Optional[RoutingStats] = None):
+        """
+        Args:
+            llm: Language model used only for ambiguous turns
+            available_routes: Routes wired into the graph
+            llm_fallback: Ask the LLM when no rule matches (otherwise use the default route)
+            stats: Routing statistics recorder
+        """
+        self.llm = llm
+        self.available_routes = tuple(available_routes)
+        self.llm_fallback = llm_fallback
+        self.stats = stats or get_routing_stats()
+
+    def classify(self, state: dict) -> Tuple[str, str, str]:
+        """
+        Decide the route for the latest user message.
+
+        Returns:
+            (route, source, reason) where source is "rule", "llm" or "default"
+        """
+        messages = state.get("messages") or []
+        message = messages[-1].content if messages and hasattr(messages[-1], "content") else str(messages[-1] if messages else "")
+        has_history = any(isinstance(m, AIMessage) for m in messages[:-1])
+        has_documents = bool(state.get("uploads") or state.get("collections"))
+
+        if _CHIT_CHAT_PATTERN.match(message):
+            return "direct", "rule", "chit-chat"
+        if has_history and _FOLLOW_UP_PATTERN.search(message):
+            return "direct", "rule", "follow-up on previous answer"
+        if has_documents and _DOCUMENT_REFERENCE_PATTERN.search(message):
+            return "rag", "rule", "refers to the documents"
+        if _WEB_PATTERN.search(message):
+            return "web", "rule", "needs current information"
+        if has_documents and _FINANCIAL_TERM_PATTERN.search(message):
+            return "rag", "rule", "financial question with documents available"
+
+        if self.llm_fallback and self.llm is not None:
+            try:
+                response = self.llm.invoke([HumanMessage(content=_CLASSIFIER_PROMPT.format(
+                    documents="yes" if has_documents else "no", message=message))])
+                text = str(response.content).lower()
+                # Reasoning models may think first; the label is the last route word in the reply
+                labels = re.findall(r"\b(direct|rag|web)\b", text)
+                if labels:
+                    return labels[-1], "llm", "classified by LLM"
+            except Exception as e:
+                print(f"⚠️ Warning: Router LLM classification failed: {str(e)}")
+
+        return ("rag" if has_documents else "direct"), "default", "no rule matched"
+
+    def _available(self, route: str, state: dict) -> str:
+        if route == "rag" and not (state.get("uploads") or state.get("collections")):
+            route = "direct"
+        if route in self.available_routes:
+            return route
+        return "direct"
+
+    def route(self, state: dict) -> dict:
+        """
+        Router node: record the decision in state['route'] and state['routing'].
+        """
+        start_time = time.perf_counter()
+        route, source, reason = self.classify(state)
+        chosen = self._available(route, state)
+        if chosen != route:
+            reason = f"{reason}; '{route}' unavailable"
+        elapsed = time.perf_counter() - start_time
+
+        decision = {"route": chosen, "source": source, "reason": reason, "router_seconds": round(elapsed, 4)}
+        saved = self.stats.record_decision(decision)
+        decision["latency_saved_seconds"] = round(saved, 4)
+        print(f"🧭 Route: {chosen} ({source}: {reason}) in {elapsed * 1000:.1f} ms"
+              + (f", ~{saved:.2f}s retrieval skipped" if saved else ""))
+        return {"route": chosen, "routing": decision}
+
+    @staticmethod
+    def next_node(state: dict) -> str:
+        """
+        Conditional edge function: the route chosen by the router.
+        """
+        return state.get("route", "direct")
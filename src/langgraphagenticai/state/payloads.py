@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Payloads referenced from graph state, shared by every session in the process. The
+# state only carries their ids, so LangGraph copies (and checkpoints) a few strings
+# per step instead of file bytes and retrieved text.
+_lock = threading.Lock()
+_uploads = OrderedDict()   # upload id -> uploaded file object (the Streamlit object, not a copy)
+_contexts = OrderedDict()  # context handle -> retrieved documents
+
+_limits = {}
+
+
+def _limit(name: str) -> int:
+    if not _limits:
+        from src.langgraphagenticai.ui.uiconfigfile import Config
+        _limits.update(Config().get_payload_settings())
+    return _limits[name]
+
+
+def _remember(cache: OrderedDict, key: str, value, limit: int):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+
+def register_uploads(uploaded_files: List) -> List[Dict]:
+    """
+    Register uploaded files and return references to them for the graph state.
+
+    The id is the content hash, so re-registering the same upload on the next message
+    (Streamlit reruns) reuses the entry instead of adding one.
+
+    Args:
+        uploaded_files: Uploaded file objects (``name`` and ``getvalue()``)
+
+    Returns:
+        One ``{"id", "name", "size"}`` reference per file
+    """
+    refs = []
+    for uploaded_file in uploaded_files or []:
+        data = uploaded_file.getvalue()
+        # Same key as the extraction cache (SHA-256 of the content)
+        ref = {"id": hashlib.sha256(data).hexdigest(), "name": uploaded_file.name, "size": len(data)}
+        with _lock:
+            _remember(_uploads, ref["id"], uploaded_file, _limit("max_uploads"))
+        refs.append(ref)
+    return refs
+
+
+def resolve_uploads(refs: List[Dict]) -> Tuple[List, List[str]]:
+    """
+    Uploaded file objects for references (fetched only by the node that reads the bytes).
+
+    Returns:
+        (files, missing) where missing lists the names of evicted uploads
+    """
+    files, missing = [], []
+    with _lock:
+        for ref in refs or []:
+            uploaded_file = _uploads.get(ref["id"])
+            if uploaded_file is None:
+                missing.append(ref["name"])
+            else:
+                _uploads.move_to_end(ref["id"])
+                files.append(uploaded_file)
+    return files, missing
+
+
+def chunk_id(doc) -> str:
+    """
+    Stable id of a chunk: its source and text, so it survives re-indexing and reloads.
+    """
+    source = str(doc.metadata.get("source", "")) if doc.metadata else ""
+    return hashlib.blake2b(f"{source}\0{doc.page_content}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def chunk_refs(docs_with_scores: List) -> List[Dict]:
+    """
+    ``{"id", "collection", "score"}`` references for (document, score) pairs.
+    """
+    return [
+        {"id": chunk_id(doc), "collection": (doc.metadata or {}).get("collection"),
+         "score": None if score is None else round(float(score), 4)}
+        for doc, score in docs_with_scores
+    ]
+
+
+def store_context(docs: List) -> str:
+    """
+    Keep retrieved documents for the answer step and return their handle.
+    """
+    handle = uuid.uuid4().hex
+    with _lock:
+        _remember(_contexts, handle, list(docs), _limit("max_contexts"))
+    return handle
+
+
+def load_context(handle: Optional[str]) -> Optional[List]:
+    """
+    Retrieved documents behind a context handle (None if unknown or evicted).
+    """
+    if not handle:
+        return None
+    with _lock:
+        return _contexts.get(handle)
+
+
+def release_context(handle: Optional[str]):
+    """
+    Drop retrieved documents once the answer has been generated.
+    """
+    with _lock:
+        _contexts.pop(handle, None)
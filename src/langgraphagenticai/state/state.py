@@ -6,12 +6,23 @@ from langchain_core.messages import HumanMessage, AIMessage
 class State(TypedDict, total=False):
     """
     Represents the structure of the state used in the graph.
+
+    Payloads (file bytes, retrieved text) stay out of the state: it carries
+    references resolved through state/payloads.py by the node that needs them,
+    so each step copies and checkpoints a few ids instead of documents.
     """
     messages: Annotated[list, add_messages]
-    uploaded_files: List  # Optional field for RAG document uploads
+    uploads: List[dict]  # Optional field for RAG uploads: {"id": content hash, "name", "size"} (see payloads.register_uploads)
     query: str  # Optional field for RAG query
-    retrieved_context: str  # Optional field for retrieved context
-    retrieved_docs: List  # Optional field for retrieved documents
+    retrieved_chunks: List[dict]  # Optional field for retrieved chunks: {"id", "collection", "score"} (L2 distance, or RRF score with query expansion)
+    context_handle: str  # Optional field for the handle of the retrieved documents (payloads.load_context)
+    context_chars: int  # Optional field for the size of the retrieved context
     documents_processed: bool  # Optional field to track document processing
     num_chunks: int  # Optional field for number of chunks
-    error: str  # Optional field for errors
\ No newline at end of file
+    error: str  # Optional field for errors
+    session_id: str  # Optional field for the owning session (RAG collections)
+    collections: List[str]  # Optional field for RAG collections to search
+    route: str  # Optional field for the agentic router's decision (direct, rag, web)
+    routing: dict  # Optional field for the routing decision details (source, reason, timings)
+    query_expansion: dict  # Optional field for the query expansion report (variants, dropped, documents added)
+    filters: dict  # Optional field for metadata filters parsed from the query (doc type, fiscal period, pages)
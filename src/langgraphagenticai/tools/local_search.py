@@ -0,0 +1,75 @@
+import os
+import re
+import json
+import time
+from typing import Dict, List, Type
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from src.langgraphagenticai.tools.search_cache import SearchInput
+
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+class LocalSearchTool(BaseTool):
+    """
+    Offline stand-in for web search.
+
+    Scores the entries of a local JSON corpus (a list of {"title", "url", "content"}
+    objects) by query term overlap and returns them in the same shape as Tavily
+    results. Without a corpus it returns a single placeholder result. An optional
+    simulated latency makes offline runs behave like a remote API.
+    """
+
+    name: str = "local_search_results_json"
+    description: str = (
+        "A search engine over a local document collection. "
+        "Useful for when you need to answer questions about current events. "
+        "Input should be a search query."
+    )
+    args_schema: Type[BaseModel] = SearchInput
+    max_results: int = 2
+    corpus_path: str = ""
+    latency_ms: int = 0
+    corpus: List[Dict] = []
+
+    def __init__(self, max_results: int = 2, corpus_path: str = "", latency_ms: int = 0, **kwargs):
+        """
+        Args:
+            max_results: Results returned per query
+            corpus_path: JSON file with the searchable entries (optional)
+            latency_ms: Simulated per-search latency in milliseconds
+        """
+        corpus = []
+        if corpus_path and os.path.exists(corpus_path):
+            with open(corpus_path, "r", encoding="utf-8") as f:
+                corpus = json.load(f)
+            print(f"📚 Local search corpus: {len(corpus)} entries from {corpus_path}")
+        elif corpus_path:
+            print(f"⚠️ Local search corpus not found: {corpus_path}")
+        super().__init__(max_results=max_results, corpus_path=corpus_path, latency_ms=latency_ms, corpus=corpus, **kwargs)
+
+    def _run(self, query: str, **kwargs) -> List[Dict]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        terms = set(_TERM_PATTERN.findall(query.lower()))
+        if not self.corpus:
+            return [{
+                "url": "local://offline",
+                "content": f"Offline search backend: no local corpus configured for '{query}'.",
+            }]
+
+        scored = []
+        for entry in self.corpus:
+            text = f"{entry.get('title', '')} {entry.get('content', '')}".lower()
+            score = len(terms & set(_TERM_PATTERN.findall(text)))
+            if score:
+                scored.append((score, entry))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            {"url": entry.get("url", "local://corpus"), "content": entry.get("content", "")}
+            for _, entry in scored[:self.max_results]
+        ]
@@ -0,0 +1,163 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key form of a search query: case-folded, whitespace collapsed and
+    trailing punctuation stripped, so "Amazon Q3 revenue?" and "amazon  q3 revenue"
+    share one entry.
+    """
+    return _WHITESPACE_PATTERN.sub(" ", str(query).casefold()).strip().rstrip("?!. ")
+
+
+class SearchResultCache:
+    """
+    Thread-safe, process-wide TTL + LRU cache of search results.
+
+    Concurrent lookups of the same key are coalesced: the first caller runs the
+    search and the others wait for its result, so identical tool calls issued in
+    one turn (or by several sessions at once) reach the search API once.
+    """
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 512):
+        """
+        Args:
+            ttl_seconds: Seconds a result stays valid (0 disables caching)
+            max_entries: Entries kept before the least recently used one is evicted
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], cacheable: Callable[[Any], bool] = bool) -> Tuple[Any, bool]:
+        """
+        Return the cached value for key, or compute, cache and return it.
+
+        Args:
+            key: Cache key
+            compute: Produces the value on a miss
+            cacheable: Decides whether a computed value may be cached (errors should not be)
+
+        Returns:
+            (value, True if it came from the cache or a coalesced in-flight search)
+        """
+        if self.ttl_seconds <= 0:
+            return compute(), False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1], True
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if cacheable(value):
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats["evictions"] += 1
+        future.set_result(value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_caches: Dict[tuple, SearchResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(ttl_seconds: float = 900, max_entries: int = 512) -> SearchResultCache:
+    """
+    Return the process-wide cache for these settings. The graph is rebuilt for every
+    message, so the cache lives at module level to be shared across turns and sessions.
+    """
+    with _caches_lock:
+        key = (ttl_seconds, max_entries)
+        if key not in _caches:
+            _caches[key] = SearchResultCache(ttl_seconds, max_entries)
+        return _caches[key]
+
+
+class SearchInput(BaseModel):
+    """Input for the search tool."""
+
+    query: str = Field(description="search query to look up")
+
+
+class CachedSearchTool(BaseTool):
+    """
+    Wraps a search tool with the shared result cache.
+
+    The wrapped tool's name and description are kept, so the LLM sees the same
+    tool. Only list results are cached; error strings are returned uncached.
+    """
+
+    name: str = "search"
+    description: str = "A search engine. Input should be a search query."
+    args_schema: Type[BaseModel] = SearchInput
+    search_tool: BaseTool
+    cache: Any = None
+
+    def __init__(self, search_tool: BaseTool, cache: Optional[SearchResultCache] = None, **kwargs):
+        super().__init__(
+            search_tool=search_tool,
+            cache=cache or get_search_cache(),
+            name=search_tool.name,
+            description=search_tool.description,
+            **kwargs,
+        )
+
+    def _cache_key(self, query: str) -> str:
+        max_results = getattr(self.search_tool, "max_results", "")
+        return f"{self.search_tool.name}:{max_results}:{normalize_query(query)}"
+
+    def _run(self, query: str, **kwargs) -> Any:
+        start_time = time.perf_counter()
+        result, cached = self.cache.get_or_compute(
+            self._cache_key(query),
+            lambda: self.search_tool.invoke({"query": query}),
+            cacheable=lambda value: isinstance(value, list) and len(value) > 0,
+        )
+        elapsed = time.perf_counter() - start_time
+        if cached:
+            print(f"⚡ Search cache hit for '{query}' ({elapsed * 1000:.1f} ms)")
+        else:
+            print(f"🔍 Searched '{query}' with {self.search_tool.name} ({elapsed:.2f}s)")
+        return result
@@ -1,17 +1,40 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langgraph.prebuilt import ToolNode
+from src.langgraphagenticai.ui.uiconfigfile import Config
+from src.langgraphagenticai.tools.search_cache import CachedSearchTool, get_search_cache
+
+def get_search_tool(backend: str, max_results: int = 2, settings: dict = None):
+    """
+    Return the raw search tool for a backend: "tavily" (web) or "local" (offline stand-in)
+    """
+    settings = settings or {}
+    if backend == "tavily":
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        from src.langgraphagenticai.tools.tavily_client import PooledTavilySearchAPIWrapper
+        return TavilySearchResults(max_results=max_results, api_wrapper=PooledTavilySearchAPIWrapper())
+    if backend == "local":
+        from src.langgraphagenticai.tools.local_search import LocalSearchTool
+        return LocalSearchTool(
+            max_results=max_results,
+            corpus_path=settings.get("local_corpus", ""),
+            latency_ms=settings.get("local_latency_ms", 0),
+        )
+    raise ValueError(f"Unsupported search backend: {backend}. Choose 'tavily' or 'local'")
 
 def get_tools():
     """
     Return the list of tools to be used in the chatbot
     """
-    tools=[TavilySearchResults(max_results=2)]
+    settings = Config().get_search_settings()
+    search_tool = get_search_tool(settings["backend"], settings["max_results"], settings)
+    cache = get_search_cache(settings["cache_ttl_seconds"], settings["cache_max_entries"])
+    tools=[CachedSearchTool(search_tool, cache=cache)]
     return tools
 
 def create_tool_node(tools):
     """
     creates and returns a tool node for the graph
+
+    ToolNode runs all tool calls of one AIMessage concurrently on a thread pool,
+    so a turn takes as long as its slowest tool call rather than the sum.
     """
+    from langgraph.prebuilt import ToolNode
     return ToolNode(tools=tools)
-
-
@@ -0,0 +1,39 @@
+from typing import Dict, List, Optional
+
+from langchain_community.utilities.tavily_search import TAVILY_API_URL, TavilySearchAPIWrapper
+
+from src.langgraphagenticai.LLMS.http_clients import get_http_client
+
+
+class PooledTavilySearchAPIWrapper(TavilySearchAPIWrapper):
+    """
+    Tavily API wrapper that sends requests through the shared keep-alive client
+    instead of opening a new connection with ``requests.post`` for every search.
+    """
+
+    def raw_results(
+        self,
+        query: str,
+        max_results: Optional[int] = 5,
+        search_depth: Optional[str] = "advanced",
+        include_domains: Optional[List[str]] = [],
+        exclude_domains: Optional[List[str]] = [],
+        include_answer: Optional[bool] = False,
+        include_raw_content: Optional[bool] = False,
+        include_images: Optional[bool] = False,
+    ) -> Dict:
+        api_key = self.tavily_api_key.get_secret_value()
+        params = {
+            "api_key": api_key,
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+            "include_domains": include_domains,
+            "exclude_domains": exclude_domains,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "include_images": include_images,
+        }
+        response = get_http_client("tavily", api_key).post(f"{TAVILY_API_URL}/search", json=params)
+        response.raise_for_status()
+        return response.json()
@@ -1,14 +1,19 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage,AIMessage,ToolMessage
 import json
+import time
+from src.langgraphagenticai.state.payloads import register_uploads
+from src.langgraphagenticai.ui.uiconfigfile import Config
 
 
 class DisplayResultStreamlit:
-    def __init__(self,usecase,graph,user_message,uploaded_files=None):
+    def __init__(self,usecase,graph,user_message,uploaded_files=None,session_id=None,collections=None):
         self.usecase= usecase
         self.graph = graph
         self.user_message = user_message
         self.uploaded_files = uploaded_files
+        self.session_id = session_id
+        self.collections = collections
 
     def display_result_on_ui(self):
         usecase= self.usecase
@@ -16,44 +21,51 @@ class DisplayResultStreamlit:
         user_message = self.user_message
         if usecase =="Basic Chatbot":
                 for event in graph.stream({'messages':("user",user_message)}):
-                    print(event.values())
+                    print(f"Node: {', '.join(event)}")
                     for value in event.values():
-                        print(value['messages'])
                         with st.chat_message("user"):
                             st.write(user_message)
                         with st.chat_message("assistant"):
                             st.write(value["messages"].content)
 
         elif usecase=="Chatbot with Tool":
-             # Prepare state and invoke the graph
+            # Stream the agent/tool loop so each step renders as it happens
             initial_state = {"messages": [user_message]}
-            res = graph.invoke(initial_state)
-            for message in res['messages']:
-                if type(message) == HumanMessage:
-                    with st.chat_message("user"):
-                        st.write(message.content)
-                elif type(message)==ToolMessage:
-                    with st.chat_message("ai"):
-                        st.write("Tool Call Start")
-                        st.write(message.content)
-                        st.write("Tool Call End")
-                elif type(message)==AIMessage and message.content:
-                    with st.chat_message("assistant"):
-                        st.write(message.content)
+            self.stream_agent_chat(initial_state)
+
+        elif usecase == "Agentic Assistant":
+            # One graph: the router picks a direct answer, document retrieval or web search.
+            # The graph is rebuilt per message, so earlier turns are passed in with the new one:
+            # the router recognises follow-ups and the direct answer sees what it is following up on.
+            history_limit = Config().get_router_settings()["history_messages"]
+            history = st.session_state.setdefault("agentic_history", [])
+            message = HumanMessage(content=user_message)
+            initial_state = {
+                "messages": (history[-history_limit:] if history_limit > 0 else []) + [message],
+                "uploads": register_uploads(self.uploaded_files),
+                "session_id": self.session_id,
+                "collections": self.collections if self.collections else []
+            }
+            answer = self.stream_agent_chat(initial_state)
+            if answer and history_limit > 0:
+                history.extend([message, AIMessage(content=answer)])
+                del history[:-history_limit]
 
         elif usecase == "RAG Chatbot":
             # Display user message
             with st.chat_message("user"):
                 st.write(user_message)
             
-            # Prepare initial state with uploaded files and user message
+            # Prepare initial state with references to the uploaded files and the user message
             initial_state = {
                 "messages": [HumanMessage(content=user_message)],
-                "uploaded_files": self.uploaded_files if self.uploaded_files else []
+                "uploads": register_uploads(self.uploaded_files),
+                "session_id": self.session_id,
+                "collections": self.collections if self.collections else []
             }
             
-            # Check if files are uploaded
-            if not self.uploaded_files or len(self.uploaded_files) == 0:
+            # Check if files are uploaded or a previously indexed collection is selected
+            if (not self.uploaded_files or len(self.uploaded_files) == 0) and not self.collections:
                 with st.chat_message("assistant"):
                     st.error("⚠️ Please upload at least one document (PDF or TXT) before asking questions.")
                 return
@@ -65,11 +77,10 @@ class DisplayResultStreamlit:
                 # Stream through the graph to see each step
                 final_result = None
                 for event in graph.stream(initial_state):
-                    # Print event to console for debugging
-                    print("Event:", event)
-                    
                     for node_name, node_output in event.items():
-                        print(f"Node: {node_name}, Output: {node_output}")
+                        # Log the keys each node set, not their payloads
+                        print(f"Node: {node_name}, updated: {sorted(node_output or {})}")
+                        node_output = node_output or {}
                         
                         # Show progress for each step
                         if node_name == "process_documents":
@@ -88,9 +99,9 @@ class DisplayResultStreamlit:
                         
                         elif node_name == "retrieve_context":
                             status_placeholder.info("🔍 **Step 2/3**: Retrieving relevant context from documents...")
-                            if node_output.get('retrieved_context'):
-                                context_len = len(node_output.get('retrieved_context', ''))
-                                status_placeholder.success(f"✅ Step 2 Complete: Retrieved context ({context_len} chars)")
+                            if node_output.get('context_chars'):
+                                status_placeholder.success(f"✅ Step 2 Complete: Retrieved {len(node_output.get('retrieved_chunks', []))} "
+                                                           f"chunk(s) ({node_output['context_chars']} chars)")
                             elif node_output.get('error'):
                                 error_msg = node_output['error']
                                 status_placeholder.error(f"❌ Step 2 Error: {error_msg}")
@@ -125,3 +136,93 @@ class DisplayResultStreamlit:
                 st.code(traceback.format_exc())
                 print(f"Exception traceback:\n{traceback.format_exc()}")
              
+
+    # Nodes whose LLM output is the assistant's answer
+    ANSWER_NODES = ("chatbot", "direct_answer", "generate_response")
+
+    def stream_agent_chat(self, initial_state):
+        """
+        Render an agent turn incrementally.
+
+        Uses ``stream_mode=["updates", "messages"]``: "messages" delivers LLM tokens
+        while an answer node is still generating, "updates" delivers each finished
+        node (routing decision, retrieval steps, tool calls requested by the chatbot,
+        tool results from the tool node). Every step is shown with its duration as
+        soon as it completes.
+
+        Returns:
+            The final answer text ("" if the turn produced none)
+        """
+        with st.chat_message("user"):
+            st.write(self.user_message)
+
+        turn_start = step_start = time.perf_counter()
+        step = 0
+        answer_placeholder = None
+        answer_text = ""
+        final_answer = ""
+
+        for mode, chunk in self.graph.stream(initial_state, stream_mode=["updates", "messages"]):
+            if mode == "messages":
+                message_chunk, metadata = chunk
+                # Partial assistant text from an answer node's LLM call
+                if metadata.get("langgraph_node") in self.ANSWER_NODES and isinstance(message_chunk.content, str) and message_chunk.content:
+                    if answer_placeholder is None:
+                        with st.chat_message("assistant"):
+                            answer_placeholder = st.empty()
+                    answer_text += message_chunk.content
+                    answer_placeholder.markdown(answer_text + "▌")
+                continue
+
+            for node_name, node_output in chunk.items():
+                if not node_output:
+                    continue
+                step += 1
+                elapsed = time.perf_counter() - step_start
+                step_start = time.perf_counter()
+                print(f"⏱️ Step {step} ({node_name}): {elapsed:.2f}s")
+
+                if node_name == "router":
+                    routing = node_output.get("routing", {})
+                    saved = routing.get("latency_saved_seconds", 0)
+                    st.caption(f"🧭 Route: **{routing.get('route')}** ({routing.get('source')}: {routing.get('reason')})"
+                               + (f" - skipped ~{saved:.2f}s of retrieval" if saved else ""))
+
+                elif node_name in ("process_documents", "retrieve_context"):
+                    if node_output.get("error"):
+                        st.error(f"**Retrieval Failed:** {node_output['error']}")
+                        return ""
+                    st.caption(f"⏱️ Step {step} - {node_name}: {elapsed:.2f}s")
+
+                elif node_name in self.ANSWER_NODES:
+                    messages = node_output.get("messages") or []
+                    message = messages[-1] if isinstance(messages, list) else messages
+                    content = getattr(message, "content", None) if message else None
+                    if content:
+                        # Replace the streamed text with the final message
+                        if answer_placeholder is None:
+                            with st.chat_message("assistant"):
+                                answer_placeholder = st.empty()
+                        answer_placeholder.markdown(content)
+                        final_answer = content
+                    if getattr(message, "tool_calls", None):
+                        with st.chat_message("ai"):
+                            for tool_call in message.tool_calls:
+                                st.write(f"🔧 Tool call: `{tool_call['name']}` {json.dumps(tool_call['args'])}")
+                    st.caption(f"⏱️ Step {step} - {node_name}: {elapsed:.2f}s")
+                    # The next LLM call (after tool results) gets its own message bubble
+                    answer_placeholder = None
+                    answer_text = ""
+
+                elif node_name == "tools":
+                    with st.chat_message("ai"):
+                        for message in node_output["messages"]:
+                            if type(message) == ToolMessage:
+                                with st.expander(f"📄 Tool result: {message.name}", expanded=False):
+                                    st.write(message.content)
+                    st.caption(f"⏱️ Step {step} - tools: {elapsed:.2f}s")
+
+        total = time.perf_counter() - turn_start
+        st.caption(f"⏱️ Turn completed in {total:.2f}s over {step} step(s)")
+        print(f"⏱️ Turn completed in {total:.2f}s over {step} step(s)")
+        return final_answer
@@ -1,9 +1,12 @@
 import streamlit as st
 import os
+import uuid
 from datetime import date
 
 from langchain_core.messages import AIMessage,HumanMessage
 from src.langgraphagenticai.ui.uiconfigfile import Config
+from src.langgraphagenticai.RAG.catalog import VectorstoreCatalog
+from src.langgraphagenticai.RAG.preloader import get_preloader
 
 
 class LoadStreamlitUI:
@@ -28,6 +31,10 @@ class LoadStreamlitUI:
         st.set_page_config(page_title= "🤖 " + self.config.get_page_title(), layout="wide")
         st.header("🤖 " + self.config.get_page_title())
         st.session_state.IsSDLC = False
+        # Stable id for this browser session; owns the RAG collections it uploads
+        if "session_id" not in st.session_state:
+            st.session_state["session_id"] = uuid.uuid4().hex
+        self.user_controls["session_id"] = st.session_state["session_id"]
         
         
 
@@ -54,21 +61,33 @@ class LoadStreamlitUI:
             # Use case selection
             self.user_controls["selected_usecase"] = st.selectbox("Select Usecases", usecase_options)
 
-            if self.user_controls["selected_usecase"] == "Chatbot with Tool":
-                # API key input
-                os.environ["TAVILY_API_KEY"] = self.user_controls["TAVILY_API_KEY"] = st.session_state["TAVILY_API_KEY"] = st.text_input("TAVILY API KEY",
-                                                                                                      type="password")
-                # Validate API key
-                if not self.user_controls["TAVILY_API_KEY"]:
-                    st.warning("⚠️ Please enter your TAVILY_API_KEY key to proceed. Don't have? refer : https://app.tavily.com/home")
+            if self.user_controls["selected_usecase"] in ("Chatbot with Tool", "Agentic Assistant"):
+                # API key input (only the Tavily search backend needs it)
+                search_backend = self.config.get_search_settings()["backend"]
+                if search_backend == "tavily":
+                    os.environ["TAVILY_API_KEY"] = self.user_controls["TAVILY_API_KEY"] = st.session_state["TAVILY_API_KEY"] = st.text_input("TAVILY API KEY",
+                                                                                                          type="password")
+                    # Validate API key
+                    if not self.user_controls["TAVILY_API_KEY"]:
+                        st.warning("⚠️ Please enter your TAVILY_API_KEY key to proceed. Don't have? refer : https://app.tavily.com/home")
+                else:
+                    st.caption(f"🔍 Search: {search_backend} backend (no Tavily key needed)")
             
-            if self.user_controls["selected_usecase"] == "RAG Chatbot":
-                # OpenAI API key input
-                self.user_controls["OPENAI_API_KEY"] = st.session_state["OPENAI_API_KEY"] = st.text_input("OpenAI API KEY",
-                                                                                                      type="password")
-                # Validate API key
-                if not self.user_controls["OPENAI_API_KEY"]:
-                    st.warning("⚠️ Please enter your OpenAI API key to proceed. Don't have? refer : https://platform.openai.com/api-keys")
+            if self.user_controls["selected_usecase"] in ("RAG Chatbot", "Agentic Assistant"):
+                # OpenAI API key input (only the OpenAI embedding backend needs it)
+                if self.config.get_embedding_backend() == "openai":
+                    self.user_controls["OPENAI_API_KEY"] = st.session_state["OPENAI_API_KEY"] = st.text_input("OpenAI API KEY",
+                                                                                                          type="password")
+                    # Validate API key
+                    if not self.user_controls["OPENAI_API_KEY"]:
+                        st.warning("⚠️ Please enter your OpenAI API key to proceed. Don't have? refer : https://platform.openai.com/api-keys")
+                else:
+                    st.caption(f"🧠 Embeddings: {self.config.get_embedding_backend()} backend (no OpenAI key needed)")
+                
+                # Readiness of the hot collections preloaded at startup
+                preloader = get_preloader(self.config.get_vectorstore_dir())
+                if preloader is not None and preloader.status:
+                    st.caption(preloader.describe())
                 
                 # File upload widget
                 st.subheader("📄 Upload Documents")
@@ -85,6 +104,29 @@ class LoadStreamlitUI:
                     st.success(f"✅ {len(uploaded_files)} file(s) uploaded")
                 else:
                     self.user_controls["uploaded_files"] = st.session_state.get("uploaded_files", [])
+                
+                # Previously indexed collections of this session
+                catalog = VectorstoreCatalog(os.path.join(self.config.get_vectorstore_dir(), "catalog.sqlite3"))
+                collections = catalog.list_collections(self.user_controls["session_id"])
+                if collections:
+                    labels = {c["name"]: catalog.describe(c) for c in collections}
+                    self.user_controls["selected_collections"] = st.multiselect(
+                        "Search collections",
+                        options=list(labels.keys()),
+                        default=[collections[0]["name"]],
+                        format_func=lambda name: labels[name],
+                        help="Collections to search together with any newly uploaded files"
+                    )
+                else:
+                    self.user_controls["selected_collections"] = []
+
+            # Opt-in profiling of the next message (CPU samples, stage timings, memory)
+            if self.config.get_profiling_settings()["ui_toggle"]:
+                self.user_controls["profile_request"] = st.checkbox(
+                    "🔬 Profile next message",
+                    value=False,
+                    help="Record a CPU flamegraph, per-stage timings and memory allocations to the profiling output directory"
+                )
             
             if "state" not in st.session_state:
                 st.session_state.state = self.initialize_session()
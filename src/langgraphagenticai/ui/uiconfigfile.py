@@ -1,9 +1,89 @@
+import os
+import re
+import uuid
+import threading
 from configparser import ConfigParser
+from typing import Dict, Optional
+
+CONFIG_FILE = "./src/langgraphagenticai/ui/uiconfigfile.ini"
+
+# Parsed config files shared by every Config() in the process, keyed by path and
+# checked against the file's mtime so edits to the ini are still picked up
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+def _load_config(config_file: str) -> ConfigParser:
+    path = os.path.abspath(config_file)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    with _parsed_lock:
+        cached = _parsed.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        config = ConfigParser()
+        config.read(path)
+        _parsed[path] = (mtime, config)
+        return config
+
+
+def apply_overrides(overrides: Dict[str, str], config_file: str = CONFIG_FILE):
+    """
+    Override settings in this process only (the ini file is not written).
+
+    Every Config() shares the parsed file, so the values hold for the rest of the
+    process, until the ini file itself changes and is parsed again.
+    """
+    section = _load_config(config_file)["DEFAULT"]
+    for key, value in overrides.items():
+        section[key] = str(value)
+
+
+def update_config_file(updates: Dict[str, Optional[str]], config_file: str = CONFIG_FILE) -> Dict[str, Optional[str]]:
+    """
+    Set keys in the ini file with one atomic replace, keeping every other line as it is.
+
+    Running processes pick the new values up on their next Config() (the file's mtime changes).
+
+    Args:
+        updates: Key -> new value (None removes the key)
+        config_file: Path to the ini file
+
+    Returns:
+        The previous value of each key (None where it was not set), for undoing the update
+    """
+    with open(config_file, "r") as f:
+        lines = f.read().splitlines()
+    pending = {key.upper(): value for key, value in updates.items()}
+    previous = {key: None for key in pending}
+    output, written = [], set()
+    for line in lines:
+        key = line.split("=", 1)[0].strip().upper() if "=" in line and not line.lstrip().startswith(("#", ";")) else None
+        if key not in pending:
+            output.append(line)
+            continue
+        if key in written:
+            continue
+        written.add(key)
+        previous[key] = line.split("=", 1)[1].strip()
+        if pending[key] is not None:
+            output.append(f"{key} = {pending[key]}")
+    output.extend(f"{key} = {value}" for key, value in pending.items() if key not in written and value is not None)
+    tmp_path = f"{config_file}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(output) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, config_file)
+    return previous
+
 
 class Config:
-    def __init__(self,config_file="./src/langgraphagenticai/ui/uiconfigfile.ini"):
-        self.config=ConfigParser()
-        self.config.read(config_file)
+    def __init__(self,config_file=CONFIG_FILE):
+        # Streamlit reruns the script on every interaction; reuse the parsed file
+        self.config=_load_config(config_file)
 
     def get_llm_options(self):
         return self.config["DEFAULT"].get("LLM_OPTIONS").split(", ")
@@ -17,3 +97,200 @@ class Config:
     def get_page_title(self):
         return self.config["DEFAULT"].get("PAGE_TITLE")
 
+    def get_embedding_backend(self):
+        return self.config["DEFAULT"].get("EMBEDDING_BACKEND", "openai")
+
+    def get_embedding_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "openai_model": section.get("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002"),
+            "local_model": section.get("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+            "local_runtime": section.get("LOCAL_EMBEDDING_RUNTIME", "torch"),
+            "batch_size": section.getint("EMBEDDING_BATCH_SIZE", 64),
+            "workers": section.getint("EMBEDDING_WORKERS", 4),
+            "hashing_dimension": section.getint("HASHING_EMBEDDING_DIMENSION", 384),
+        }
+
+    def get_vectorstore_dir(self):
+        return self.config["DEFAULT"].get("VECTORSTORE_DIR", "./vectorstore_db") or "./vectorstore_db"
+
+    def get_vector_storage_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "mode": section.get("VECTOR_STORAGE_MODE", "flat"),
+            "rescore": section.getboolean("VECTOR_RESCORE", True),
+            "rescore_factor": section.getint("RESCORE_CANDIDATES_FACTOR", 4),
+            "pq_subvectors": section.getint("PQ_SUBVECTORS", 0),
+            "snapshot_format": section.get("SNAPSHOT_FORMAT", "faiss"),
+        }
+
+    def get_dimension_reduction_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "index_dimension": section.getint("INDEX_DIMENSION", 0),
+            "method": section.get("DIMENSION_REDUCTION", "auto"),
+            "seed": section.getint("DIMENSION_REDUCTION_SEED", 0),
+        }
+
+    def get_chunking_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "chunker": section.get("CHUNKER", "recursive"),
+            "chunk_tokens": section.getint("CHUNK_TOKENS", 400),
+            "min_chunk_tokens": section.getint("MIN_CHUNK_TOKENS", 40),
+            "workers": section.getint("CHUNKER_WORKERS", 0),
+            "chunk_size": section.getint("CHUNK_SIZE", 1000),
+            "chunk_overlap": section.getint("CHUNK_OVERLAP", 200),
+        }
+
+    def get_dedup_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "enabled": section.getboolean("DEDUP_ENABLED", False),
+            "threshold": section.getfloat("DEDUP_THRESHOLD", 0.85),
+            "num_perm": section.getint("DEDUP_NUM_PERM", 128),
+            "shingle_size": section.getint("DEDUP_SHINGLE_SIZE", 3),
+        }
+
+    def get_extraction_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "pdf_backend": section.get("PDF_BACKEND", "pypdf"),
+            "cache_dir": section.get("EXTRACTION_CACHE_DIR", ""),
+        }
+
+    def get_search_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "backend": section.get("SEARCH_BACKEND", "tavily"),
+            "max_results": section.getint("SEARCH_MAX_RESULTS", 2),
+            "cache_ttl_seconds": section.getfloat("SEARCH_CACHE_TTL_SECONDS", 900),
+            "cache_max_entries": section.getint("SEARCH_CACHE_MAX_ENTRIES", 512),
+            "local_corpus": section.get("LOCAL_SEARCH_CORPUS", ""),
+            "local_latency_ms": section.getint("LOCAL_SEARCH_LATENCY_MS", 0),
+        }
+
+    def get_router_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "llm_fallback": section.getboolean("ROUTER_LLM_FALLBACK", True),
+            "log_file": section.get("ROUTER_LOG_FILE", ""),
+            "history_messages": section.getint("ROUTER_HISTORY_MESSAGES", 10),
+        }
+
+    def get_http_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "max_connections": section.getint("HTTP_MAX_CONNECTIONS", 20),
+            "max_keepalive_connections": section.getint("HTTP_MAX_KEEPALIVE_CONNECTIONS", 10),
+            "keepalive_expiry": section.getfloat("HTTP_KEEPALIVE_EXPIRY_SECONDS", 60),
+            "connect_timeout": section.getfloat("HTTP_CONNECT_TIMEOUT_SECONDS", 5),
+            "read_timeout": section.getfloat("HTTP_READ_TIMEOUT_SECONDS", 60),
+            "connect_retries": section.getint("HTTP_CONNECT_RETRIES", 2),
+            "max_retries": section.getint("HTTP_MAX_RETRIES", 2),
+            "http2": section.getboolean("HTTP2", True),
+        }
+
+    def get_query_batching_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "enabled": section.getboolean("QUERY_BATCHING", True),
+            "max_wait_ms": section.getfloat("QUERY_BATCH_WAIT_MS", 5),
+            "max_batch_size": section.getint("QUERY_BATCH_MAX_SIZE", 64),
+            "embed_workers": section.getint("QUERY_BATCH_EMBED_WORKERS", 2),
+            "store_cache_size": section.getint("STORE_CACHE_SIZE", 16),
+        }
+
+    def get_query_expansion_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "enabled": section.getboolean("QUERY_EXPANSION", False),
+            "paraphrases": section.getint("QUERY_EXPANSION_PARAPHRASES", 2),
+            "synonyms": section.getboolean("QUERY_EXPANSION_SYNONYMS", True),
+            "hyde": section.getboolean("QUERY_EXPANSION_HYDE", False),
+            "budget_ms": section.getfloat("QUERY_EXPANSION_BUDGET_MS", 1500),
+            "rrf_k": section.getint("QUERY_EXPANSION_RRF_K", 60),
+            "llm_workers": section.getint("QUERY_EXPANSION_LLM_WORKERS", 4),
+        }
+
+    def get_sharding_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "shard_count": section.getint("SHARD_COUNT", 0),
+            "start_method": section.get("SHARD_START_METHOD", "spawn"),
+            "timeout": section.getfloat("SHARD_TIMEOUT_SECONDS", 60),
+        }
+
+    def get_segment_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "enabled": section.getboolean("SEGMENT_STORE", True),
+            "disk_budget_mb": section.getfloat("DISK_BUDGET_MB", 2048),
+            "gc_interval": section.getfloat("DISK_GC_INTERVAL_SECONDS", 600),
+            "gc_min_idle": section.getfloat("DISK_GC_MIN_IDLE_SECONDS", 3600),
+        }
+
+    def get_profiling_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "sample_rate": section.getfloat("PROFILING_SAMPLE_RATE", 0.0),
+            "ui_toggle": section.getboolean("PROFILING_UI_TOGGLE", True),
+            "interval_ms": section.getfloat("PROFILING_INTERVAL_MS", 5),
+            "trace_memory": section.getboolean("PROFILING_TRACE_MEMORY", True),
+            "top_allocations": section.getint("PROFILING_TOP_ALLOCATIONS", 10),
+            "output_dir": section.get("PROFILING_OUTPUT_DIR", "./logs/profiles"),
+        }
+
+    def get_payload_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "max_uploads": section.getint("PAYLOAD_MAX_UPLOADS", 64),
+            "max_contexts": section.getint("PAYLOAD_MAX_CONTEXTS", 256),
+        }
+
+    def get_rate_limit_settings(self):
+        section = self.config["DEFAULT"]
+        # "provider[:model]=<n>rpm/<n>tpm" entries; a provider entry applies to each of its models
+        limits = {}
+        for entry in section.get("RATE_LIMITS", "").split(", "):
+            if "=" not in entry:
+                continue
+            name, value = entry.rsplit("=", 1)
+            requests = re.search(r"([\d.]+)\s*rpm", value)
+            tokens = re.search(r"([\d.]+)\s*tpm", value)
+            limits[name.strip()] = (float(requests.group(1)) if requests else 0.0,
+                                    float(tokens.group(1)) if tokens else 0.0)
+        return {
+            "enabled": section.getboolean("RATE_LIMITING", True),
+            "limits": limits,
+            "max_queue": section.getint("RATE_LIMIT_MAX_QUEUE", 64),
+            "max_wait": {
+                "interactive": section.getfloat("RATE_LIMIT_MAX_WAIT_INTERACTIVE_SECONDS", 20),
+                "batch": section.getfloat("RATE_LIMIT_MAX_WAIT_BATCH_SECONDS", 300),
+            },
+            "interactive_reserve": section.getfloat("RATE_LIMIT_INTERACTIVE_RESERVE", 0.2),
+            "burst_seconds": section.getfloat("RATE_LIMIT_BURST_SECONDS", 10),
+        }
+
+    def get_reindex_settings(self):
+        section = self.config["DEFAULT"]
+        # "<embedding backend id>=<USD per 1M tokens>" entries; backends without a price run locally for free
+        prices = {}
+        for entry in section.get("EMBEDDING_PRICES", "").split(", "):
+            if "=" in entry:
+                backend_id, price = entry.rsplit("=", 1)
+                prices[backend_id.strip()] = float(price)
+        return {
+            "prices": prices,
+            "probes": section.getint("REINDEX_PROBES", 50),
+            "min_self_recall": section.getfloat("REINDEX_MIN_SELF_RECALL", 0.9),
+            "min_source_agreement": section.getfloat("REINDEX_MIN_SOURCE_AGREEMENT", 0.8),
+            "sample_chunks": section.getint("REINDEX_SAMPLE_CHUNKS", 16),
+        }
+
+    def get_preload_settings(self):
+        section = self.config["DEFAULT"]
+        return {
+            "collections": [name.strip() for name in section.get("HOT_COLLECTIONS", "").split(",") if name.strip()],
+            "ready_file": section.get("PRELOAD_READY_FILE", ""),
+        }
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import functools
+import threading
+import tracemalloc
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Profiler of the request running in this context (None = not profiled)
+_active = contextvars.ContextVar("active_profiler", default=None)
+
+# tracemalloc is process-wide; it runs while at least one profiled request traces memory
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+# Frames that only show the sampler or the tracer itself
+_IGNORED_FILES = (tracemalloc.__file__, threading.__file__, __file__)
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(1)
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+class RequestProfiler:
+    """
+    Opt-in profiler for one request (one graph run).
+
+    A background thread samples the stacks of the threads running the request
+    every ``interval_ms`` and counts them per stack, which is what flamegraph
+    tools read ("folded stacks": ``root;caller;callee count``). Stages opened with
+    ``profile_stage`` record wall time, CPU time and their share of the samples;
+    with ``trace_memory``, ``tracemalloc`` runs for the request and top-level
+    stages (the RAGNode steps) also report their peak and top allocations.
+
+    Sampling costs one stack walk per interval and nothing between samples, so a
+    low ``PROFILING_SAMPLE_RATE`` can stay on in production. Memory tracing slows
+    allocation-heavy code while the request runs and is process-wide, so
+    requests running concurrently with a traced one show up in its allocations.
+    """
+
+    def __init__(self, label: str = "request", output_dir: str = "./logs/profiles", interval_ms: float = 5,
+                 trace_memory: bool = True, top_allocations: int = 10):
+        """
+        Args:
+            label: Name of the request (use case), part of the output directory name
+            output_dir: Directory receiving one sub-directory per profiled request
+            interval_ms: Sampling interval of the CPU profiler
+            trace_memory: Trace allocations with tracemalloc
+            top_allocations: Allocation sites listed per top-level stage
+        """
+        self.label = label
+        self.request_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{label.replace(' ', '_').lower()}_{uuid.uuid4().hex[:6]}"
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self.samples = Counter()
+        self.stages: List[Dict] = []
+        self._stage_stack: Dict[int, List[str]] = {}
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._token = None
+        self.start_time = self.wall_seconds = 0.0
+        # Time spent taking and comparing tracemalloc snapshots, kept out of the stage timings
+        self.overhead_seconds = 0.0
+        self.output_path = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self._threads.add(threading.get_ident())
+        self._token = _active.set(self)
+        if self.trace_memory:
+            _start_tracing()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = [ident for ident in self._threads if ident != own and ident in frames]
+                stages = {ident: "/".join(self._stage_stack.get(ident, [])) for ident in threads}
+            for ident in threads:
+                stack = []
+                frame = frames[ident]
+                while frame is not None:
+                    if frame.f_code.co_filename not in _IGNORED_FILES:
+                        stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                root = f"stage:{stages[ident] or '(none)'}"
+                self.samples[";".join([root] + stack[::-1])] += 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a named stage of the request; stages nest ("process_documents/load_documents").
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.add(ident)
+            stack = self._stage_stack.setdefault(ident, [])
+            stack.append(name)
+            path = "/".join(stack)
+            depth = len(stack) - 1
+        snapshot = None
+        memory_start = 0
+        if self.trace_memory and tracemalloc.is_tracing():
+            if depth == 0:
+                # Snapshots are the expensive part of memory tracing; PROFILING_TOP_ALLOCATIONS = 0 skips them
+                if self.top_allocations > 0:
+                    overhead_start = time.perf_counter()
+                    snapshot = tracemalloc.take_snapshot()
+                    self.overhead_seconds += time.perf_counter() - overhead_start
+                tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": path,
+                "depth": depth,
+                "start_ms": round((wall_start - self.start_time) * 1000, 2),
+                "wall_ms": round((time.perf_counter() - wall_start) * 1000, 2),
+                "cpu_ms": round((time.thread_time() - cpu_start) * 1000, 2),
+            }
+            if self.trace_memory and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                record["memory_delta_kb"] = round((current - memory_start) / 1024, 1)
+                if depth == 0:
+                    record["memory_peak_kb"] = round((peak - memory_start) / 1024, 1)
+                if snapshot is not None:
+                    overhead_start = time.perf_counter()
+                    record["top_allocations"] = self._top_allocations(snapshot)
+                    self.overhead_seconds += time.perf_counter() - overhead_start
+            with self._lock:
+                self.stages.append(record)
+                stack.pop()
+
+    def _top_allocations(self, before) -> List[Dict]:
+        ignored = [tracemalloc.Filter(False, path) for path in _IGNORED_FILES] + [tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        after = tracemalloc.take_snapshot().filter_traces(ignored)
+        differences = after.compare_to(before.filter_traces(ignored), "lineno")
+        top = sorted((d for d in differences if d.size_diff > 0), key=lambda d: d.size_diff, reverse=True)
+        return [
+            {"site": f"{d.traceback[0].filename}:{d.traceback[0].lineno}", "size_kb": round(d.size_diff / 1024, 1),
+             "count": d.count_diff}
+            for d in top[:self.top_allocations]
+        ]
+
+    def stop(self) -> Dict:
+        """
+        Stop sampling and tracing, write the profile and return the report.
+        """
+        self.wall_seconds = time.perf_counter() - self.start_time
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._token is not None:
+            _active.reset(self._token)
+        if self.trace_memory:
+            _stop_tracing()
+        report = self.report()
+        try:
+            self.output_path = self.save(report)
+            print(f"🔬 Profile of {self.label} ({self.wall_seconds * 1000:.0f} ms, {report['samples']} samples) "
+                  f"saved to {self.output_path}")
+        except OSError as e:
+            print(f"⚠️ Warning: Could not save profile: {str(e)}")
+        print(f"   {'(outside stages)':<26} {report['unstaged_ms']:9.1f} ms wall, profiler overhead "
+              f"{report['profiler_overhead_ms']:.1f} ms")
+        for stage in report["stages"]:
+            memory = f", peak +{stage['memory_peak_kb']:.0f} KB" if "memory_peak_kb" in stage else ""
+            print(f"   {'  ' * stage['depth']}{stage['stage'].split('/')[-1]:<24} {stage['wall_ms']:9.1f} ms wall "
+                  f"{stage['cpu_ms']:9.1f} ms CPU{memory}")
+        return report
+
+    def report(self) -> Dict:
+        stages = sorted(self.stages, key=lambda stage: stage["start_ms"])
+        top_level = sum(stage["wall_ms"] for stage in stages if stage["depth"] == 0)
+        # Time outside every stage: graph setup, Streamlit rendering, LangGraph overhead
+        unstaged = round((self.wall_seconds - self.overhead_seconds) * 1000 - top_level, 2)
+        samples_per_stage = Counter()
+        for stack, count in self.samples.items():
+            samples_per_stage[stack.split(";", 1)[0][len("stage:"):]] += count
+        return {
+            "request_id": self.request_id,
+            "label": self.label,
+            "wall_ms": round(self.wall_seconds * 1000, 2),
+            "unstaged_ms": unstaged,
+            "profiler_overhead_ms": round(self.overhead_seconds * 1000, 2),
+            "interval_ms": self.interval * 1000,
+            "samples": sum(self.samples.values()),
+            "samples_per_stage": dict(samples_per_stage.most_common()),
+            "stages": stages,
+        }
+
+    def save(self, report: Dict) -> str:
+        """
+        Write cpu.folded (flamegraph.pl / speedscope input) and report.json.
+        """
+        path = os.path.join(self.output_dir, self.request_id)
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "cpu.folded"), "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(path, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return path
+
+
+@contextmanager
+def profile_request(enabled: bool, label: str = "request", settings: Optional[Dict] = None):
+    """
+    Profile the enclosed request when enabled (yields the profiler, or None).
+
+    Args:
+        enabled: Profile this request (UI toggle or ``should_profile``)
+        label: Request name used in the output directory
+        settings: Profiling settings (default: from uiconfigfile.ini)
+    """
+    if not enabled:
+        yield None
+        return
+    if settings is None:
+        from src.langgraphagenticai.ui.uiconfigfile import Config
+        settings = Config().get_profiling_settings()
+    profiler = RequestProfiler(label, output_dir=settings["output_dir"], interval_ms=settings["interval_ms"],
+                               trace_memory=settings["trace_memory"], top_allocations=settings["top_allocations"])
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+
+
+def should_profile(requested: bool = False, sample_rate: float = 0.0) -> bool:
+    """
+    Whether to profile a request: explicitly requested, or picked at the sampling rate.
+    """
+    return bool(requested) or (sample_rate > 0 and random.random() < sample_rate)
+
+
+@contextmanager
+def profile_stage(name: str):
+    """
+    Record a stage of the current request if it is being profiled (no-op otherwise).
+    """
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def profiled(name: str):
+    """
+    Decorator recording every call of a function as a profiling stage.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active.get() is None:
+                return function(*args, **kwargs)
+            with profile_stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,420 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+# Priority classes, most urgent first: a user waiting on an answer goes before bulk ingestion
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_priority = contextvars.ContextVar("provider_priority", default="interactive")
+
+
+@contextmanager
+def provider_priority(name: str):
+    """
+    Run provider calls made in this context with the given priority class.
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority class '{name}' (expected one of {', '.join(PRIORITIES)})")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class ProviderBusyError(RuntimeError):
+    """
+    A provider call could not be scheduled within its priority's wait limit.
+    """
+
+    def __init__(self, provider: str, retry_after: float, reason: str):
+        self.provider = provider
+        self.retry_after = retry_after
+        super().__init__(f"{provider} is busy ({reason}); please retry in about {max(1, math.ceil(retry_after))}s")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds in a rate-limit header: "12", "1.5", "6ms", "2m59.56s" or an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(number) * scale[unit] for number, unit in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_request(request: httpx.Request) -> Tuple[Optional[str], int]:
+    """
+    Model and estimated token cost (about 4 characters per token) of a provider request.
+
+    Chat requests count the prompt plus the requested completion size, embedding
+    requests their input; other requests (search) cost no tokens.
+    """
+    try:
+        body = json.loads(request.content or b"{}")
+    except (httpx.RequestNotRead, ValueError):
+        return None, 0
+    if not isinstance(body, dict):
+        return None, 0
+    model = body.get("model")
+    characters = 0
+    for message in body.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        characters += len(content) if isinstance(content, str) else len(json.dumps(content or ""))
+    inputs = body.get("input")
+    if isinstance(inputs, str):
+        characters += len(inputs)
+    elif isinstance(inputs, list):
+        # Pre-tokenized inputs (lists of token ids) are counted as they are
+        characters += sum(len(item) * 4 if isinstance(item, list) else len(str(item)) for item in inputs)
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or 0
+    return model, math.ceil(characters / 4) + int(completion)
+
+
+class TokenBucket:
+    """
+    Requests-per-minute and tokens-per-minute buckets of one provider model, with a
+    priority queue in front of them.
+
+    Waiters are served in priority order (then arrival order). Batch calls also
+    leave ``reserve`` of each bucket untouched, so an interactive call arriving
+    during an ingestion burst finds capacity instead of queueing behind it.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float,
+                 max_queue: int = 64, reserve: float = 0.2, burst_seconds: float = 60):
+        """
+        Args:
+            name: "provider:model", used in messages
+            requests_per_minute: Request limit (0 = unlimited)
+            tokens_per_minute: Token limit (0 = unlimited)
+            max_queue: Waiting calls beyond which new calls are rejected
+            reserve: Share of each bucket batch calls may not use
+            burst_seconds: Bucket size in seconds of quota; providers often enforce
+                           per-minute limits over shorter windows, so a full minute
+                           of burst can still be refused
+        """
+        self.name = name
+        self.request_rate = requests_per_minute / 60
+        self.token_rate = tokens_per_minute / 60
+        self.request_capacity = self.request_rate * burst_seconds
+        self.token_capacity = self.token_rate * burst_seconds
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.max_queue = max_queue
+        self.reserve = reserve
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+        self.stats = {"granted": 0, "rejected": 0, "waited_seconds": 0.0, "throttled": 0}
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        self.updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_rate)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_rate)
+
+    def _cost(self, tokens: int, rank: int) -> float:
+        # A call larger than the bucket would never fit; it goes once the bucket is full
+        return min(float(tokens), self.token_capacity * (1 - (self.reserve if rank else 0)))
+
+    def _wait_time(self, tokens: float, rank: int, now: float) -> float:
+        wait = max(0.0, self.blocked_until - now)
+        reserve = self.reserve if rank else 0.0
+        for level, capacity, rate, cost in ((self.requests, self.request_capacity, self.request_rate, 1.0),
+                                            (self.tokens, self.token_capacity, self.token_rate, tokens)):
+            if capacity > 0:
+                missing = min(cost, capacity) + reserve * capacity - level
+                if missing > 0:
+                    wait = max(wait, missing / rate)
+        return wait
+
+    def acquire(self, tokens: int, priority: str, max_wait: float) -> float:
+        """
+        Wait until the call fits, then take its request and tokens from the buckets.
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            ProviderBusyError: The queue is full, or the call cannot start within max_wait
+        """
+        rank = PRIORITIES[priority]
+        start = time.monotonic()
+        deadline = start + max_wait
+        cost = self._cost(tokens, rank)
+        with self._cond:
+            self._refill(start)
+            if len(self._waiters) >= self.max_queue:
+                self.stats["rejected"] += 1
+                raise ProviderBusyError(self.name, self._wait_time(cost, rank, start) or 1.0,
+                                        f"{len(self._waiters)} calls queued")
+            entry = (rank, next(self._sequence))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._wait_time(cost, rank, now)
+                    if self._waiters[0] == entry and wait <= 0:
+                        heapq.heappop(self._waiters)
+                        self.requests -= 1 if self.request_capacity > 0 else 0
+                        self.tokens -= cost if self.token_capacity > 0 else 0
+                        waited = now - start
+                        self.stats["granted"] += 1
+                        self.stats["waited_seconds"] += waited
+                        self._cond.notify_all()
+                        return waited
+                    if now + wait > deadline or now >= deadline:
+                        self.stats["rejected"] += 1
+                        raise ProviderBusyError(self.name, wait, f"{priority} wait limit of {max_wait:g}s")
+                    # Wake up when the buckets should have refilled, or when the head of the queue changes
+                    self._cond.wait(timeout=max(0.005, min(wait, deadline - now)) if self._waiters[0] == entry
+                                    else max(0.005, deadline - now))
+            finally:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+
+    def block(self, seconds: float):
+        """
+        Hold every call for ``seconds`` (the provider answered 429 with retry-after).
+        """
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.stats["throttled"] += 1
+
+    def observe_remaining(self, requests: Optional[float] = None, tokens: Optional[float] = None):
+        """
+        Lower the buckets to what the provider reports as remaining (other processes
+        and API keys shared with other apps use the same quota).
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            if requests is not None and self.request_capacity > 0:
+                self.requests = min(self.requests, requests)
+            if tokens is not None and self.token_capacity > 0:
+                self.tokens = min(self.tokens, tokens)
+
+    def queued(self) -> int:
+        with self._cond:
+            return len(self._waiters)
+
+
+class ProviderScheduler:
+    """
+    Process-wide scheduler in front of every LLM, embedding and search call.
+
+    Limits are configured per provider and optionally per model; each model of a
+    provider gets its own buckets, as providers count quotas per model.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float]], max_queue: int = 64,
+                 max_wait: Optional[Dict[str, float]] = None, reserve: float = 0.2, burst_seconds: float = 60):
+        """
+        Args:
+            limits: "provider" or "provider:model" -> (requests/min, tokens/min)
+            max_queue: Waiting calls per model beyond which new calls are rejected
+            max_wait: Priority class -> longest wait in seconds before a call is rejected
+            reserve: Share of each bucket batch calls leave for interactive calls
+            burst_seconds: Seconds of quota a bucket holds (see TokenBucket)
+        """
+        self.limits = limits
+        self.max_queue = max_queue
+        self.max_wait = max_wait or {"interactive": 20.0, "batch": 300.0}
+        self.reserve = reserve
+        self.burst_seconds = burst_seconds
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, provider: str, model: Optional[str] = None) -> Optional[TokenBucket]:
+        """
+        Buckets of a provider model (None if the provider is not limited).
+        """
+        name = f"{provider}:{model}" if model else provider
+        with self._lock:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                limit = self.limits.get(name) or self.limits.get(provider)
+                if limit is None or not any(limit):
+                    return None
+                bucket = TokenBucket(name, limit[0], limit[1], self.max_queue, self.reserve, self.burst_seconds)
+                self._buckets[name] = bucket
+            return bucket
+
+    def acquire(self, provider: str, model: Optional[str] = None, tokens: int = 0,
+                priority: Optional[str] = None) -> float:
+        """
+        Wait for capacity for one call (priority defaults to the context's class).
+
+        Returns:
+            Seconds spent waiting
+        """
+        bucket = self.bucket(provider, model)
+        if bucket is None:
+            return 0.0
+        priority = priority or _priority.get()
+        waited = bucket.acquire(tokens, priority, self.max_wait.get(priority, 20.0))
+        if waited > 0.5:
+            print(f"⏳ Waited {waited:.1f}s for {bucket.name} capacity ({priority})")
+        return waited
+
+    def observe(self, provider: str, model: Optional[str], response: httpx.Response):
+        """
+        Apply a provider response's rate-limit headers to the model's buckets.
+        """
+        bucket = self.bucket(provider, model)
+        if bucket is None:
+            return
+        headers = response.headers
+        if response.status_code == 429:
+            retry_after = (parse_duration(headers.get("retry-after-ms")) or 0) / 1000 if "retry-after-ms" in headers \
+                else parse_duration(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = max(parse_duration(headers.get("x-ratelimit-reset-requests")) or 0,
+                                  parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0) or 1.0
+            bucket.block(retry_after)
+            print(f"🚦 {bucket.name} rate-limited by the provider; holding calls for {retry_after:.1f}s")
+
+        def remaining(name):
+            try:
+                return float(headers[name]) if name in headers else None
+            except ValueError:
+                return None
+        bucket.observe_remaining(remaining("x-ratelimit-remaining-requests"), remaining("x-ratelimit-remaining-tokens"))
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            buckets = list(self._buckets.values())
+        return {bucket.name: dict(bucket.stats, queued=bucket.queued(), requests=round(bucket.requests, 1),
+                                  tokens=round(bucket.tokens)) for bucket in buckets}
+
+
+def _busy_response(request: httpx.Request, error: ProviderBusyError) -> httpx.Response:
+    print(f"🚦 {str(error)}")
+    return httpx.Response(
+        429,
+        headers={"retry-after": str(max(1, math.ceil(error.retry_after))), "x-local-rate-limit": "1"},
+        json={"error": {"message": str(error), "type": "rate_limit_exceeded", "code": "local_rate_limit"}},
+        request=request,
+    )
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    httpx transport that schedules every request of a provider before sending it.
+
+    A call that cannot be scheduled gets a local 429 response with a retry-after
+    header, which the provider SDKs already handle (retry after the delay, then
+    raise their rate-limit error), instead of an exception from inside the transport.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, provider: str, scheduler: ProviderScheduler):
+        self.transport = transport
+        self.provider = provider
+        self.scheduler = scheduler
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = estimate_request(request)
+        try:
+            self.scheduler.acquire(self.provider, model, tokens)
+        except ProviderBusyError as e:
+            return _busy_response(request, e)
+        response = self.transport.handle_request(request)
+        self.scheduler.observe(self.provider, model, response)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of RateLimitedTransport, for the SDKs' ``http_async_client``.
+
+    Async calls share the buckets and queue of the sync calls. The wait for
+    capacity runs in a worker thread (with the caller's priority context), so a
+    throttled call never blocks the event loop.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, provider: str, scheduler: ProviderScheduler):
+        self.transport = transport
+        self.provider = provider
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = estimate_request(request)
+        try:
+            await asyncio.to_thread(self.scheduler.acquire, self.provider, model, tokens)
+        except ProviderBusyError as e:
+            return _busy_response(request, e)
+        response = await self.transport.handle_async_request(request)
+        self.scheduler.observe(self.provider, model, response)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_scheduler: Optional[ProviderScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[ProviderScheduler]:
+    """
+    The process-wide provider scheduler (None when RATE_LIMITING is off).
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from src.langgraphagenticai.ui.uiconfigfile import Config
+            settings = Config().get_rate_limit_settings()
+            if not settings["enabled"]:
+                return None
+            _scheduler = ProviderScheduler(settings["limits"], max_queue=settings["max_queue"],
+                                           max_wait=settings["max_wait"], reserve=settings["interactive_reserve"],
+                                           burst_seconds=settings["burst_seconds"])
+        return _scheduler
+
+
+def describe_rate_limit(error: BaseException) -> Optional[str]:
+    """
+    A user-facing message if an exception (or its cause) is a rate limit, else None.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, ProviderBusyError):
+            return f"⏳ {str(error)}"
+        response = getattr(error, "response", None)
+        if getattr(error, "status_code", None) == 429 or getattr(response, "status_code", None) == 429:
+            retry_after = parse_duration(response.headers.get("retry-after")) if response is not None else None
+            wait = f" in about {max(1, math.ceil(retry_after))}s" if retry_after else " in a few seconds"
+            return f"⏳ The model provider is rate-limiting requests right now; please retry{wait}."
+        error = error.__cause__ or error.__context__
+    return None